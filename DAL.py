@@ -3,10 +3,20 @@ Data Access Layer (DAL) for Flask Portfolio Website
 Handles all database interactions for the projects database
 """
 
+import asyncio
+import functools
 import sqlite3
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import os
 
+from migrations import MigrationRunner
+
+# Columns of the projects table that callers may select
+PROJECT_FIELDS = ('id', 'title', 'description', 'image_filename', 'category',
+                  'technologies', 'project_url', 'duration', 'role',
+                  'created_date', 'version')
+
 class DAL:
     """Data Access Layer for managing database operations"""
     
@@ -18,8 +28,36 @@ class DAL:
             db_name: Name of the SQLite database file
         """
         self.db_name = db_name
+        self.listeners = []
         self.init_database()
     
+    def add_listener(self, callback: Callable[[str, int], None]):
+        """
+        Register a callback to run after every successful write
+        
+        Args:
+            callback: Called as callback(action, project_id) where action is
+                      'add', 'update' or 'delete'
+        """
+        self.listeners.append(callback)
+    
+    def notify_listeners(self, action: str, project_id: int):
+        """
+        Tell registered listeners that a project changed
+        
+        The write is already committed, so a failing listener is reported
+        and skipped rather than turning a saved write into an error.
+        
+        Args:
+            action: 'add', 'update' or 'delete'
+            project_id: ID of the project that changed
+        """
+        for callback in self.listeners:
+            try:
+                callback(action, project_id)
+            except Exception as e:
+                print(f"Change listener failed for {action} of project {project_id}: {e}")
+    
     def get_connection(self) -> sqlite3.Connection:
         """
         Create and return a database connection
@@ -36,24 +74,15 @@ class DAL:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Create projects table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                image_filename TEXT NOT NULL,
-                category TEXT,
-                technologies TEXT,
-                project_url TEXT,
-                duration TEXT,
-                role TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
+        # New databases free deleted pages incrementally (see maintenance.py);
+        # existing files keep their mode until rebuilt with VACUUM
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
         conn.commit()
         conn.close()
+        
+        # Tables and columns are versioned in migrations.py; backfills of
+        # existing rows run in the background so startup is not blocked
+        MigrationRunner(self.db_name).migrate(background=True)
         print(f"Database '{self.db_name}' initialized successfully.")
     
     def add_project(self, title: str, description: str, image_filename: str, 
@@ -87,15 +116,20 @@ class DAL:
               project_url, duration, role))
         
         project_id = cursor.lastrowid
+        self.record_change(cursor, 'add', project_id)
         conn.commit()
         conn.close()
         
+        self.notify_listeners('add', project_id)
         return project_id
     
-    def get_all_projects(self) -> List[Dict]:
+    def get_all_projects(self, limit: int = None) -> List[Dict]:
         """
-        Retrieve all projects from the database
+        Retrieve all projects from the database, newest first
         
+        Args:
+            limit: Maximum number of projects to return (None for all)
+            
         Returns:
             List[Dict]: List of all projects as dictionaries
         """
@@ -104,10 +138,11 @@ class DAL:
         
         cursor.execute('''
             SELECT id, title, description, image_filename, category, 
-                   technologies, project_url, duration, role, created_date
+                   technologies, project_url, duration, role, created_date, version
             FROM projects
             ORDER BY created_date DESC
-        ''')
+            LIMIT ?
+        ''', (-1 if limit is None else limit,))
         
         rows = cursor.fetchall()
         conn.close()
@@ -125,7 +160,8 @@ class DAL:
                 'project_url': row['project_url'],
                 'duration': row['duration'],
                 'role': row['role'],
-                'created_date': row['created_date']
+                'created_date': row['created_date'],
+                'version': row['version']
             })
         
         return projects
@@ -145,7 +181,7 @@ class DAL:
         
         cursor.execute('''
             SELECT id, title, description, image_filename, category, 
-                   technologies, project_url, duration, role, created_date
+                   technologies, project_url, duration, role, created_date, version
             FROM projects
             WHERE id = ?
         ''', (project_id,))
@@ -164,10 +200,75 @@ class DAL:
                 'project_url': row['project_url'],
                 'duration': row['duration'],
                 'role': row['role'],
-                'created_date': row['created_date']
+                'created_date': row['created_date'],
+                'version': row['version']
             }
         return None
     
+    def get_projects_page(self, after_id: int = None, limit: int = 50,
+                          fields: Tuple[str, ...] = PROJECT_FIELDS) -> List[Dict]:
+        """
+        Get one page of projects, newest first, using keyset pagination
+        
+        Args:
+            after_id: Return projects with an ID below this one (None = first page)
+            limit: Maximum number of projects to return
+            fields: Columns to include (must be in PROJECT_FIELDS; id is always included)
+            
+        Returns:
+            List[Dict]: Projects ordered by ID descending
+        """
+        columns = self._select_columns(fields)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        if after_id is None:
+            cursor.execute(f'SELECT {columns} FROM projects ORDER BY id DESC LIMIT ?', (limit,))
+        else:
+            cursor.execute(f'SELECT {columns} FROM projects WHERE id < ? ORDER BY id DESC LIMIT ?',
+                           (after_id, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_projects_by_ids(self, project_ids: List[int],
+                            fields: Tuple[str, ...] = PROJECT_FIELDS) -> List[Dict]:
+        """
+        Get several projects by ID in one query
+        
+        Args:
+            project_ids: IDs to look up (missing IDs are skipped)
+            fields: Columns to include (must be in PROJECT_FIELDS; id is always included)
+            
+        Returns:
+            List[Dict]: Projects ordered by ID descending
+        """
+        if not project_ids:
+            return []
+        
+        columns = self._select_columns(fields)
+        placeholders = ', '.join('?' for _ in project_ids)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'SELECT {columns} FROM projects WHERE id IN ({placeholders}) ORDER BY id DESC',
+                       list(project_ids))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _select_columns(fields: Tuple[str, ...]) -> str:
+        """Build a safe column list, rejecting unknown field names"""
+        unknown = [f for f in fields if f not in PROJECT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown project fields: {', '.join(unknown)}")
+        return ', '.join(dict.fromkeys(('id',) + tuple(fields)))
+    
     def update_project(self, project_id: int, title: str = None, 
                       description: str = None, image_filename: str = None,
                       category: str = None, technologies: str = None,
@@ -215,6 +316,8 @@ class DAL:
         if not updates:
             return False
         
+        # Bump the row version so cached renderings of this row are replaced
+        updates.append("version = version + 1")
         params.append(project_id)
         
         conn = self.get_connection()
@@ -224,9 +327,13 @@ class DAL:
         cursor.execute(query, params)
         
         rows_affected = cursor.rowcount
+        if rows_affected > 0:
+            self.record_change(cursor, 'update', project_id)
         conn.commit()
         conn.close()
         
+        if rows_affected > 0:
+            self.notify_listeners('update', project_id)
         return rows_affected > 0
     
     def delete_project(self, project_id: int) -> bool:
@@ -245,11 +352,70 @@ class DAL:
         cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
         
         rows_affected = cursor.rowcount
+        if rows_affected > 0:
+            self.record_change(cursor, 'delete', project_id)
         conn.commit()
         conn.close()
         
+        if rows_affected > 0:
+            self.notify_listeners('delete', project_id)
         return rows_affected > 0
     
+    def record_change(self, cursor: sqlite3.Cursor, action: str, project_id: int):
+        """
+        Append a write to the change feed inside the caller's transaction
+        
+        Args:
+            cursor: Cursor of the transaction performing the write
+            action: 'add', 'update' or 'delete'
+            project_id: ID of the project that changed
+        """
+        cursor.execute('INSERT INTO project_changes (project_id, action) VALUES (?, ?)',
+                       (project_id, action))
+    
+    def get_changes_since(self, seq: int, limit: int = 500) -> List[Dict]:
+        """
+        Get change feed entries newer than a sequence number
+        
+        Args:
+            seq: Last sequence number the caller has seen (0 for everything)
+            limit: Maximum number of entries to return
+            
+        Returns:
+            List[Dict]: Changes in sequence order
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT seq, project_id, action, changed_date
+            FROM project_changes
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        ''', (seq, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_latest_change_seq(self) -> int:
+        """
+        Get the newest change feed sequence number
+        
+        Returns:
+            int: Latest sequence number, 0 if nothing has changed yet
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM project_changes')
+        seq = cursor.fetchone()[0]
+        conn.close()
+        
+        return seq
+    
     def seed_sample_data(self):
         """Add sample projects to the database for testing"""
         sample_projects = [
@@ -281,6 +447,78 @@ class DAL:
         print(f"Added {len(sample_projects)} sample projects to the database.")
 
 
+class AsyncDAL:
+    """
+    Async facade over the DAL for ASGI code
+    
+    sqlite3 calls block, so every method runs the matching DAL method on a
+    dedicated thread pool and awaits the result; the event loop never waits
+    on disk I/O and database work cannot starve other executor users.
+    """
+    
+    def __init__(self, dal: DAL = None, max_workers: int = 4):
+        """
+        Initialize the async DAL
+        
+        Args:
+            dal: DAL instance to wrap (a new default DAL if omitted)
+            max_workers: Number of threads dedicated to SQLite work
+        """
+        self.dal = dal if dal is not None else DAL()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dal')
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the DAL executor
+        
+        Args:
+            func: Callable to run (usually a DAL method)
+            *args, **kwargs: Arguments for func
+            
+        Returns:
+            Any: Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+    
+    async def add_project(self, **fields) -> int:
+        """Async version of DAL.add_project"""
+        return await self.run(self.dal.add_project, **fields)
+    
+    async def get_all_projects(self, limit: int = None) -> List[Dict]:
+        """Async version of DAL.get_all_projects"""
+        return await self.run(self.dal.get_all_projects, limit)
+    
+    async def get_project_by_id(self, project_id: int) -> Optional[Dict]:
+        """Async version of DAL.get_project_by_id"""
+        return await self.run(self.dal.get_project_by_id, project_id)
+    
+    async def get_projects_page(self, after_id: int = None, limit: int = 50,
+                                fields: Tuple[str, ...] = PROJECT_FIELDS) -> List[Dict]:
+        """Async version of DAL.get_projects_page"""
+        return await self.run(self.dal.get_projects_page, after_id, limit, fields)
+    
+    async def update_project(self, project_id: int, **fields) -> bool:
+        """Async version of DAL.update_project"""
+        return await self.run(self.dal.update_project, project_id, **fields)
+    
+    async def delete_project(self, project_id: int) -> bool:
+        """Async version of DAL.delete_project"""
+        return await self.run(self.dal.delete_project, project_id)
+    
+    async def get_changes_since(self, seq: int, limit: int = 500) -> List[Dict]:
+        """Async version of DAL.get_changes_since"""
+        return await self.run(self.dal.get_changes_since, seq, limit)
+    
+    async def get_latest_change_seq(self) -> int:
+        """Async version of DAL.get_latest_change_seq"""
+        return await self.run(self.dal.get_latest_change_seq)
+    
+    def close(self):
+        """Wait for queued work and stop the executor threads"""
+        self.executor.shutdown(wait=True)
+
+
 # Convenience function to get DAL instance
 def get_dal() -> DAL:
     """
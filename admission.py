@@ -0,0 +1,248 @@
+"""
+Admission control middleware for the Flask Portfolio Website
+Limits concurrent requests per route budget and sheds load with fast 503s
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class RouteBudget:
+    """Concurrency budget shared by a group of routes"""
+
+    def __init__(self, name: str, limit: int, max_queue: int,
+                 queue_timeout: float = 1.0, latency_target: float = 0.25,
+                 min_limit: int = 1, max_limit: int = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a route budget
+
+        Args:
+            name: Budget name (used in logs and stats)
+            limit: Initial number of requests allowed to run at once
+            max_queue: Maximum number of requests allowed to wait for a slot
+            queue_timeout: Seconds a queued request waits before being rejected
+            latency_target: Request latency (seconds) the adaptive limit aims for
+            min_limit: Lower bound for the adaptive limit
+            max_limit: Upper bound for the adaptive limit (defaults to 4x limit)
+            clock: Time source for the decrease window (overridable for tests)
+        """
+        self.name = name
+        self.limit = float(limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.min_limit = min_limit
+        self.max_limit = max_limit if max_limit is not None else limit * 4
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.avg_latency = 0.0
+        self.clock = clock
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the bounded queue if the budget is full
+
+        Returns:
+            bool: True if the request was admitted, False if it was shed
+        """
+        with self._cond:
+            if self.in_flight < int(self.limit) and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency: float):
+        """
+        Return a slot and feed the observed latency into the adaptive limit
+
+        Uses additive increase / multiplicative decrease: the limit grows
+        slowly while requests finish under the latency target and is cut
+        back when they run slower than the target. The cut happens at most
+        once per window of the average latency, so a burst of slow requests
+        finishing together counts as one congestion signal, not one each.
+
+        Args:
+            latency: Seconds the admitted request took to complete
+        """
+        with self._cond:
+            self.in_flight -= 1
+
+            if self.avg_latency == 0.0:
+                self.avg_latency = latency
+            else:
+                self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+
+            if latency > self.latency_target:
+                now = self.clock()
+                if self._last_decrease is None or now - self._last_decrease > self.avg_latency:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+            self._cond.notify()
+
+    def retry_after(self) -> int:
+        """
+        Estimate how many seconds a rejected client should wait
+
+        Returns:
+            int: Whole seconds for the Retry-After header (at least 1)
+        """
+        backlog = self.in_flight + self.waiting
+        estimate = self.avg_latency * backlog / max(self.limit, 1.0)
+        return max(1, int(estimate + 0.999))
+
+    def stats(self) -> Dict:
+        """
+        Get a snapshot of the budget counters
+
+        Returns:
+            Dict: Current limit, in-flight, waiting and totals
+        """
+        with self._cond:
+            return {
+                'name': self.name,
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_latency': self.avg_latency
+            }
+
+
+class AdmissionController:
+    """WSGI middleware that admits requests through per-route budgets"""
+
+    def __init__(self, wsgi_app: Callable,
+                 rules: List[Tuple[Callable[[str, str], bool], Optional[RouteBudget]]],
+                 default: Optional[RouteBudget] = None):
+        """
+        Wrap a WSGI application with admission control
+
+        Args:
+            wsgi_app: The WSGI application to protect
+            rules: Ordered (matcher, budget) pairs; matcher(method, path)
+                   selects the budget, a budget of None exempts the request
+            default: Budget for requests that match no rule (None = exempt)
+        """
+        self.wsgi_app = wsgi_app
+        self.rules = rules
+        self.default = default
+
+    def budget_for(self, method: str, path: str) -> Optional[RouteBudget]:
+        """
+        Find the budget that applies to a request
+
+        Args:
+            method: HTTP method
+            path: Request path
+
+        Returns:
+            Optional[RouteBudget]: Matching budget or None if exempt
+        """
+        for matcher, budget in self.rules:
+            if matcher(method, path):
+                return budget
+        return self.default
+
+    def budgets(self) -> List[RouteBudget]:
+        """
+        Get every distinct budget managed by this controller
+
+        Returns:
+            List[RouteBudget]: Budgets in rule order
+        """
+        seen = []
+        for _, budget in self.rules + [(None, self.default)]:
+            if budget is not None and budget not in seen:
+                seen.append(budget)
+        return seen
+
+    def __call__(self, environ: Dict, start_response: Callable) -> Iterable[bytes]:
+        budget = self.budget_for(environ.get('REQUEST_METHOD', 'GET'),
+                                 environ.get('PATH_INFO', '/'))
+        if budget is None:
+            return self.wsgi_app(environ, start_response)
+
+        if not budget.acquire():
+            body = b'Service temporarily overloaded, please retry shortly.\n'
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Length', str(len(body))),
+                ('Retry-After', str(budget.retry_after()))
+            ])
+            return [body]
+
+        # Flask renders the view before returning the body iterable, so the
+        # slot covers the real work; long-lived streaming routes should be
+        # exempted with a rule mapping them to None
+        started = time.monotonic()
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            budget.release(time.monotonic() - started)
+
+
+def path_matcher(paths: Iterable[str], methods: Iterable[str] = None) -> Callable[[str, str], bool]:
+    """
+    Build a matcher for exact paths, optionally restricted to some methods
+
+    Args:
+        paths: Request paths to match
+        methods: HTTP methods to match (None = any method)
+
+    Returns:
+        Callable[[str, str], bool]: matcher(method, path)
+    """
+    paths = frozenset(paths)
+    methods = frozenset(m.upper() for m in methods) if methods else None
+
+    def matcher(method: str, path: str) -> bool:
+        return path in paths and (methods is None or method.upper() in methods)
+
+    return matcher
+
+
+def prefix_matcher(prefix: str) -> Callable[[str, str], bool]:
+    """
+    Build a matcher for every path under a prefix
+
+    Args:
+        prefix: Path prefix such as '/static/'
+
+    Returns:
+        Callable[[str, str], bool]: matcher(method, path)
+    """
+    def matcher(method: str, path: str) -> bool:
+        return path.startswith(prefix)
+
+    return matcher
@@ -0,0 +1,185 @@
+"""
+JSON API for the Flask Portfolio Website
+Exposes the projects table with field selection, keyset pagination,
+ETag revalidation and a delta mode for incremental sync
+"""
+
+import hashlib
+import json
+from typing import Callable, Dict, List, Tuple
+
+from flask import Blueprint, Response, request
+
+from DAL import PROJECT_FIELDS
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def dumps(payload) -> bytes:
+    """
+    Serialize a payload to compact JSON bytes
+
+    Uses orjson when it is installed, otherwise a preconfigured stdlib
+    encoder (no indentation, no key sorting, no ASCII escaping).
+
+    Args:
+        payload: JSON-serializable object
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return _encoder.encode(payload).encode('utf-8')
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """Build a JSON response with the fast encoder"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+class BadRequest(ValueError):
+    """Invalid query parameter"""
+
+
+def parse_fields(value: str) -> Tuple[str, ...]:
+    """
+    Parse the fields=a,b,c parameter
+
+    Args:
+        value: Raw parameter value (empty = all fields)
+
+    Returns:
+        Tuple[str, ...]: Requested fields
+    """
+    if not value:
+        return PROJECT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PROJECT_FIELDS]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_int(name: str, default: int = None, minimum: int = 0) -> int:
+    """Parse a non-negative integer query parameter"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+    if number < minimum:
+        raise BadRequest(f"'{name}' must be at least {minimum}")
+    return number
+
+
+def compute_etag(version: int) -> str:
+    """
+    ETag for a response: the data version plus the query that shaped it
+
+    Args:
+        version: Latest change feed sequence number
+
+    Returns:
+        str: Opaque ETag value
+    """
+    query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return hashlib.sha1(f'{version}|{query}'.encode('utf-8')).hexdigest()[:20]
+
+
+def delta(dal, since: int, fields: Tuple[str, ...], limit: int) -> Dict:
+    """
+    Collect rows changed or deleted after a change feed position
+
+    Multiple changes to one project collapse into its current state.
+
+    Args:
+        dal: Data access layer
+        since: Client's last synced version
+        fields: Columns to include for changed rows
+        limit: Maximum change feed entries to scan in one response
+
+    Returns:
+        Dict: changed rows, deleted IDs, new version and has_more flag
+    """
+    changes = dal.get_changes_since(since, limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    touched: List[int] = list(dict.fromkeys(c['project_id'] for c in changes))
+    changed = dal.get_projects_by_ids(touched, fields)
+    existing = {p['id'] for p in changed}
+
+    return {
+        'changed': changed,
+        'deleted': [pid for pid in touched if pid not in existing],
+        'version': changes[-1]['seq'] if changes else since,
+        'has_more': has_more
+    }
+
+
+def create_api(get_dal: Callable) -> Blueprint:
+    """
+    Build the API blueprint
+
+    Args:
+        get_dal: Returns the DAL to query (looked up on every request)
+
+    Returns:
+        Blueprint: Blueprint mounted under /api
+    """
+    api = Blueprint('api', __name__, url_prefix='/api')
+
+    @api.errorhandler(BadRequest)
+    def bad_request(error):
+        return json_response({'error': str(error)}, status=400)
+
+    @api.route('/projects')
+    def projects():
+        """
+        List projects
+
+        Query parameters:
+            fields: Comma-separated columns to include
+            limit: Page size (1-500, default 50)
+            after: Keyset cursor from a previous page's next_cursor
+            since: Change feed version; returns only rows changed/deleted since
+        """
+        dal = get_dal()
+        fields = parse_fields(request.args.get('fields', ''))
+        limit = min(parse_int('limit', DEFAULT_PAGE_SIZE, minimum=1), MAX_PAGE_SIZE)
+        after = parse_int('after')
+        since = parse_int('since')
+
+        # Revalidation only needs the current version, not the rows
+        version = dal.get_latest_change_seq()
+        etag = compute_etag(version)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif since is not None:
+            response = json_response(delta(dal, since, fields, limit))
+        else:
+            rows = dal.get_projects_page(after, limit + 1, fields)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            response = json_response({
+                'projects': rows,
+                'next_cursor': rows[-1]['id'] if has_more else None,
+                'version': version
+            })
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    return api
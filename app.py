@@ -1,13 +1,95 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, jsonify
 from datetime import datetime
+import os
 from DAL import DAL
+from admission import AdmissionController, RouteBudget, path_matcher, prefix_matcher
+from ratelimit import Bucket, MemoryStore, RateLimiter, SQLiteStore
+from freeze import Freezer, register_commands
+from fragments import FragmentCache
+from sse import ChangeFeedHub, SSEServer, STREAM_PATH
+from api import create_api
+from uploads import ImageStore
+from assets import load_manifest, register_commands as register_asset_commands
+from critical import CriticalCSS, critical_css_for, register_commands as register_critical_commands
+from maintenance import DatabaseMaintenance, register_commands as register_maintenance_commands
+from migrations import MigrationRunner, register_commands as register_migration_commands
+from readiness import Warmup, compile_templates, request_pages
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here-change-in-production'  # Change this in production
 
+# Admission control: separate concurrency budgets so a flood of writes or
+# /projects queries cannot starve the cheap static pages (and vice versa)
+write_budget = RouteBudget('writes', limit=4, max_queue=8, latency_target=0.5)
+projects_budget = RouteBudget('projects', limit=8, max_queue=16, latency_target=0.25)
+pages_budget = RouteBudget('pages', limit=32, max_queue=64, latency_target=0.1)
+app.wsgi_app = AdmissionController(app.wsgi_app, rules=[
+    (prefix_matcher('/static/'), None),
+    (path_matcher(['/healthz', '/readyz']), None),
+    (path_matcher(['/add-project', '/contact'], methods=['POST']), write_budget),
+    (path_matcher(['/projects', '/api/projects']), projects_budget),
+], default=pages_budget)
+
+# Rate limiting for the write endpoints: in-memory buckets for a single
+# process, set RATELIMIT_DB to share buckets between workers through SQLite
+ratelimit_db = os.environ.get('RATELIMIT_DB')
+limiter = RateLimiter(
+    SQLiteStore(ratelimit_db) if ratelimit_db else MemoryStore(),
+    per_ip=Bucket(rate=10 / 60, capacity=10),
+    global_bucket=Bucket(rate=2, capacity=60),
+    endpoints=['add_project', 'contact']
+)
+limiter.init_app(app)
+
 # Initialize Database Access Layer
 dal = DAL()
 
+# Uploaded project images, streamed to disk and stored by content hash
+image_store = ImageStore(os.path.join(app.static_folder, 'images', 'uploads'))
+image_store.init_app(app)
+
+# JSON API under /api (resolves the module-level dal on each request)
+app.register_blueprint(create_api(lambda: dal))
+
+# Rendered projects table rows, reused until a row's version changes
+row_cache = FragmentCache()
+
+@app.template_global()
+def project_row(project):
+    """Render one projects table row through the fragment cache"""
+    version = project.get('version')
+    key = (project['id'], version, project.get('created_date')) if version is not None else None
+    return row_cache.render('_project_row.html', key, project=project)
+
+# Live project updates over SSE. The stream is served by an asyncio hub on
+# its own port (SSE_PORT), by `python sse.py` behind a proxy that maps
+# PROJECT_STREAM_URL to it, or on the same origin in ASGI mode (asgi.py);
+# DAL writes wake the hub immediately.
+app.config['PROJECT_STREAM_URL'] = os.environ.get('PROJECT_STREAM_URL')
+change_hub = ChangeFeedHub(dal)
+dal.add_listener(change_hub.notify)
+if os.environ.get('SSE_PORT'):
+    SSEServer(change_hub, port=int(os.environ['SSE_PORT'])).start_in_thread()
+
+@app.template_global()
+def project_stream_url():
+    """URL of the project event stream, or None when live updates are off"""
+    if app.config.get('PROJECT_STREAM_URL'):
+        return app.config['PROJECT_STREAM_URL']
+    if os.environ.get('SSE_PORT'):
+        return f"{request.scheme}://{request.host.split(':')[0]}:{os.environ['SSE_PORT']}{STREAM_PATH}"
+    return None
+
+# Self-hosted fonts and icons: `flask vendor-assets` writes subset files and
+# a manifest to static/vendor; until then base.html links the CDNs
+app.config['ASSET_MANIFEST'] = os.path.join(app.static_folder, 'vendor', 'manifest.json')
+register_asset_commands(app, lambda: make_freezer('build').pages())
+
+@app.template_global()
+def vendored_assets():
+    """Manifest of the self-hosted font assets, or None if not built"""
+    return load_manifest(app.config.get('ASSET_MANIFEST'))
+
 # Routes
 @app.route('/')
 def index():
@@ -27,6 +109,14 @@ def projects():
     all_projects = dal.get_all_projects()
     return render_template('projects.html', projects=all_projects)
 
+@app.route('/projects/rows/<int:project_id>')
+def project_row_fragment(project_id):
+    """Return one rendered projects table row (used by live updates)"""
+    project = dal.get_project_by_id(project_id)
+    if project is None:
+        abort(404)
+    return project_row(project)
+
 @app.route('/contact', methods=['GET', 'POST'])
 def contact():
     if request.method == 'POST':
@@ -80,6 +170,7 @@ def add_project():
         title = request.form.get('title')
         description = request.form.get('description')
         image_filename = request.form.get('image_filename')
+        image = request.files.get('image')
         category = request.form.get('category')
         technologies = request.form.get('technologies')
         project_url = request.form.get('project_url')
@@ -92,8 +183,15 @@ def add_project():
             errors.append('Project title is required')
         if not description:
             errors.append('Project description is required')
-        if not image_filename:
-            errors.append('Image filename is required')
+        if image and image.filename:
+            # Only keep the upload once the rest of the form is valid
+            if not errors:
+                try:
+                    image_filename = image_store.save(image)
+                except ValueError as e:
+                    errors.append(str(e))
+        elif not image_filename:
+            errors.append('Image file or filename is required')
         
         if errors:
             for error in errors:
@@ -120,6 +218,93 @@ def add_project():
     
     return render_template('add_project.html')
 
+# Static export: `flask freeze <dir>` renders every page; pages listed under
+# 'projects' are re-rendered whenever the DAL writes
+def make_freezer(output_dir: str) -> Freezer:
+    return Freezer(app, output_dir, depends_on={'projects': ['projects']},
+                   skip=['api.projects', 'healthz', 'readyz'])
+
+register_commands(app, make_freezer)
+
+# Critical CSS: `flask critical-css` inlines each page's above-the-fold
+# rules and defers the full (dead-selector-free) stylesheets
+app.config['CRITICAL_CSS_MANIFEST'] = os.path.join(app.static_folder, 'critical', 'manifest.json')
+
+def make_critical_css() -> CriticalCSS:
+    return CriticalCSS(app, ['css/styles.css', 'css/projects-styles.css'],
+                       pages=make_freezer('build').pages(), always=['.flash-'])
+
+register_critical_commands(app, make_critical_css)
+
+@app.template_global()
+def critical_assets(endpoint):
+    """Inline CSS and deferred stylesheets for a page, or None if not built"""
+    return critical_css_for(app.config.get('CRITICAL_CSS_MANIFEST'), endpoint)
+
+# Keep an exported site (FREEZE_DIR) in sync with add/update/delete
+if os.environ.get('FREEZE_DIR'):
+    make_freezer(os.environ['FREEZE_DIR']).watch(dal)
+
+# SQLite maintenance (optimize, WAL checkpoint, incremental vacuum) runs on
+# a background thread every DB_MAINTENANCE_INTERVAL seconds (0 disables),
+# only once no admitted request has been in flight for a few seconds
+def app_is_idle() -> bool:
+    return all(budget.in_flight == 0 and budget.waiting == 0
+               for budget in app.wsgi_app.budgets())
+
+def make_maintenance() -> DatabaseMaintenance:
+    return DatabaseMaintenance(dal.db_name, is_idle=app_is_idle,
+                               interval=float(os.environ.get('DB_MAINTENANCE_INTERVAL', 300)))
+
+register_maintenance_commands(app, make_maintenance)
+
+# `flask db-migrate` applies schema migrations and runs backfills in the
+# foreground; the app itself runs pending backfills in the background
+def make_migration_runner(**kwargs) -> MigrationRunner:
+    return MigrationRunner(dal.db_name, **kwargs)
+
+register_migration_commands(app, make_migration_runner)
+
+maintenance = make_maintenance()
+if maintenance.interval > 0:
+    maintenance.start()
+
+# Warmup: compile the templates, open the database and render every page
+# once (filling the row and manifest caches) on a background thread at
+# startup; /readyz answers 503 until it is done, and a failed warmup is
+# retried with backoff. WARMUP=0 skips it.
+def warm_database() -> int:
+    conn = dal.get_connection()
+    conn.execute('SELECT 1 FROM projects LIMIT 1').fetchall()
+    conn.close()
+    return len(dal.get_all_projects())
+
+warmup = Warmup([
+    ('templates', lambda: compile_templates(app)),
+    ('database', warm_database),
+    ('pages', lambda: request_pages(app, make_freezer('build').pages().values())),
+])
+if os.environ.get('WARMUP', '1') != '0':
+    warmup.start()
+else:
+    warmup.skip()
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 once the warmup has finished, 503 before (or if it failed)"""
+    status = warmup.status()
+    status['maintenance'] = maintenance.summary()
+    response = jsonify(status)
+    if not warmup.ready:
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+    return response
+
 if __name__ == '__main__':
     # Use 0.0.0.0 to make the app accessible from outside the container
     app.run(host='0.0.0.0', debug=False, port=5000)
@@ -0,0 +1,367 @@
+"""
+ASGI serving mode for the Flask Portfolio Website
+Async routes (the project event stream) run on the event loop; every other
+request is bridged to the Flask WSGI app on a bounded thread pool, so idle
+keep-alive and streaming connections never hold a worker thread. Small
+request bodies are read and responses are written on the event loop, so a
+slow client only holds a thread while its request is being computed
+
+Run with an ASGI server, e.g.: uvicorn asgi:application --port 5000
+"""
+
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sse import ChangeFeedHub, STREAM_PATH, parse_last_event_id
+
+AsyncHandler = Callable[[Dict, Callable, Callable], Awaitable[None]]
+
+
+class ReceiveStream(io.RawIOBase):
+    """
+    Blocking, file-like view of an ASGI request body for WSGI code
+
+    Used from executor threads: each read pulls the next body message from
+    the event loop, so uploads stream through instead of being buffered.
+    The start of the body may already have been read on the loop.
+    """
+
+    def __init__(self, receive: Callable, loop: asyncio.AbstractEventLoop,
+                 body: bytes = b'', more_body: bool = True):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = bytearray(body)
+        self._more_body = more_body
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int):
+        while self._more_body and (size < 0 or len(self._buffer) < size):
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more_body = False
+                break
+            self._buffer += message.get('body', b'')
+            self._more_body = message.get('more_body', False)
+
+    def read(self, size: int = -1) -> bytes:
+        self._fill(size if size is not None else -1)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readinto(self, target) -> int:
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def readline(self, size: int = -1) -> bytes:
+        while b'\n' not in self._buffer and self._more_body:
+            self._fill(len(self._buffer) + 1)
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        return self.read(end)
+
+
+async def read_body(receive: Callable, limit: int) -> Tuple[bytes, bool]:
+    """
+    Read a request body on the event loop, up to a limit
+
+    Args:
+        receive: ASGI receive callable
+        limit: Stop once more than this many bytes have arrived
+
+    Returns:
+        Tuple[bytes, bool]: Body read so far and whether more is to come
+    """
+    body = bytearray()
+    while len(body) <= limit:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return bytes(body), False
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            return bytes(body), False
+    return bytes(body), True
+
+
+class ResponseWriter:
+    """
+    Hands a WSGI response from a worker thread to the event loop
+
+    Messages are queued and sent by a task on the loop, so the worker thread
+    is done as soon as the response is produced instead of waiting on a slow
+    client. It only blocks once more than `limit` body bytes are queued.
+    """
+
+    def __init__(self, send: Callable, loop: asyncio.AbstractEventLoop, limit: int):
+        self._send = send
+        self._loop = loop
+        self.limit = limit
+        self._queue = asyncio.Queue()
+        self._queued = 0
+        self._room = threading.Condition()
+        self._error = None
+
+    def put(self, message: Dict):
+        """Queue a message from the worker thread, waiting if the buffer is full"""
+        size = len(message.get('body', b''))
+        with self._room:
+            while self._queued and self._queued + size > self.limit and self._error is None:
+                self._room.wait()
+            if self._error is not None:
+                raise self._error
+            self._queued += size
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    async def run(self):
+        """Send queued messages until the response is complete"""
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._send(message)
+            except Exception as e:
+                # Client gone: fail the worker's next put instead of blocking it
+                with self._room:
+                    self._error = e
+                    self._room.notify_all()
+                return
+            with self._room:
+                self._queued -= len(message.get('body', b''))
+                self._room.notify_all()
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                return
+
+
+def build_environ(scope: Dict, body: ReceiveStream) -> Dict:
+    """
+    Translate an ASGI HTTP scope into a WSGI environ
+
+    Args:
+        scope: ASGI connection scope
+        body: Request body stream
+
+    Returns:
+        Dict: WSGI environ
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = 'HTTP_' + name
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+class ASGIApp:
+    """ASGI application: async routes first, then the Flask WSGI app"""
+
+    def __init__(self, wsgi_app: Callable, hub: Optional[ChangeFeedHub] = None,
+                 max_workers: int = 32, body_buffer: int = 1024 * 1024,
+                 send_buffer: int = 1024 * 1024):
+        """
+        Initialize the ASGI application
+
+        Args:
+            wsgi_app: Flask (or any WSGI) application for non-async routes
+            hub: Change feed hub serving the project event stream
+            max_workers: Threads available to in-flight WSGI requests
+            body_buffer: Request bodies up to this size are read on the event
+                         loop before a thread is taken; larger ones (uploads)
+                         stream through the worker thread
+            send_buffer: Response bytes queued for a slow client before the
+                         worker thread has to wait for it
+        """
+        self.wsgi_app = wsgi_app
+        self.hub = hub
+        self.body_buffer = body_buffer
+        self.send_buffer = send_buffer
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi')
+        self.routes: Dict[str, AsyncHandler] = {}
+        if hub is not None:
+            self.route(STREAM_PATH)(self.project_stream)
+
+    def route(self, path: str) -> Callable[[AsyncHandler], AsyncHandler]:
+        """
+        Register an async handler for GET requests to a path
+
+        Args:
+            path: Exact request path
+
+        Returns:
+            Callable: Decorator registering handler(scope, receive, send)
+        """
+        def decorator(handler: AsyncHandler) -> AsyncHandler:
+            self.routes[path] = handler
+            return handler
+        return decorator
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        handler = self.routes.get(scope['path'])
+        if handler is not None and scope['method'] in ('GET', 'HEAD'):
+            await handler(scope, receive, send)
+        else:
+            await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive: Callable, send: Callable):
+        """Start the change feed with the server and stop it on shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.hub is not None:
+                    await self.hub.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.hub is not None:
+                    await self.hub.stop()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def call_wsgi(self, scope: Dict, receive: Callable, send: Callable):
+        """
+        Run the WSGI app for one request on the executor
+
+        The body is read on the loop first (up to body_buffer), and the
+        response is queued to a writer task on the loop (up to send_buffer
+        ahead of the client), so the thread is only held while the app runs.
+        """
+        loop = asyncio.get_running_loop()
+        body, more_body = await read_body(receive, self.body_buffer)
+        environ = build_environ(scope, ReceiveStream(receive, loop, body, more_body))
+        writer = ResponseWriter(send, loop, self.send_buffer)
+        send_from_thread = writer.put
+
+        def run():
+            response = {}
+
+            def start_response(status: str, headers: List, exc_info=None):
+                response['status'] = int(status.split(' ', 1)[0])
+                response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                                       for k, v in headers]
+
+            def start():
+                send_from_thread({'type': 'http.response.start',
+                                  'status': response['status'],
+                                  'headers': response['headers']})
+
+            result = self.wsgi_app(environ, start_response)
+            try:
+                started = False
+                for chunk in result:
+                    if not chunk:
+                        continue
+                    if not started:
+                        start()
+                        started = True
+                    send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if not started:
+                    start()
+                send_from_thread({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        sending = asyncio.ensure_future(writer.run())
+        try:
+            await loop.run_in_executor(self.executor, run)
+        except BaseException:
+            sending.cancel()
+            await asyncio.gather(sending, return_exceptions=True)
+            raise
+        await sending
+
+    async def project_stream(self, scope: Dict, receive: Callable, send: Callable):
+        """Serve the project event stream natively on the event loop"""
+        await self.hub.start()
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        last_event_id = parse_last_event_id(headers, scope.get('query_string', b'').decode('latin-1'))
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        # Race each event against the client going away, so a closed
+        # connection is released at once rather than at the next heartbeat
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        stream = self.hub.events(last_event_id)
+        pending = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(stream.__anext__())
+                await asyncio.wait({pending, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not pending.done():
+                    break
+                try:
+                    chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            await stream.aclose()
+
+    @staticmethod
+    async def _wait_for_disconnect(receive: Callable):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+def create_application() -> ASGIApp:
+    """
+    Build the ASGI application around the Flask app
+
+    Returns:
+        ASGIApp: Application serving the event stream on the same origin
+    """
+    import app as app_module
+
+    app_module.app.config['PROJECT_STREAM_URL'] = STREAM_PATH
+    return ASGIApp(app_module.app, hub=app_module.change_hub)
+
+
+application = create_application()
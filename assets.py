@@ -0,0 +1,481 @@
+"""
+Self-hosted web fonts and icons for the Flask Portfolio Website
+Vendors Inter and Font Awesome into static/vendor, subset to the characters
+and icons the templates actually use, and records the result in a manifest
+that base.html reads to link local files instead of the CDNs
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import urllib.request
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional
+
+import click
+from flask import Flask
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # build-time only: `pip install fonttools brotli`
+    font_subset = None
+
+FONT_AWESOME_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+GOOGLE_FONTS_URL = 'https://fonts.googleapis.com/css2?family=Inter:wght@{weights}&display=swap'
+# Google Fonts serves woff2 only to browsers it recognises
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+
+# Font Awesome style classes -> (font file stem, CSS font-family, font-weight)
+ICON_STYLES = {
+    'fas': ('fa-solid-900', 'Font Awesome 6 Free', 900),
+    'far': ('fa-regular-400', 'Font Awesome 6 Free', 400),
+    'fab': ('fa-brands-400', 'Font Awesome 6 Brands', 400),
+}
+STYLE_ALIASES = {'fa-solid': 'fas', 'fa-regular': 'far', 'fa-brands': 'fab', 'fa': 'fas'}
+
+# Project titles and descriptions come from the database, so text fonts
+# keep all of Basic Latin, Latin-1 and common punctuation on top of the
+# characters found in the templates
+TEXT_UNICODES = (set(range(0x20, 0x7F)) | set(range(0xA0, 0x100)) |
+                 set(range(0x2010, 0x2028)) | {0x2122, 0x20AC, 0x2192})
+
+ICON_PATTERN = re.compile(r'\b(fa[srb]?|fa-solid|fa-regular|fa-brands)\s+fa-([a-z0-9-]+)')
+ICON_RULE_PATTERN = re.compile(r'([^{}]+)\{content:\s*"\\([0-9a-f]+)"\}')
+FONT_WEIGHT_PATTERN = re.compile(r'font-weight:\s*(\w+)')
+FONT_FACE_PATTERN = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}')
+
+
+def fetch(url: str) -> bytes:
+    """
+    Download a URL
+
+    Args:
+        url: Asset URL
+
+    Returns:
+        bytes: Response body
+    """
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def scan_templates(template_dir: str) -> Dict:
+    """
+    Find the icons and characters used by the templates
+
+    Args:
+        template_dir: Directory containing the Jinja templates
+
+    Returns:
+        Dict: 'icons' (icon name -> style class) and 'text' (set of code points)
+    """
+    icons = {}
+    text = set()
+    for name in sorted(os.listdir(template_dir)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(template_dir, name), encoding='utf-8') as f:
+            source = f.read()
+        for style, icon in ICON_PATTERN.findall(source):
+            icons.setdefault(icon, STYLE_ALIASES.get(style, style))
+        # Strip tags and template code, keep the visible text
+        visible = re.sub(r'{[{%#].*?[}%#]}|<[^>]*>', ' ', source, flags=re.S)
+        text.update(ord(char) for char in visible if not char.isspace())
+    return {'icons': icons, 'text': text}
+
+
+def used_font_weights(css_paths: Iterable[str]) -> List[int]:
+    """
+    Get the font weights the stylesheets ask for
+
+    Args:
+        css_paths: Stylesheets to scan
+
+    Returns:
+        List[int]: Sorted weights, always including 400 and 700 (body and bold)
+    """
+    weights = {400, 700}
+    keywords = {'normal': 400, 'bold': 700}
+    for path in css_paths:
+        with open(path, encoding='utf-8') as f:
+            for value in FONT_WEIGHT_PATTERN.findall(f.read()):
+                if value.isdigit():
+                    weights.add(int(value))
+                elif value in keywords:
+                    weights.add(keywords[value])
+    return sorted(weights)
+
+
+def parse_icon_codepoints(css: str) -> Dict[str, int]:
+    """
+    Map icon names to code points from a Font Awesome stylesheet
+
+    Args:
+        css: Contents of all.css / all.min.css
+
+    Returns:
+        Dict[str, int]: Icon name (without 'fa-') -> code point, aliases included
+    """
+    codepoints = {}
+    for selectors, codepoint in ICON_RULE_PATTERN.findall(css):
+        for selector in selectors.split(','):
+            match = re.fullmatch(r'\s*\.fa-([a-z0-9-]+)::?before\s*', selector)
+            if match:
+                codepoints[match.group(1)] = int(codepoint, 16)
+    return codepoints
+
+
+def parse_google_font_faces(css: str, subset_name: str = 'latin') -> Dict[str, List[int]]:
+    """
+    Get the font files for one unicode-range subset of a Google Fonts stylesheet
+
+    Args:
+        css: Stylesheet returned by the css2 API
+        subset_name: Subset comment preceding each @font-face (e.g. 'latin')
+
+    Returns:
+        Dict[str, List[int]]: Font URL -> weights it serves (one URL for a variable font)
+    """
+    files = {}
+    for name, body in FONT_FACE_PATTERN.findall(css):
+        if name != subset_name:
+            continue
+        url = re.search(r'url\(([^)]+)\)', body).group(1).strip('\'"')
+        weight = int(re.search(r'font-weight:\s*(\d+)', body).group(1))
+        files.setdefault(url, []).append(weight)
+    return files
+
+
+def subset_font(data: bytes, unicodes: Iterable[int]) -> bytes:
+    """
+    Subset a font to the given code points and encode it as WOFF2
+
+    Args:
+        data: TTF, OTF, WOFF or WOFF2 font
+        unicodes: Code points to keep
+
+    Returns:
+        bytes: WOFF2 font
+
+    Raises:
+        RuntimeError: If fonttools (and brotli) are not installed
+    """
+    if font_subset is None:
+        raise RuntimeError('Subsetting fonts requires fonttools: pip install fonttools brotli')
+    options = font_subset.Options()
+    options.flavor = 'woff2'
+    font = font_subset.load_font(io.BytesIO(data), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    font_subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+def icon_css(icons: Dict[str, str], codepoints: Dict[str, int], font_urls: Dict[str, str]) -> str:
+    """
+    Build the Font Awesome rules for just the icons in use
+
+    Args:
+        icons: Icon name -> style class, as found by scan_templates
+        codepoints: Icon name -> code point
+        font_urls: Style class -> URL of its subset font, relative to the stylesheet
+
+    Returns:
+        str: CSS for .fas/.far/.fab and each used icon
+    """
+    styles = sorted(font_urls)
+    if not styles:
+        return ''
+    lines = [
+        ','.join('.' + style for style in styles) +
+        '{-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;'
+        'display:inline-block;font-style:normal;font-variant:normal;line-height:1;text-rendering:auto}'
+    ]
+    for style in styles:
+        _, family, weight = ICON_STYLES[style]
+        lines.append(f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+                     f'font-display:block;src:url({font_urls[style]}) format("woff2")}}')
+        lines.append(f'.{style}{{font-family:"{family}";font-weight:{weight}}}')
+    for icon in sorted(icons):
+        if icon in codepoints:
+            lines.append(f'.fa-{icon}:before{{content:"\\{codepoints[icon]:x}"}}')
+    return '\n'.join(lines) + '\n'
+
+
+def text_font_css(family: str, faces: List[Dict]) -> str:
+    """
+    Build @font-face rules for self-hosted text fonts
+
+    Args:
+        family: CSS font-family name
+        faces: Dicts with 'url' and 'weights' (min and max weight served)
+
+    Returns:
+        str: CSS
+    """
+    rules = []
+    for face in faces:
+        low, high = min(face['weights']), max(face['weights'])
+        weight = str(low) if low == high else f'{low} {high}'
+        rules.append(f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{weight};"
+                     f"font-display:swap;src:url({face['url']}) format('woff2')}}")
+    return '\n'.join(rules) + '\n'
+
+
+class AssetVendor:
+    """Builds static/vendor from the CDN assets or local copies of them"""
+
+    def __init__(self, static_dir: str, template_dir: str,
+                 fontawesome_dir: str = None, inter_file: str = None,
+                 fetch: Callable[[str], bytes] = fetch):
+        """
+        Initialize the build
+
+        Args:
+            static_dir: The app's static folder
+            template_dir: The app's template folder
+            fontawesome_dir: Unpacked fontawesome-free release (css/ and
+                             webfonts/) to use instead of cdnjs
+            inter_file: Inter font file (variable font) to use instead of Google Fonts
+            fetch: Function downloading a URL, replaceable for offline builds
+        """
+        self.static_dir = static_dir
+        self.template_dir = template_dir
+        self.fontawesome_dir = fontawesome_dir
+        self.inter_file = inter_file
+        self.fetch = fetch
+        self.output_dir = os.path.join(static_dir, 'vendor')
+
+    def read_fontawesome(self, relative: str) -> bytes:
+        """Read a Font Awesome file from the local release or cdnjs"""
+        if self.fontawesome_dir:
+            with open(os.path.join(self.fontawesome_dir, relative), 'rb') as f:
+                return f.read()
+        return self.fetch(f'{FONT_AWESOME_URL}/{relative}')
+
+    def write_asset(self, stem: str, extension: str, data: bytes) -> str:
+        """
+        Write a file with a content hash in its name, so it can be cached forever
+
+        Returns:
+            str: File name inside the vendor directory
+        """
+        name = f'{stem}.{hashlib.sha1(data).hexdigest()[:10]}.{extension}'
+        with open(os.path.join(self.output_dir, name), 'wb') as f:
+            f.write(data)
+        return name
+
+    def build(self) -> Dict:
+        """
+        Vendor and subset every asset and write the manifest
+
+        Returns:
+            Dict: The manifest, including before/after bytes and request counts
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        scan = scan_templates(self.template_dir)
+        css_dir = os.path.join(self.static_dir, 'css')
+        weights = used_font_weights(os.path.join(css_dir, name) for name in sorted(os.listdir(css_dir))
+                                    if name.endswith('.css'))
+        before = {'requests': 0, 'bytes': 0}
+        files = []
+        css = []
+
+        # Icons: one subset font per style class in use
+        fa_css = self.read_fontawesome('css/all.min.css').decode('utf-8')
+        before['requests'] += 1
+        before['bytes'] += len(fa_css.encode('utf-8'))
+        codepoints = parse_icon_codepoints(fa_css)
+        missing = sorted(icon for icon in scan['icons'] if icon not in codepoints)
+        font_urls = {}
+        for style in sorted(set(scan['icons'].values())):
+            stem = ICON_STYLES[style][0]
+            source = self.read_fontawesome(f'webfonts/{stem}.woff2')
+            before['requests'] += 1
+            before['bytes'] += len(source)
+            used = [codepoints[icon] for icon, icon_style in scan['icons'].items()
+                    if icon_style == style and icon in codepoints]
+            name = self.write_asset(stem, 'woff2', subset_font(source, used))
+            font_urls[style] = name
+            files.append(name)
+
+        # Text: Inter at the weights the stylesheets use
+        if self.inter_file:
+            with open(self.inter_file, 'rb') as f:
+                sources = {self.inter_file: (f.read(), weights)}
+        else:
+            google_css = self.fetch(GOOGLE_FONTS_URL.format(weights=';'.join(map(str, weights))))
+            before['requests'] += 1
+            before['bytes'] += len(google_css)
+            sources = {url: (self.fetch(url), face_weights) for url, face_weights
+                       in parse_google_font_faces(google_css.decode('utf-8')).items()}
+        faces = []
+        for data, face_weights in sources.values():
+            before['requests'] += 1
+            before['bytes'] += len(data)
+            name = self.write_asset('inter', 'woff2', subset_font(data, TEXT_UNICODES | scan['text']))
+            faces.append({'url': name, 'weights': face_weights})
+            files.append(name)
+
+        css.append(text_font_css('Inter', faces))
+        css.append(icon_css(scan['icons'], codepoints, font_urls))
+        stylesheet = self.write_asset('fonts', 'css', ''.join(css).encode('utf-8'))
+        files.append(stylesheet)
+
+        after_bytes = sum(os.path.getsize(os.path.join(self.output_dir, name)) for name in files)
+        manifest = {
+            'stylesheet': 'vendor/' + stylesheet,
+            # Text fonts and solid icons appear above the fold on every page
+            'preload': ['vendor/' + face['url'] for face in faces] +
+                       (['vendor/' + font_urls['fas']] if 'fas' in font_urls else []),
+            'icons': sorted(scan['icons']),
+            'missing_icons': missing,
+            'weights': weights,
+            'before': before,
+            'after': {'requests': len(files), 'bytes': after_bytes}
+        }
+        self._remove_stale(files)
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def _remove_stale(self, keep: List[str]):
+        for name in os.listdir(self.output_dir):
+            if name not in keep and name != 'manifest.json':
+                os.remove(os.path.join(self.output_dir, name))
+
+
+class StylesheetLinks(HTMLParser):
+    """Collects the hrefs of render-blocking <link rel="stylesheet"> elements"""
+
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+        self._noscript = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'noscript':
+            self._noscript += 1
+        elif tag == 'link' and not self._noscript:
+            attrs = dict(attrs)
+            rels = (attrs.get('rel') or '').lower().split()
+            if 'stylesheet' in rels and attrs.get('media', 'all') in ('all', 'screen') and attrs.get('href'):
+                self.hrefs.append(attrs['href'])
+
+    def handle_endtag(self, tag):
+        if tag == 'noscript' and self._noscript:
+            self._noscript -= 1
+
+
+def render_blocking_stylesheets(html: str) -> List[str]:
+    """
+    Find the stylesheets a page makes the browser fetch before first paint
+
+    Preloaded (deferred) stylesheets and <noscript> fallbacks do not block.
+
+    Args:
+        html: Rendered page
+
+    Returns:
+        List[str]: Stylesheet URLs in document order
+    """
+    parser = StylesheetLinks()
+    parser.feed(html)
+    return parser.hrefs
+
+
+def is_third_party(url: str) -> bool:
+    """True for absolute URLs, which need a connection to another origin"""
+    return url.startswith(('http://', 'https://', '//'))
+
+
+def measure_blocking(app: Flask, urls: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Render pages with and without the vendored assets and list their
+    render-blocking stylesheets
+
+    Args:
+        app: Flask application
+        urls: URL paths of the pages to render
+
+    Returns:
+        Dict: URL -> {'before': [...], 'after': [...]} stylesheet URLs
+    """
+    manifest_path = app.config.get('ASSET_MANIFEST')
+    result = {}
+    with app.test_client() as client:
+        for url in urls:
+            try:
+                app.config['ASSET_MANIFEST'] = None
+                before = client.get(url).get_data(as_text=True)
+            finally:
+                app.config['ASSET_MANIFEST'] = manifest_path
+            after = client.get(url).get_data(as_text=True)
+            result[url] = {'before': render_blocking_stylesheets(before),
+                           'after': render_blocking_stylesheets(after)}
+    return result
+
+
+_manifest_cache = {}
+
+
+def load_manifest(path: Optional[str]) -> Optional[Dict]:
+    """
+    Read the vendored asset manifest, re-reading it only when it changes
+
+    Args:
+        path: Manifest path (None = vendoring disabled)
+
+    Returns:
+        Optional[Dict]: Manifest, or None if the assets have not been built
+    """
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _manifest_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = (mtime, json.load(f))
+        _manifest_cache[path] = cached
+    return cached[1]
+
+
+def register_commands(app: Flask, pages: Callable[[], Dict[str, str]] = None):
+    """
+    Add the `flask vendor-assets` command to an app
+
+    Args:
+        app: Flask application
+        pages: Returns endpoint -> URL of the pages whose render-blocking
+               stylesheets are reported after a build (None = '/' only)
+    """
+    @app.cli.command('vendor-assets')
+    @click.option('--fontawesome-dir', type=click.Path(exists=True, file_okay=False),
+                  help='Local fontawesome-free release to use instead of cdnjs.')
+    @click.option('--inter', 'inter_file', type=click.Path(exists=True, dir_okay=False),
+                  help='Local Inter variable font to use instead of Google Fonts.')
+    def vendor_assets_command(fontawesome_dir: Optional[str], inter_file: Optional[str]):
+        """Self-host subset Inter and Font Awesome files in static/vendor."""
+        vendor = AssetVendor(app.static_folder, os.path.join(app.root_path, app.template_folder),
+                             fontawesome_dir=fontawesome_dir, inter_file=inter_file)
+        manifest = vendor.build()
+        before, after = manifest['before'], manifest['after']
+        click.echo(f"Vendored {len(manifest['icons'])} icons and Inter weights "
+                   f"{', '.join(map(str, manifest['weights']))}")
+        click.echo(f"Font bytes: {before['bytes']} -> {after['bytes']}; "
+                   f"requests: {before['requests']} -> {after['requests']}")
+        urls = pages().values() if pages is not None else ['/']
+        for url, links in measure_blocking(app, urls).items():
+            counts = []
+            for hrefs in (links['before'], links['after']):
+                third_party = sum(1 for href in hrefs if is_third_party(href))
+                counts.append(f"{len(hrefs)} ({third_party} third-party)")
+            click.echo(f"{url}: render-blocking stylesheets {counts[0]} -> {counts[1]}")
+        if manifest['missing_icons']:
+            click.echo(f"Icons not in Font Awesome: {', '.join(manifest['missing_icons'])}")
@@ -0,0 +1,67 @@
+"""
+Benchmark of /api/projects throughput: full list vs pages, deltas and 304s
+Run with: python benchmarks/bench_api.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from DAL import DAL
+from bench_freeze import populate
+
+
+def throughput(client, url: str, headers: dict = None, seconds: float = 1.0):
+    """
+    Issue requests for a fixed time
+
+    Returns:
+        Tuple[float, int]: Requests per second and response size in bytes
+    """
+    count = 0
+    size = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = client.get(url, headers=headers or {})
+        size = len(response.data)
+        count += 1
+    return count / (time.perf_counter() - started), size
+
+
+def main():
+    app_module.limiter.store.reset()
+    print('%8s  %-28s %10s %10s' % ('projects', 'request', 'req/s', 'bytes'))
+    for count in (100, 1000, 10000):
+        db_fd, db_path = tempfile.mkstemp()
+        dal = DAL(db_name=db_path)
+        populate(dal, count)
+        # A handful of edits so the delta has something to report
+        for project_id in range(1, 11):
+            dal.update_project(project_id, title='Edited %d' % project_id)
+        app_module.dal = dal
+
+        client = app_module.app.test_client()
+        version = dal.get_latest_change_seq()
+        etag = client.get('/api/projects?limit=500').headers['ETag']
+        cases = [
+            ('full list (html /projects)', '/projects', None),
+            ('full list (limit=500)', '/api/projects?limit=500', None),
+            ('first page (limit=50)', '/api/projects', None),
+            ('page, fields=id,title', '/api/projects?fields=id,title', None),
+            ('delta since=version-10', '/api/projects?since=%d' % (version - 10), None),
+            ('revalidate (304)', '/api/projects?limit=500', {'If-None-Match': etag}),
+        ]
+        for label, url, headers in cases:
+            rps, size = throughput(client, url, headers)
+            print('%8d  %-28s %10.0f %10d' % (count, label, rps, size))
+
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
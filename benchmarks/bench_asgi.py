@@ -0,0 +1,190 @@
+"""
+Benchmark of concurrent idle connections: threaded WSGI vs ASGI mode
+Opens N idle connections, then measures threads in use and the latency of
+page requests made while they stay open
+Run with: python benchmarks/bench_asgi.py
+
+The WSGI side uses Werkzeug's threaded server over real sockets; since it
+closes every connection after a response, its idle connections are clients
+that have sent only part of a request head (a slow client, or keep-alive
+behind a proxy), each of which pins a thread. The ASGI
+side uses uvicorn when it is installed, otherwise it drives the ASGI app
+in-process (event stream subscribers stand in for idle connections).
+"""
+
+import asyncio
+import http.client
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as app_module
+from DAL import DAL
+from asgi import ASGIApp
+from sse import ChangeFeedHub, STREAM_PATH
+
+try:
+    import uvicorn
+except ImportError:  # optional: fall back to the in-process driver
+    uvicorn = None
+
+REQUESTS = 200
+
+
+def latency_ms(samples):
+    return statistics.median(samples) * 1000, sorted(samples)[int(len(samples) * 0.99) - 1] * 1000
+
+
+def time_requests(port: int):
+    samples = []
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        conn.request('GET', '/about')
+        conn.getresponse().read()
+        samples.append(time.perf_counter() - started)
+    conn.close()
+    return samples
+
+
+def open_idle(port: int, count: int, path: str, complete: bool):
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        head = f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+        sock.sendall((head + '\r\n' if complete else head).encode())
+        sockets.append(sock)
+    if complete:
+        for sock in sockets:
+            sock.recv(65536)
+    else:
+        time.sleep(0.5)
+    return sockets
+
+
+class QuietHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args):
+        pass
+
+
+def wait_for_threads(count: int):
+    deadline = time.monotonic() + 30
+    while threading.active_count() > count and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.5)
+
+
+def bench_wsgi(count: int):
+    baseline = threading.active_count()
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True,
+                         request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    before = threading.active_count()
+    idle = open_idle(server.server_port, count, '/about', complete=False)
+    threads = threading.active_count() - before
+    samples = time_requests(server.server_port)
+    for sock in idle:
+        sock.close()
+    server.shutdown()
+    server.server_close()
+    wait_for_threads(baseline)
+    return threads, samples
+
+
+def bench_asgi_uvicorn(application: ASGIApp, count: int):
+    config = uvicorn.Config(application, host='127.0.0.1', port=0, log_level='warning')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    before = threading.active_count()
+    idle = open_idle(port, count, STREAM_PATH, complete=True)
+    threads = threading.active_count() - before
+    samples = time_requests(port)
+    for sock in idle:
+        sock.close()
+    server.should_exit = True
+    thread.join()
+    return threads, samples
+
+
+async def bench_asgi_in_process(application: ASGIApp, count: int):
+    closed = asyncio.Event()
+    opened = []
+
+    async def idle_receive():
+        await closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def idle_send(message):
+        if message['type'] == 'http.response.body':
+            opened.append(True)
+
+    def scope(path):
+        return {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+                'headers': [], 'http_version': '1.1', 'scheme': 'http',
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 0), 'root_path': ''}
+
+    await application.hub.start()
+    before = threading.active_count()
+    tasks = [asyncio.ensure_future(application(scope(STREAM_PATH), idle_receive, idle_send))
+             for _ in range(count)]
+    while len(opened) < count:
+        await asyncio.sleep(0.01)
+    threads = threading.active_count() - before
+
+    async def body_receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def discard(message):
+        pass
+
+    samples = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        await application(scope('/about'), body_receive, discard)
+        samples.append(time.perf_counter() - started)
+
+    closed.set()
+    await asyncio.gather(*tasks)
+    await application.hub.stop()
+    application.hub.db.close()
+    application.executor.shutdown()
+    return threads, samples
+
+
+def main():
+    db_fd, db_path = tempfile.mkstemp()
+    app_module.dal = DAL(db_name=db_path)
+    mode = 'uvicorn' if uvicorn is not None else 'in-process'
+
+    print('%-22s %8s %10s %10s %10s' % ('server', 'idle', 'threads', 'p50 ms', 'p99 ms'))
+    for count in (100, 1000, 2000):
+        threads, samples = bench_wsgi(count)
+        print('%-22s %8d %10d %10.2f %10.2f' % (('wsgi (threaded)', count, threads) + latency_ms(samples)))
+
+        application = ASGIApp(app_module.app, hub=ChangeFeedHub(app_module.dal))
+        if uvicorn is not None:
+            threads, samples = bench_asgi_uvicorn(application, count)
+        else:
+            threads, samples = asyncio.run(bench_asgi_in_process(application, count))
+        print('%-22s %8d %10d %10.2f %10.2f' % (('asgi (%s)' % mode, count, threads) + latency_ms(samples)))
+
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
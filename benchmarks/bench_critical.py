@@ -0,0 +1,81 @@
+"""
+Benchmark of render-blocking CSS before and after critical CSS inlining
+Builds the critical CSS into a temporary static folder, renders every page
+both ways and estimates time to first paint on a throttled connection
+Run with: python benchmarks/bench_critical.py
+
+First paint is modelled, not measured in a browser: one round trip plus
+transfer time for the HTML, then (before) one more round trip plus transfer
+time for the render-blocking stylesheets fetched in parallel. The link is
+Lighthouse's "slow 4G" profile; sizes are gzip-compressed as served by a
+typical reverse proxy.
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from DAL import DAL
+from bench_freeze import populate
+
+RTT = 0.150                   # seconds
+BANDWIDTH = 1.6e6 / 8         # bytes per second
+
+
+def compressed(data: bytes) -> int:
+    return len(gzip.compress(data))
+
+
+def first_paint(html_bytes: int, css_bytes: int) -> float:
+    """Estimated seconds until first paint"""
+    seconds = RTT + html_bytes / BANDWIDTH
+    if css_bytes:
+        seconds += RTT + css_bytes / BANDWIDTH
+    return seconds
+
+
+def main():
+    db_fd, db_path = tempfile.mkstemp()
+    app_module.dal = DAL(db_name=db_path)
+    populate(app_module.dal, 50)
+
+    app = app_module.app
+    workdir = tempfile.mkdtemp()
+    shutil.copytree(os.path.join(app.root_path, 'static', 'css'), os.path.join(workdir, 'css'))
+    original_static = app.static_folder
+    app.static_folder = workdir
+    app.config['CRITICAL_CSS_MANIFEST'] = os.path.join(workdir, 'critical', 'manifest.json')
+
+    manifest = app_module.make_critical_css().build()
+    for path, sheet in manifest['report']['stylesheets'].items():
+        print('%-26s %8d -> %8d bytes, %d dead selectors' % (
+            path, sheet['bytes_before'], sheet['bytes_after'], sheet['dead_selectors']))
+    print()
+
+    blocking = sum(compressed(open(os.path.join(workdir, path), 'rb').read())
+                   for path in ['css/styles.css', 'css/projects-styles.css'])
+    client = app.test_client()
+    print('%-12s %12s %12s %12s %12s %10s %10s' % (
+        'page', 'html before', 'html after', 'css before', 'css after', 'fp before', 'fp after'))
+    for endpoint, url in sorted(app_module.make_freezer('build').pages().items()):
+        app.config['CRITICAL_CSS_MANIFEST'] = None
+        before = compressed(client.get(url).get_data())
+        app.config['CRITICAL_CSS_MANIFEST'] = os.path.join(workdir, 'critical', 'manifest.json')
+        after = compressed(client.get(url).get_data())
+        print('%-12s %12d %12d %12d %12d %9.0fms %9.0fms' % (
+            endpoint, before, after, blocking, 0, first_paint(before, blocking) * 1000,
+            first_paint(after, 0) * 1000))
+
+    app.static_folder = original_static
+    shutil.rmtree(workdir)
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
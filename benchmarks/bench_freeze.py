@@ -0,0 +1,54 @@
+"""
+Benchmark of static export build times for growing project counts
+Run with: python benchmarks/bench_freeze.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from DAL import DAL
+from freeze import Freezer
+
+
+def populate(dal: DAL, count: int):
+    """Insert count projects in one transaction"""
+    conn = dal.get_connection()
+    conn.executemany('''
+        INSERT INTO projects (title, description, image_filename, category, technologies)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [('Project %d' % i, 'Description for project %d. ' % i * 10, 'img%d.png' % i,
+           'Web', 'Python, Flask, SQLite') for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def main():
+    print('%10s %12s %12s %14s' % ('projects', 'full (s)', 'no-op (s)', 'incremental (s)'))
+    for count in (100, 1000, 10000):
+        db_fd, db_path = tempfile.mkstemp()
+        dal = DAL(db_name=db_path)
+        populate(dal, count)
+        app_module.dal = dal
+
+        with tempfile.TemporaryDirectory() as output:
+            freezer = Freezer(app_module.app, output, depends_on={'projects': ['projects']})
+            full = freezer.freeze()['seconds']
+            noop = freezer.freeze()['seconds']
+
+            freezer.watch(dal, background=False)
+            started = time.perf_counter()
+            dal.add_project(title='New', description='New project', image_filename='new.png')
+            incremental = time.perf_counter() - started
+
+        print('%10d %12.3f %12.3f %14.3f' % (count, full, noop, incremental))
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of SQLite maintenance cost as seen by concurrent readers
+Deletes most of a large projects table, then reclaims the space with a full
+VACUUM and with the scheduler's incremental vacuum while a reader thread
+keeps querying, and compares the reader's latency
+Run with: python benchmarks/bench_maintenance.py
+"""
+
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import DAL
+from maintenance import DatabaseMaintenance
+
+PROJECTS = 20000
+
+
+def build(db_path: str):
+    dal = DAL(db_name=db_path)
+    conn = dal.get_connection()
+    conn.executemany(
+        'INSERT INTO projects (title, description, image_filename) VALUES (?, ?, ?)',
+        [(f'Project {i}', 'x' * 2000, 'a.png') for i in range(PROJECTS)])
+    conn.execute('DELETE FROM projects WHERE id % 10 != 0')
+    conn.commit()
+    conn.close()
+    return dal
+
+
+def measure(dal: DAL, work):
+    """Run work() while a reader queries one project at a time"""
+    samples = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                dal.get_project_by_id(10)
+            except sqlite3.OperationalError:
+                pass
+            samples.append(time.perf_counter() - started)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    started = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+    return result, elapsed, samples
+
+
+def report(label: str, size_before: int, db_path: str, elapsed: float, samples):
+    reclaimed = size_before - os.path.getsize(db_path)
+    print('%-22s %12d %10.3f %10.2f %10.2f' % (
+        label, reclaimed, elapsed, statistics.median(samples) * 1000, max(samples) * 1000))
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, 'template.db')
+    build(template)
+    print('%-22s %12s %10s %10s %10s' % ('method', 'reclaimed B', 'seconds', 'p50 ms', 'max ms'))
+
+    full_path = os.path.join(workdir, 'full.db')
+    shutil.copyfile(template, full_path)
+    dal = DAL(db_name=full_path)
+    size = os.path.getsize(full_path)
+
+    def full_vacuum():
+        conn = sqlite3.connect(full_path, isolation_level=None)
+        conn.execute('VACUUM')
+        conn.close()
+
+    _, elapsed, samples = measure(dal, full_vacuum)
+    report('VACUUM', size, full_path, elapsed, samples)
+
+    for pages in (64, 1024):
+        path = os.path.join(workdir, f'incremental-{pages}.db')
+        shutil.copyfile(template, path)
+        dal = DAL(db_name=path)
+        size = os.path.getsize(path)
+        maintenance = DatabaseMaintenance(path, vacuum_pages=pages)
+        _, elapsed, samples = measure(dal, maintenance.run_once)
+        report(f'incremental ({pages} pg)', size, path, elapsed, samples)
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
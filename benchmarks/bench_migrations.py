@@ -0,0 +1,113 @@
+"""
+Benchmark of a data migration's effect on concurrent writes
+Adds a column to a large projects table and fills it with one UPDATE in a
+single transaction and with the runner's batched, throttled backfill, while
+a writer thread keeps adding projects, and compares the writer's latency
+Run with: python benchmarks/bench_migrations.py
+"""
+
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import DAL
+from migrations import MIGRATIONS, Backfill, Migration, MigrationRunner, column_names
+
+PROJECTS = 200000
+
+SUMMARY_SQL = ('UPDATE projects SET summary = substr(description, 1, 80) '
+               'WHERE id BETWEEN :first AND :last AND summary IS NULL')
+
+
+def add_summary_column(conn):
+    if 'summary' not in column_names(conn, 'projects'):
+        conn.execute('ALTER TABLE projects ADD COLUMN summary TEXT')
+
+
+SUMMARY_MIGRATION = Migration(100, 'add projects.summary', add_summary_column,
+                              backfill=Backfill('projects', SUMMARY_SQL))
+
+
+def build(db_path: str):
+    dal = DAL(db_name=db_path)
+    conn = dal.get_connection()
+    conn.executemany(
+        'INSERT INTO projects (title, description, image_filename) VALUES (?, ?, ?)',
+        [(f'Project {i}', 'x' * 400, 'a.png') for i in range(PROJECTS)])
+    conn.commit()
+    conn.close()
+
+
+def measure(dal: DAL, work):
+    """Run work() while a writer adds one project at a time"""
+    samples = []
+    failures = 0
+    stop = threading.Event()
+
+    def writer():
+        nonlocal failures
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                dal.add_project(title='New', description='During migration', image_filename='a.png')
+            except sqlite3.OperationalError:
+                failures += 1
+            samples.append(time.perf_counter() - started)
+            stop.wait(0.005)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+    return elapsed, samples, failures
+
+
+def report(label: str, elapsed: float, samples, failures: int):
+    print('%-26s %9.2f %8d %9.2f %9.2f %9d' % (
+        label, elapsed, len(samples), statistics.median(samples) * 1000,
+        max(samples) * 1000, failures))
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, 'template.db')
+    build(template)
+    print('%-26s %9s %8s %9s %9s %9s' % ('method', 'seconds', 'writes', 'p50 ms', 'max ms', 'failed'))
+
+    path = os.path.join(workdir, 'single.db')
+    shutil.copyfile(template, path)
+    dal = DAL(db_name=path)
+
+    def single_update():
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute('BEGIN IMMEDIATE')
+        add_summary_column(conn)
+        conn.execute(SUMMARY_SQL, {'first': 0, 'last': 2 ** 62})
+        conn.execute('COMMIT')
+        conn.close()
+
+    report('single UPDATE', *measure(dal, single_update))
+
+    for batch_size in (500, 5000):
+        path = os.path.join(workdir, f'batched-{batch_size}.db')
+        shutil.copyfile(template, path)
+        dal = DAL(db_name=path)
+        runner = MigrationRunner(path, MIGRATIONS + [SUMMARY_MIGRATION], batch_size=batch_size)
+        report(f'backfill ({batch_size} rows)', *measure(dal, runner.migrate))
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
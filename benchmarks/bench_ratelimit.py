@@ -0,0 +1,53 @@
+"""
+Benchmark of rate limiter overhead per request
+Run with: python benchmarks/bench_ratelimit.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratelimit import Bucket, MemoryStore, RateLimiter, SQLiteStore
+
+
+def bench(limiter: RateLimiter, requests: int, clients: int) -> float:
+    """
+    Time limiter.hit() across a pool of client IPs
+
+    Returns:
+        float: Microseconds per request
+    """
+    ips = ['10.0.%d.%d' % (i // 256, i % 256) for i in range(clients)]
+    started = time.perf_counter()
+    for i in range(requests):
+        limiter.hit(ips[i % clients])
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    per_ip = Bucket(rate=10 / 60, capacity=10)
+    global_bucket = Bucket(rate=1e9, capacity=10 ** 9)
+
+    db_fd, db_path = tempfile.mkstemp()
+    stores = [
+        ('memory', MemoryStore(), 200000),
+        ('sqlite', SQLiteStore(db_path), 20000),
+    ]
+
+    print('%-8s %10s %10s %12s' % ('store', 'clients', 'requests', 'us/request'))
+    for name, store, requests in stores:
+        for clients in (1, 1000, 50000):
+            store.reset()
+            limiter = RateLimiter(store, per_ip, global_bucket, endpoints=[])
+            print('%-8s %10d %10d %12.2f' % (name, clients, requests,
+                                             bench(limiter, requests, clients)))
+
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark of per-portfolio shards against one shared database
+Writes projects for many portfolios from several threads into a single
+table with a portfolio column and into one SQLite file per portfolio, then
+times a cross-portfolio listing run serially and in parallel
+Run with: python benchmarks/bench_shards.py [portfolios]
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shards import ShardedDAL
+
+THREADS = 8
+WRITES_PER_THREAD = 250
+
+
+def run_writers(write, portfolios):
+    """Run THREADS writers, each adding projects to random-ish portfolios"""
+    latencies = []
+    lock = threading.Lock()
+
+    def writer(n):
+        local = []
+        for i in range(WRITES_PER_THREAD):
+            name = portfolios[(n * 7919 + i * 104729) % len(portfolios)]
+            started = time.perf_counter()
+            write(name, f'Project {n}-{i}')
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def report(label: str, elapsed: float, latencies):
+    latencies = sorted(latencies)
+    print('%-26s %9.2f %9.0f %9.2f %9.2f' % (
+        label, elapsed, len(latencies) / elapsed, statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+def shared_database(workdir: str, portfolios):
+    path = os.path.join(workdir, 'shared.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT, portfolio TEXT NOT NULL, '
+                 'title TEXT NOT NULL, description TEXT NOT NULL, image_filename TEXT NOT NULL, '
+                 'created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    conn.execute('CREATE INDEX projects_portfolio ON projects (portfolio, created_date)')
+    conn.commit()
+    conn.close()
+
+    def write(name, title):
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute('INSERT INTO projects (portfolio, title, description, image_filename) '
+                     'VALUES (?, ?, ?, ?)', (name, title, 'Description', 'a.png'))
+        conn.commit()
+        conn.close()
+
+    return write
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    portfolios = [f'portfolio-{i}' for i in range(count)]
+    workdir = tempfile.mkdtemp()
+    print(f'{count} portfolios, {THREADS} threads x {WRITES_PER_THREAD} writes')
+    print('%-26s %9s %9s %9s %9s' % ('storage', 'seconds', 'writes/s', 'p50 ms', 'p99 ms'))
+
+    report('shared database', *run_writers(shared_database(workdir, portfolios), portfolios))
+
+    sharded = ShardedDAL(os.path.join(workdir, 'shards'), max_open=128)
+    # Create every shard up front (and hide the per-shard init message)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in portfolios:
+            sharded.portfolio(name)
+
+    def write(name, title):
+        sharded.portfolio(name).add_project(title=title, description='Description',
+                                            image_filename='a.png')
+
+    report('shards (128 open)', *run_writers(write, portfolios))
+    report('shards, 64 hot portfolios', *run_writers(write, portfolios[:64]))
+    print('LRU: %(open)d open, %(hits)d hits, %(misses)d misses, %(evictions)d evictions'
+          % sharded.stats())
+
+    print()
+    print('%-26s %9s' % ('cross-shard listing', 'seconds'))
+    for workers in (1, 8):
+        sharded.max_workers = workers
+        started = time.perf_counter()
+        recent = sharded.get_recent_projects(limit=50)
+        print('%-26s %9.3f' % (f'{workers} worker(s)', time.perf_counter() - started))
+    assert len(recent) == 50
+
+    sharded.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of first-request latency after a restart, with and without warmup
+Starts a fresh interpreter per trial, imports the app against a seeded
+database and times the first and a later request to each page
+Run with: python benchmarks/bench_warmup.py
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from DAL import DAL
+
+TRIALS = 5
+PAGES = ['/', '/projects', '/contact']
+
+CHILD = '''
+import json, sys, time
+import app as app_module
+from DAL import DAL
+app_module.dal = DAL(db_name=sys.argv[1])
+if sys.argv[2] == 'warm':
+    app_module.warmup.run()
+client = app_module.app.test_client()
+timings = {}
+for url in %r:
+    started = time.perf_counter()
+    client.get(url)
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    client.get(url)
+    timings[url] = [first, time.perf_counter() - started]
+print(json.dumps(timings))
+''' % (PAGES,)
+
+
+def trial(db_path: str, mode: str):
+    env = dict(os.environ, WARMUP='0', DB_MAINTENANCE_INTERVAL='0')
+    output = subprocess.run([sys.executable, '-c', CHILD, db_path, mode], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'projects.db')
+    dal = DAL(db_name=db_path)
+    for i in range(200):
+        dal.add_project(title=f'Project {i}', description='Description ' * 20,
+                        image_filename='a.png', technologies='Python, Flask')
+
+    print('%-10s %-10s %12s %12s' % ('page', 'mode', 'first ms', 'later ms'))
+    for mode in ('cold', 'warm'):
+        results = [trial(db_path, mode) for _ in range(TRIALS)]
+        for url in PAGES:
+            first = statistics.median(r[url][0] for r in results) * 1000
+            later = statistics.median(r[url][1] for r in results) * 1000
+            print('%-10s %-10s %12.2f %12.2f' % (url, mode, first, later))
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,11 @@ Pytest configuration and fixtures for Flask application testing
 import pytest
 import os
 import tempfile
-from app import app as flask_app
+
+# Tests drive the startup warmup themselves (see test_readiness.py)
+os.environ.setdefault('WARMUP', '0')
+
+from app import app as flask_app, limiter, row_cache
 from DAL import DAL
 
 
@@ -18,9 +22,14 @@ def app():
     flask_app.config.update({
         'TESTING': True,
         'SECRET_KEY': 'test-secret-key',
-        'WTF_CSRF_ENABLED': False  # Disable CSRF for testing
+        'WTF_CSRF_ENABLED': False,  # Disable CSRF for testing
+        'PROJECT_STREAM_URL': None  # Live updates off unless a test enables them
     })
     
+    # Start every test with full rate-limit buckets and no cached rows
+    limiter.store.reset()
+    row_cache.clear()
+    
     yield flask_app
     
     # Cleanup
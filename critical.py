@@ -0,0 +1,551 @@
+"""
+Critical CSS for the Flask Portfolio Website
+Renders every page, works out which rules style its above-the-fold content,
+and writes those for inlining in base.html, along with copies of the full
+stylesheets with selectors no template can ever match removed
+"""
+
+import hashlib
+import json
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import click
+from flask import Flask
+from markupsafe import Markup
+
+from assets import load_manifest
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                 'meta', 'source', 'track', 'wbr'}
+BLOCK_AT_RULES = ('@media', '@supports')
+
+PSEUDO_ELEMENT_PATTERN = re.compile(r'::?(?:before|after|first-line|first-letter|placeholder|selection|'
+                                    r'-webkit-[\w-]+|-moz-[\w-]+)\b')
+PSEUDO_CLASS_PATTERN = re.compile(r':(?!root\b)[\w-]+(?:\([^)]*\))?')
+ATTRIBUTE_PATTERN = re.compile(r'\[[^\]]*\]')
+COMPOUND_PATTERN = re.compile(r'^(\*|[a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$')
+COMBINATOR_PATTERN = re.compile(r'\s*([>+~])\s*|\s+')
+ANIMATION_PATTERN = re.compile(r'animation(?:-name)?\s*:\s*([^;]+)')
+
+
+class StyleRule:
+    """A selector list and its declarations"""
+
+    def __init__(self, selectors: List[str], declarations: str):
+        self.selectors = selectors
+        self.declarations = declarations
+
+    def css(self, selectors: List[str] = None) -> str:
+        return ','.join(selectors or self.selectors) + '{' + minify(self.declarations) + '}'
+
+
+class AtRule:
+    """An at-rule: nested rules for @media/@supports, an opaque body otherwise"""
+
+    def __init__(self, prelude: str, rules: List = None, body: Optional[str] = None):
+        self.prelude = prelude
+        self.rules = rules
+        self.body = body
+
+    @property
+    def name(self) -> str:
+        return self.prelude.split()[0].lower()
+
+    def css(self) -> str:
+        if self.rules is not None:
+            return self.prelude + '{' + ''.join(rule.css() for rule in self.rules) + '}'
+        if self.body is not None:
+            return self.prelude + '{' + minify(self.body) + '}'
+        return self.prelude + ';'
+
+
+def minify(css: str) -> str:
+    """
+    Collapse whitespace in CSS outside of strings
+
+    Args:
+        css: CSS text
+
+    Returns:
+        str: Minified CSS
+    """
+    parts = re.split(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', css)
+    for i in range(0, len(parts), 2):
+        collapsed = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = re.sub(r'\s*([;:{},>])\s*', r'\1', collapsed).replace(';}', '}')
+    return ''.join(parts).strip().rstrip(';')
+
+
+def parse_css(text: str) -> List:
+    """
+    Parse a stylesheet into StyleRule and AtRule objects
+
+    Args:
+        text: Stylesheet source
+
+    Returns:
+        List: Top-level rules in source order
+    """
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    rules, _ = _parse_block(text, 0)
+    return rules
+
+
+def _parse_block(text: str, pos: int) -> Tuple[List, int]:
+    rules = []
+    while True:
+        start = pos
+        while pos < len(text) and text[pos] not in '{};':
+            if text[pos] in '"\'':
+                pos = text.index(text[pos], pos + 1)
+            pos += 1
+        prelude = text[start:pos].strip()
+        if pos >= len(text) or text[pos] == '}':
+            return rules, pos + 1
+        if text[pos] == ';':
+            if prelude.startswith('@'):
+                rules.append(AtRule(prelude))
+            pos += 1
+            continue
+        if prelude.lower().startswith(BLOCK_AT_RULES):
+            inner, pos = _parse_block(text, pos + 1)
+            rules.append(AtRule(' '.join(prelude.split()), rules=inner))
+            continue
+        end = _block_end(text, pos)
+        body = text[pos + 1:end]
+        if prelude.startswith('@'):
+            rules.append(AtRule(' '.join(prelude.split()), body=body))
+        else:
+            selectors = [' '.join(s.split()) for s in prelude.split(',') if s.strip()]
+            rules.append(StyleRule(selectors, body))
+        pos = end + 1
+
+
+def _block_end(text: str, pos: int) -> int:
+    """Index of the brace closing the block opened at pos"""
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in '"\'':
+            pos = text.index(char, pos + 1)
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    return pos
+
+
+class Element:
+    """One HTML element in a parsed page"""
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['Element'], order: int):
+        self.tag = tag
+        self.id = attrs.get('id')
+        self.classes = set((attrs.get('class') or '').split())
+        self.parent = parent
+        self.children = []
+        self.order = order
+        if parent is not None:
+            parent.children.append(self)
+
+
+class Document(HTMLParser):
+    """Element tree of a rendered page"""
+
+    def __init__(self, html: str):
+        super().__init__()
+        self.root = Element('#document', {}, None, -1)
+        self.elements = []
+        self._stack = [self.root]
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, dict(attrs), self._stack[-1], len(self.elements))
+        self.elements.append(element)
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.elements.append(Element(tag, dict(attrs), self._stack[-1], len(self.elements)))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+
+    def above_the_fold(self, fold_elements: int) -> List[Element]:
+        """
+        Estimate the elements visible before scrolling
+
+        Everything in <head> plus the first fold_elements elements of
+        <body> in document order (navigation, then the page's opening
+        section), with their ancestors.
+
+        Args:
+            fold_elements: Number of body elements treated as above the fold
+
+        Returns:
+            List[Element]: Elements to style in the critical CSS
+        """
+        body = next((e for e in self.elements if e.tag == 'body'), None)
+        if body is None:
+            return list(self.elements)
+        cutoff = body.order + fold_elements
+        return [e for e in self.elements if e.order <= cutoff]
+
+
+def parse_selector(selector: str) -> Optional[List[Tuple[str, Tuple[str, Set[str], Set[str]]]]]:
+    """
+    Split a selector into (combinator, (tag, classes, ids)) steps, left to right
+
+    Pseudo-classes, pseudo-elements and attribute tests are dropped, so the
+    result matches a superset of what the browser would match (a :hover
+    rule is kept for any element that could be hovered).
+
+    Args:
+        selector: A single selector (no commas)
+
+    Returns:
+        Optional[List]: Steps, or None if the selector cannot be parsed
+    """
+    simplified = selector.replace(':root', 'html')
+    simplified = PSEUDO_ELEMENT_PATTERN.sub('', simplified)
+    simplified = PSEUDO_CLASS_PATTERN.sub('', simplified)
+    simplified = ATTRIBUTE_PATTERN.sub('', simplified).strip()
+
+    steps = []
+    combinator = ''
+    pos = 0
+    for match in COMBINATOR_PATTERN.finditer(simplified):
+        steps.append((combinator, simplified[pos:match.start()]))
+        combinator = match.group(1) or ' '
+        pos = match.end()
+    steps.append((combinator, simplified[pos:]))
+
+    parsed = []
+    for combinator, compound in steps:
+        match = COMPOUND_PATTERN.match(compound)
+        if match is None:
+            return None
+        tag = (match.group(1) or '*').lower()
+        tokens = re.findall(r'[.#][\w-]+', match.group(2))
+        parsed.append((combinator, (tag, {t[1:] for t in tokens if t[0] == '.'},
+                                    {t[1:] for t in tokens if t[0] == '#'})))
+    return parsed
+
+
+def _compound_matches(compound, element: Element) -> bool:
+    tag, classes, ids = compound
+    return ((tag == '*' or tag == element.tag) and classes <= element.classes and
+            all(element.id == i for i in ids))
+
+
+def selector_matches(steps, element: Element) -> bool:
+    """
+    Test a parsed selector against an element
+
+    Args:
+        steps: Result of parse_selector
+        element: Candidate element
+
+    Returns:
+        bool: True if the selector could match the element
+    """
+    def match_at(index, candidate):
+        _, compound = steps[index]
+        if candidate is None or candidate.tag == '#document' or not _compound_matches(compound, candidate):
+            return False
+        if index == 0:
+            return True
+        previous = steps[index][0]
+        if previous == '>':
+            return match_at(index - 1, candidate.parent)
+        if previous == ' ':
+            ancestor = candidate.parent
+            while ancestor is not None:
+                if match_at(index - 1, ancestor):
+                    return True
+                ancestor = ancestor.parent
+            return False
+        siblings = candidate.parent.children if candidate.parent else []
+        before = siblings[:siblings.index(candidate)]
+        if previous == '+':
+            before = before[-1:]
+        return any(match_at(index - 1, sibling) for sibling in before)
+
+    return match_at(len(steps) - 1, element)
+
+
+class Vocabulary:
+    """Every tag, class and id the templates (and their scripts) can produce"""
+
+    def __init__(self, template_dir: str):
+        """
+        Scan the template sources
+
+        Class attributes containing template expressions become prefixes
+        (class="flash-{{ category }}" allows any flash-* class), and every
+        word in a quoted string counts as a class, so classes added from
+        JavaScript are never treated as dead.
+
+        Args:
+            template_dir: Directory containing the Jinja templates
+        """
+        self.tags = {'html', 'head', 'body', '*'}
+        self.names = set()
+        self.prefixes = set()
+        for name in sorted(os.listdir(template_dir)):
+            if not name.endswith('.html'):
+                continue
+            with open(os.path.join(template_dir, name), encoding='utf-8') as f:
+                source = f.read()
+            self.tags.update(tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', source))
+            for value in re.findall(r'\b(?:class|id)="([^"]*)"', source):
+                for token in re.split(r'\s+', re.sub(r'{%.*?%}', ' ', value)):
+                    if '{{' in token:
+                        prefix = token.split('{{')[0]
+                        if prefix:
+                            self.prefixes.add(prefix)
+                    elif token:
+                        self.names.add(token)
+            for literal in re.findall(r'"([^"<>{}]*)"|\'([^\'<>{}]*)\'', source):
+                self.names.update(re.findall(r'[\w-]+', ''.join(literal)))
+
+    def allows(self, steps) -> bool:
+        """
+        Test whether any rendered page could contain a match for a selector
+
+        Args:
+            steps: Result of parse_selector
+
+        Returns:
+            bool: False if the selector needs a tag, class or id that never appears
+        """
+        for _, (tag, classes, ids) in steps:
+            if tag not in self.tags:
+                return False
+            for name in classes | ids:
+                if name not in self.names and not any(name.startswith(p) for p in self.prefixes):
+                    return False
+        return True
+
+
+class CriticalCSS:
+    """Builds per-page critical CSS and pruned stylesheets into static/critical"""
+
+    def __init__(self, app: Flask, stylesheets: List[str], pages: Dict[str, str],
+                 fold_elements: int = 60, always: Iterable[str] = ()):
+        """
+        Initialize the build
+
+        Args:
+            app: Flask application to render
+            stylesheets: Stylesheet paths relative to the static folder, in link order
+            pages: Endpoint name -> URL path of each page to process
+            fold_elements: Body elements treated as above the fold
+            always: Selector prefixes that are always critical (e.g. flash
+                    messages, which the rendered pages do not show)
+        """
+        self.app = app
+        self.stylesheets = stylesheets
+        self.pages = pages
+        self.fold_elements = fold_elements
+        self.always = tuple(always)
+        self.output_dir = os.path.join(app.static_folder, 'critical')
+
+    def render(self, url: str) -> str:
+        """Render a page through the test client"""
+        with self.app.test_client() as client:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"Cannot render {url}: HTTP {response.status_code}")
+        return response.get_data(as_text=True)
+
+    def prune(self, rules: List, vocabulary: Vocabulary, parsed: Dict) -> Tuple[List, int]:
+        """
+        Remove selectors that no template can match
+
+        Args:
+            rules: Parsed stylesheet
+            vocabulary: Template vocabulary
+            parsed: Cache of selector -> parse_selector result
+
+        Returns:
+            Tuple[List, int]: Remaining rules and the number of selectors removed
+        """
+        kept = []
+        removed = 0
+        for rule in rules:
+            if isinstance(rule, AtRule):
+                if rule.rules is not None:
+                    inner, count = self.prune(rule.rules, vocabulary, parsed)
+                    removed += count
+                    if inner:
+                        kept.append(AtRule(rule.prelude, rules=inner))
+                else:
+                    kept.append(rule)
+                continue
+            live = []
+            for selector in rule.selectors:
+                steps = parsed.setdefault(selector, parse_selector(selector))
+                if steps is None or vocabulary.allows(steps):
+                    live.append(selector)
+            removed += len(rule.selectors) - len(live)
+            if live:
+                kept.append(StyleRule(live, rule.declarations))
+        return kept, removed
+
+    def critical_rules(self, rules: List, elements: List[Element], parsed: Dict) -> List:
+        """
+        Select the rules that style at least one of the given elements
+
+        Args:
+            rules: Parsed (pruned) stylesheet
+            elements: Above-the-fold elements
+            parsed: Cache of selector -> parse_selector result
+
+        Returns:
+            List: Critical rules, with @media wrappers kept and print rules dropped
+        """
+        selected = []
+        for rule in rules:
+            if isinstance(rule, AtRule):
+                if rule.rules is not None:
+                    if rule.name == '@media' and 'print' in rule.prelude and 'screen' not in rule.prelude:
+                        continue
+                    inner = self.critical_rules(rule.rules, elements, parsed)
+                    if inner:
+                        selected.append(AtRule(rule.prelude, rules=inner))
+                elif rule.name != '@keyframes':
+                    selected.append(rule)
+                continue
+            matching = []
+            for selector in rule.selectors:
+                steps = parsed.setdefault(selector, parse_selector(selector))
+                if (selector.startswith(self.always) or steps is None or
+                        any(selector_matches(steps, element) for element in elements)):
+                    matching.append(selector)
+            if matching:
+                selected.append(StyleRule(matching, rule.declarations))
+        return selected
+
+    @staticmethod
+    def keyframes_for(rules: List, css: str) -> List:
+        """Get the @keyframes blocks animated by some critical declaration"""
+        names = set()
+        for value in ANIMATION_PATTERN.findall(css):
+            names.update(re.findall(r'[\w-]+', value))
+        return [rule for rule in rules if isinstance(rule, AtRule) and rule.name == '@keyframes'
+                and rule.prelude.split()[-1] in names]
+
+    def write_asset(self, stem: str, css: str) -> str:
+        data = css.encode('utf-8')
+        name = f'{stem}.{hashlib.sha1(data).hexdigest()[:10]}.css'
+        with open(os.path.join(self.output_dir, name), 'wb') as f:
+            f.write(data)
+        return name
+
+    def build(self) -> Dict:
+        """
+        Compute critical CSS for every page and write the manifest
+
+        Returns:
+            Dict: The manifest, including the per-page byte report
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        vocabulary = Vocabulary(os.path.join(self.app.root_path, self.app.template_folder))
+        parsed = {}
+
+        sources = {}
+        pruned = []
+        written = []
+        report = {'stylesheets': {}, 'pages': {}}
+        for path in self.stylesheets:
+            with open(os.path.join(self.app.static_folder, path), encoding='utf-8') as f:
+                sources[path] = f.read()
+            rules, removed = self.prune(parse_css(sources[path]), vocabulary, parsed)
+            css = ''.join(rule.css() for rule in rules)
+            name = self.write_asset(os.path.splitext(os.path.basename(path))[0], css)
+            written.append(name)
+            pruned.append(rules)
+            report['stylesheets'][path] = {
+                'bytes_before': len(sources[path].encode('utf-8')),
+                'bytes_after': len(css.encode('utf-8')),
+                'dead_selectors': removed
+            }
+
+        blocking_before = sum(len(source.encode('utf-8')) for source in sources.values())
+        pages = {}
+        for endpoint, url in sorted(self.pages.items()):
+            elements = Document(self.render(url)).above_the_fold(self.fold_elements)
+            css = ''.join(rule.css() for rules in pruned
+                          for rule in self.critical_rules(rules, elements, parsed))
+            keyframes = ''.join(rule.css() for rules in pruned
+                                for rule in self.keyframes_for(rules, css))
+            css = keyframes + css
+            pages[endpoint] = css
+            report['pages'][endpoint] = {
+                'blocking_bytes_before': blocking_before,
+                'inline_bytes_after': len(css.encode('utf-8'))
+            }
+
+        manifest = {
+            'stylesheets': ['critical/' + name for name in written],
+            'pages': pages,
+            'report': report
+        }
+        for name in os.listdir(self.output_dir):
+            if name not in written and name != 'manifest.json':
+                os.remove(os.path.join(self.output_dir, name))
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def critical_css_for(manifest_path: Optional[str], endpoint: Optional[str]) -> Optional[Dict]:
+    """
+    Get the inline CSS and deferred stylesheets for a page
+
+    Args:
+        manifest_path: Path of static/critical/manifest.json (None = disabled)
+        endpoint: Endpoint being rendered
+
+    Returns:
+        Optional[Dict]: 'css' (Markup for a <style> element) and 'stylesheets',
+                        or None to link the full stylesheets normally
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest is None or endpoint not in manifest['pages']:
+        return None
+    # Never let stylesheet text close the <style> element early
+    css = manifest['pages'][endpoint].replace('</', '<\\/')
+    return {'css': Markup(css), 'stylesheets': manifest['stylesheets']}
+
+
+def register_commands(app: Flask, critical_factory):
+    """
+    Add the `flask critical-css` command to an app
+
+    Args:
+        app: Flask application
+        critical_factory: Returns the CriticalCSS build to run
+    """
+    @app.cli.command('critical-css')
+    def critical_css_command():
+        """Extract per-page critical CSS and prune dead selectors."""
+        manifest = critical_factory().build()
+        report = manifest['report']
+        for path, sheet in report['stylesheets'].items():
+            click.echo(f"{path}: {sheet['bytes_before']} -> {sheet['bytes_after']} bytes, "
+                       f"{sheet['dead_selectors']} dead selectors removed")
+        for endpoint, page in report['pages'].items():
+            click.echo(f"{endpoint}: render-blocking CSS {page['blocking_bytes_before']} bytes -> "
+                       f"{page['inline_bytes_after']} bytes inline")
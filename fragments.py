@@ -0,0 +1,73 @@
+"""
+Fragment caching for Jinja templates
+Caches rendered partials (such as one projects table row) by key and version
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from flask import render_template
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Bounded LRU cache of rendered template fragments"""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of fragments kept before the least
+                         recently used ones are evicted
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, template_name: str, key: Hashable, **context) -> Markup:
+        """
+        Render a partial template, reusing a cached rendering for the same key
+
+        The key must change whenever the fragment's output would change,
+        e.g. (project id, row version). A key of None disables caching.
+
+        Args:
+            template_name: Partial template to render
+            key: Cache key for this fragment
+            **context: Template variables
+
+        Returns:
+            Markup: Rendered HTML, safe to embed in the parent template
+        """
+        if key is None:
+            return Markup(render_template(template_name, **context))
+
+        cache_key = (template_name, key)
+        with self._lock:
+            fragment = self._fragments.get(cache_key)
+            if fragment is not None:
+                self._fragments.move_to_end(cache_key)
+                self.hits += 1
+                return fragment
+
+        fragment = Markup(render_template(template_name, **context))
+        with self._lock:
+            self.misses += 1
+            self._fragments[cache_key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        """Drop every cached fragment"""
+        with self._lock:
+            self._fragments.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._fragments)
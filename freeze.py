@@ -0,0 +1,283 @@
+"""
+Static site export for the Flask Portfolio Website
+Renders every page to HTML files that nginx or a CDN can serve directly,
+and re-renders only the affected pages when projects change
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import click
+from flask import Flask
+
+
+class Freezer:
+    """Renders a Flask app's GET pages into a static output directory"""
+
+    MANIFEST_NAME = '.freeze-manifest.json'
+
+    def __init__(self, app: Flask, output_dir: str = 'build',
+                 depends_on: Dict[str, Iterable[str]] = None,
+                 skip: Iterable[str] = ()):
+        """
+        Initialize the freezer
+
+        Args:
+            app: Flask application to render
+            output_dir: Directory the static site is written to
+            depends_on: Maps a data source (e.g. 'projects') to the endpoints
+                        that must be re-rendered when it changes
+            skip: Endpoints that must never be frozen (streams, APIs, health checks)
+        """
+        self.app = app
+        self.output_dir = output_dir
+        self.depends_on = {source: set(endpoints)
+                           for source, endpoints in (depends_on or {}).items()}
+        self.skip = set(skip) | {'static'}
+        self.manifest = self._load_manifest()
+
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._worker = None
+
+    def pages(self) -> Dict[str, str]:
+        """
+        Find every freezable page: GET routes without URL arguments
+
+        Returns:
+            Dict[str, str]: Endpoint name -> URL path
+        """
+        pages = {}
+        for rule in self.app.url_map.iter_rules():
+            if rule.endpoint in self.skip or rule.arguments or 'GET' not in rule.methods:
+                continue
+            pages[rule.endpoint] = rule.rule
+        return pages
+
+    @staticmethod
+    def output_path(url: str) -> str:
+        """
+        Map a URL path to its file inside the output directory
+
+        '/' becomes 'index.html' and '/about' becomes 'about/index.html',
+        which nginx serves with `try_files $uri $uri/index.html`.
+
+        Args:
+            url: URL path of the page
+
+        Returns:
+            str: Relative file path
+        """
+        stripped = url.strip('/')
+        return os.path.join(stripped, 'index.html') if stripped else 'index.html'
+
+    def freeze_page(self, endpoint: str, url: str) -> bool:
+        """
+        Render one page and write it if its content changed
+
+        Args:
+            endpoint: Endpoint name (used for error messages)
+            url: URL path to render
+
+        Returns:
+            bool: True if the file was (re)written, False if unchanged
+        """
+        with self.app.test_client() as client:
+            response = client.get(url)
+            body = response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f"Cannot freeze '{endpoint}' ({url}): HTTP {response.status_code}")
+
+        relative = self.output_path(url)
+        digest = hashlib.sha1(body).hexdigest()
+        target = os.path.join(self.output_dir, relative)
+        if self.manifest.get(relative) == digest and os.path.exists(target):
+            return False
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, target)
+        self.manifest[relative] = digest
+        return True
+
+    def freeze(self, endpoints: Iterable[str] = None) -> Dict:
+        """
+        Render pages into the output directory
+
+        Static files are mirrored on every build, incremental ones included,
+        so images uploaded with a new project are exported with its page.
+
+        Args:
+            endpoints: Endpoints to render (None = every page)
+
+        Returns:
+            Dict: Counts of rendered/written pages, static files copied and
+                  the elapsed seconds
+        """
+        started = time.perf_counter()
+        pages = self.pages()
+        full = endpoints is None
+        selected = pages if full else {e: pages[e] for e in endpoints if e in pages}
+
+        written = 0
+        for endpoint, url in selected.items():
+            if self.freeze_page(endpoint, url):
+                written += 1
+
+        copied = self.copy_static()
+        self._save_manifest()
+
+        return {
+            'rendered': len(selected),
+            'written': written,
+            'copied': copied,
+            'seconds': time.perf_counter() - started
+        }
+
+    def copy_static(self) -> int:
+        """
+        Mirror the app's static folder into the output directory
+
+        Only files that are missing from the export or differ in size or
+        modification time are copied. Hidden files and directories (such
+        as the upload store's .tmp) are left out.
+
+        Returns:
+            int: Number of files copied
+        """
+        source = self.app.static_folder
+        if not source or not os.path.isdir(source):
+            return 0
+        target_root = os.path.join(self.output_dir, self.app.static_url_path.strip('/'))
+        copied = 0
+        for directory, subdirs, files in os.walk(source):
+            subdirs[:] = [d for d in subdirs if not d.startswith('.')]
+            target_dir = os.path.join(target_root, os.path.relpath(directory, source))
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(directory, name)
+                target = os.path.join(target_dir, name)
+                stat = os.stat(path)
+                try:
+                    existing = os.stat(target)
+                    if existing.st_size == stat.st_size and existing.st_mtime_ns == stat.st_mtime_ns:
+                        continue
+                except FileNotFoundError:
+                    pass
+                os.makedirs(target_dir, exist_ok=True)
+                shutil.copy2(path, target)
+                copied += 1
+        return copied
+
+    def affected_endpoints(self, source: str) -> List[str]:
+        """
+        Get the endpoints that depend on a data source
+
+        Args:
+            source: Data source name such as 'projects'
+
+        Returns:
+            List[str]: Endpoint names to re-render
+        """
+        return sorted(self.depends_on.get(source, ()))
+
+    def watch(self, dal, source: str = 'projects', background: bool = True):
+        """
+        Re-render dependent pages whenever the DAL writes
+
+        In background mode the rebuild runs on a worker thread and bursts of
+        writes are coalesced, so /add-project never waits on a re-render.
+
+        Args:
+            dal: DAL instance to listen to
+            source: Data source name the DAL writes belong to
+            background: Rebuild on a worker thread instead of inline
+        """
+        def on_change(action: str, project_id: int):
+            endpoints = self.affected_endpoints(source)
+            if not background:
+                self.freeze(endpoints)
+                return
+            with self._pending_lock:
+                self._pending.update(endpoints)
+                self._idle.clear()
+            self._wakeup.set()
+
+        if background and self._worker is None:
+            self._worker = threading.Thread(target=self._run_worker, name='freezer', daemon=True)
+            self._worker.start()
+        dal.add_listener(on_change)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Block until queued background rebuilds have finished
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the freezer is idle
+        """
+        return self._idle.wait(timeout)
+
+    def _run_worker(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._pending_lock:
+                endpoints, self._pending = self._pending, set()
+            try:
+                if endpoints:
+                    self.freeze(endpoints)
+            except Exception as e:
+                print(f"Incremental freeze failed: {e}")
+            finally:
+                with self._pending_lock:
+                    if not self._pending:
+                        self._idle.set()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        path = os.path.join(self.output_dir, self.MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, self.MANIFEST_NAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+
+def register_commands(app: Flask, freezer_factory):
+    """
+    Add the `flask freeze` command to an app
+
+    Args:
+        app: Flask application
+        freezer_factory: Called with the output directory, returns a Freezer
+    """
+    @app.cli.command('freeze')
+    @click.argument('output_dir', default='build')
+    @click.option('--endpoint', 'endpoints', multiple=True,
+                  help='Only re-render these endpoints (incremental build).')
+    def freeze_command(output_dir: str, endpoints: Optional[List[str]]):
+        """Render every page to static HTML in OUTPUT_DIR."""
+        freezer = freezer_factory(output_dir)
+        result = freezer.freeze(list(endpoints) or None)
+        click.echo(f"Rendered {result['rendered']} pages, wrote {result['written']} "
+                   f"to {output_dir} in {result['seconds']:.3f}s")
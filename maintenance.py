@@ -0,0 +1,310 @@
+"""
+Background SQLite maintenance for the Flask Portfolio Website
+Runs PRAGMA optimize, WAL checkpoints and incremental vacuum on a low-priority
+thread, only while the app is idle, and records how long each step took
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+import click
+from flask import Flask
+
+# auto_vacuum values reported by PRAGMA auto_vacuum
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+
+
+class DatabaseMaintenance:
+    """Idle-time maintenance scheduler for one SQLite database"""
+
+    def __init__(self, db_name: str, is_idle: Callable[[], bool] = None,
+                 interval: float = 300.0, idle_for: float = 2.0,
+                 vacuum_pages: int = 256, step_pause: float = 0.02,
+                 busy_timeout: float = 0.05, history: int = 20):
+        """
+        Initialize the scheduler
+
+        Args:
+            db_name: SQLite database file to maintain
+            is_idle: Returns True when no requests are in progress (None = always idle)
+            interval: Seconds between maintenance runs
+            idle_for: Seconds the app must stay idle before a run starts
+            vacuum_pages: Free pages released per incremental vacuum step
+            step_pause: Seconds between vacuum steps, so waiting requests
+                        get the lock before the next step takes it again
+            busy_timeout: Seconds a step waits for a lock before giving up
+                          (it is retried on the next run instead)
+            history: Number of run reports kept for stats()
+        """
+        self.db_name = db_name
+        self.is_idle = is_idle or (lambda: True)
+        self.interval = interval
+        self.idle_for = idle_for
+        self.vacuum_pages = vacuum_pages
+        self.step_pause = step_pause
+        self.busy_timeout = busy_timeout
+        self.history = deque(maxlen=history)
+        self.runs = 0
+        self.reclaimed_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a maintenance connection that gives up quickly on locks
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode
+        """
+        return sqlite3.connect(self.db_name, timeout=self.busy_timeout, isolation_level=None)
+
+    def optimize(self, conn: sqlite3.Connection) -> Dict:
+        """
+        Refresh planner statistics where SQLite thinks they are stale
+
+        analysis_limit keeps ANALYZE to a sample of each index, so the step
+        stays short even on large tables.
+        """
+        conn.execute('PRAGMA analysis_limit = 400')
+        conn.execute('PRAGMA optimize')
+        return {}
+
+    def checkpoint(self, conn: sqlite3.Connection) -> Dict:
+        """
+        Copy WAL frames back into the database without blocking anyone
+
+        PASSIVE mode checkpoints what it can and never waits for readers or
+        writers. Does nothing unless the database is in WAL mode.
+        """
+        mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if mode.lower() != 'wal':
+            return {'skipped': f'journal_mode={mode}'}
+        busy, wal_frames, checkpointed = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+        return {'busy': bool(busy), 'wal_frames': wal_frames, 'checkpointed': checkpointed}
+
+    def incremental_vacuum(self, conn: sqlite3.Connection) -> Dict:
+        """
+        Return free pages to the filesystem in small steps
+
+        Each step releases at most vacuum_pages pages and holds the write
+        lock only that long; the loop stops as soon as requests arrive.
+        Requires auto_vacuum=INCREMENTAL (see enable_incremental_vacuum).
+        """
+        auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if auto_vacuum != 2:
+            return {'skipped': f'auto_vacuum={AUTO_VACUUM_MODES.get(auto_vacuum, auto_vacuum)}',
+                    'free_bytes': free_before * page_size}
+
+        free = free_before
+        while free > 0 and self.is_idle() and not self._stop.is_set():
+            # The pragma frees one page per VM step and execute() stops
+            # after the first, so run it to completion with executescript
+            conn.executescript(f'PRAGMA incremental_vacuum({int(self.vacuum_pages)});')
+            remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if remaining >= free:
+                break
+            free = remaining
+            self._stop.wait(self.step_pause)
+
+        reclaimed = (free_before - free) * page_size
+        self.reclaimed_bytes += reclaimed
+        return {'reclaimed_bytes': reclaimed, 'free_bytes': free * page_size}
+
+    def run_once(self) -> Dict:
+        """
+        Run every maintenance step, stopping early if the app gets busy
+
+        Returns:
+            Dict: Run report with per-step durations and results
+        """
+        started = time.time()
+        report = {'started': started, 'steps': {}, 'interrupted': False}
+        conn = self.connect()
+        try:
+            for name, step in (('optimize', self.optimize),
+                               ('checkpoint', self.checkpoint),
+                               ('incremental_vacuum', self.incremental_vacuum)):
+                if not self.is_idle():
+                    report['interrupted'] = True
+                    break
+                step_started = time.perf_counter()
+                try:
+                    result = step(conn)
+                except sqlite3.OperationalError as e:
+                    # Locked by a request: leave it for the next run
+                    result = {'error': str(e)}
+                result['seconds'] = time.perf_counter() - step_started
+                report['steps'][name] = result
+        finally:
+            conn.close()
+
+        report['seconds'] = time.time() - started
+        report['reclaimed_bytes'] = report['steps'].get('incremental_vacuum', {}).get('reclaimed_bytes', 0)
+        self.runs += 1
+        self.history.append(report)
+        return report
+
+    def wait_until_idle(self) -> bool:
+        """
+        Block until the app has been idle for idle_for seconds
+
+        Returns:
+            bool: True when idle, False if the scheduler is stopping
+        """
+        poll = min(0.25, self.idle_for) or 0.05
+        quiet_since = None
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if not self.is_idle():
+                quiet_since = None
+            elif quiet_since is None:
+                quiet_since = now
+            elif now - quiet_since >= self.idle_for:
+                return True
+            self._stop.wait(poll)
+        return False
+
+    def start(self) -> threading.Thread:
+        """
+        Run maintenance every interval seconds on a daemon thread
+
+        Returns:
+            threading.Thread: The scheduler thread
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the scheduler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.wait_until_idle():
+                return
+            try:
+                report = self.run_once()
+            except Exception as e:
+                print(f"Database maintenance failed: {e}")
+            else:
+                print(f"Database maintenance run {self.runs}: {summarize_report(report)}")
+
+    def stats(self) -> Dict:
+        """
+        Get totals and the most recent run reports
+
+        Returns:
+            Dict: Run count, total reclaimed bytes and recent reports
+        """
+        return {
+            'runs': self.runs,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'recent': list(self.history)
+        }
+
+    def summary(self) -> Dict:
+        """
+        Get the totals without the run reports (small enough for probes)
+
+        Returns:
+            Dict: Run count, total reclaimed bytes and when the last run started
+        """
+        last = self.history[-1] if self.history else None
+        return {
+            'runs': self.runs,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'last_run': last['started'] if last else None
+        }
+
+
+def enable_incremental_vacuum(db_name: str) -> int:
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL
+
+    SQLite only applies the new mode by rebuilding the file with VACUUM,
+    which locks the database for the whole rebuild, so run this during a
+    maintenance window rather than from the scheduler.
+
+    Args:
+        db_name: SQLite database file
+
+    Returns:
+        int: Bytes saved by the rebuild
+    """
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    try:
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        before = conn.execute('PRAGMA page_count').fetchone()[0]
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        after = conn.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        conn.close()
+    return (before - after) * page_size
+
+
+def format_report(report: Dict) -> List[str]:
+    """
+    Describe a run report one step per line
+
+    Args:
+        report: Report returned by DatabaseMaintenance.run_once
+
+    Returns:
+        List[str]: Human-readable lines
+    """
+    lines = []
+    for name, result in report['steps'].items():
+        details = ', '.join(f'{k}={v}' for k, v in result.items() if k != 'seconds')
+        lines.append(f"{name}: {result['seconds'] * 1000:.1f} ms" + (f" ({details})" if details else ''))
+    if report['interrupted']:
+        lines.append('interrupted: requests arrived, remaining steps postponed')
+    return lines
+
+
+def summarize_report(report: Dict) -> str:
+    """
+    Describe a run report on one line (for the scheduler's log)
+
+    Args:
+        report: Report returned by DatabaseMaintenance.run_once
+
+    Returns:
+        str: Total time, reclaimed bytes and per-step lines joined with '; '
+    """
+    return '; '.join([f"{report['seconds'] * 1000:.1f} ms",
+                      f"reclaimed {report['reclaimed_bytes']} bytes"] + format_report(report))
+
+
+def register_commands(app: Flask, maintenance_factory: Callable[[], DatabaseMaintenance]):
+    """
+    Add the `flask db-maintenance` command to an app
+
+    Args:
+        app: Flask application
+        maintenance_factory: Returns the DatabaseMaintenance to run
+    """
+    @app.cli.command('db-maintenance')
+    @click.option('--enable-incremental-vacuum', 'convert', is_flag=True,
+                  help='Rebuild the database with auto_vacuum=INCREMENTAL first (locks it).')
+    def maintenance_command(convert: bool):
+        """Run SQLite maintenance once and report what it did."""
+        maintenance = maintenance_factory()
+        if convert:
+            saved = enable_incremental_vacuum(maintenance.db_name)
+            click.echo(f"Rebuilt {maintenance.db_name} with incremental vacuum, saved {saved} bytes")
+        report = maintenance.run_once()
+        for line in format_report(report):
+            click.echo(line)
+        click.echo(f"Reclaimed {report['reclaimed_bytes']} bytes in {report['seconds']:.3f}s")
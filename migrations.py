@@ -0,0 +1,450 @@
+"""
+Versioned schema migrations for the projects database
+Schema steps run in short transactions; data backfills run online in small
+committed batches with throttling, so /add-project writes and /projects
+reads keep going while a large table is migrated
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import click
+from flask import Flask
+
+SchemaStep = Callable[[sqlite3.Connection], None]
+BackfillStep = Union[str, Callable[[sqlite3.Connection, int, int], None]]
+
+
+class Backfill:
+    """Rewrites existing rows of a table in id-ordered batches"""
+
+    def __init__(self, table: str, update: BackfillStep):
+        """
+        Define a backfill
+
+        Args:
+            table: Table whose rows are rewritten (must have an integer id key)
+            update: SQL run once per batch with :first and :last bound to the
+                    batch's id range, or a callable(conn, first, last); it must
+                    be idempotent because rows written by the app meanwhile
+                    may be visited again
+
+        Backfills of the projects table also bump each batch's row versions
+        and record an 'update' change for every row, so the fragment cache,
+        API ETags and the change feed pick up the rewritten rows.
+        """
+        self.table = table
+        self.update = update
+
+    def apply(self, conn: sqlite3.Connection, first: int, last: int):
+        if callable(self.update):
+            self.update(conn, first, last)
+        else:
+            conn.execute(self.update, {'first': first, 'last': last})
+        if self.table == 'projects':
+            conn.execute('UPDATE projects SET version = version + 1 WHERE id BETWEEN ? AND ?',
+                         (first, last))
+            conn.execute("INSERT INTO project_changes (project_id, action) "
+                         "SELECT id, 'update' FROM projects WHERE id BETWEEN ? AND ? ORDER BY id",
+                         (first, last))
+
+
+class Migration:
+    """One schema version: a quick schema step and an optional online backfill"""
+
+    def __init__(self, version: int, name: str, schema: SchemaStep = None,
+                 backfill: Optional[Backfill] = None, offline: bool = False):
+        """
+        Define a migration
+
+        Args:
+            version: Unique, increasing version number
+            name: Short description
+            schema: Called with a connection inside the schema transaction;
+                    keep it to metadata-only changes (CREATE TABLE, ADD COLUMN)
+            backfill: Data rewrite run after the schema step, batch by batch
+            offline: The schema step reads or rewrites a whole table under
+                     the write lock (e.g. CREATE INDEX), so it is skipped at
+                     startup and only applied by `flask db-migrate --offline`
+                     in a maintenance window
+        """
+        self.version = version
+        self.name = name
+        self.schema = schema
+        self.backfill = backfill
+        self.offline = offline
+
+
+def column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    """
+    Get the columns of a table
+
+    Args:
+        conn: Open connection
+        table: Table name
+
+    Returns:
+        List[str]: Column names in table order
+    """
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _create_projects(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            image_filename TEXT NOT NULL,
+            category TEXT,
+            technologies TEXT,
+            project_url TEXT,
+            duration TEXT,
+            role TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _add_project_version(conn: sqlite3.Connection):
+    # ADD COLUMN with a constant default only rewrites the schema, not the rows
+    if 'version' not in column_names(conn, 'projects'):
+        conn.execute('ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+
+def _create_project_changes(conn: sqlite3.Connection):
+    # Append-only change feed: one row per write, seq is monotonic
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS project_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            changed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _index_projects_created_date(conn: sqlite3.Connection):
+    # Lets newest-first listings with a LIMIT stop after the first rows.
+    # Building it scans the table while holding the write lock, hence offline
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_projects_created_date ON projects (created_date)')
+
+
+# The schema history of projects.db. Steps are idempotent so databases
+# created before migrations were tracked are adopted without changes.
+MIGRATIONS = [
+    Migration(1, 'create projects table', _create_projects),
+    Migration(2, 'add projects.version for row versions', _add_project_version),
+    Migration(3, 'create project_changes feed', _create_project_changes),
+    Migration(4, 'index projects by created_date', _index_projects_created_date, offline=True),
+]
+
+
+class MigrationRunner:
+    """Applies pending migrations and runs their backfills online"""
+
+    def __init__(self, db_name: str, migrations: List[Migration] = None,
+                 batch_size: int = 500, duty_cycle: float = 0.5,
+                 busy_timeout: float = 0.25, schema_timeout: float = 5.0,
+                 progress: Callable[[Dict], None] = None, offline: bool = False):
+        """
+        Initialize the runner
+
+        Args:
+            db_name: SQLite database file
+            migrations: Migrations in version order (default MIGRATIONS)
+            batch_size: Rows rewritten per backfill transaction
+            duty_cycle: Largest share of wall time a backfill may hold the
+                        write lock; after a batch taking t seconds it sleeps
+                        t * (1 / duty_cycle - 1) seconds
+            busy_timeout: Seconds a batch waits for the write lock before
+                          backing off and retrying
+            schema_timeout: Seconds schema steps and status reads wait for a
+                            lock, e.g. while another process migrates at startup
+            progress: Called with a status dict after every backfill batch
+            offline: Also apply offline migrations (run from a maintenance
+                     window, never at app startup)
+        """
+        self.db_name = db_name
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS,
+                                 key=lambda m: m.version)
+        self.batch_size = batch_size
+        self.duty_cycle = duty_cycle
+        self.busy_timeout = busy_timeout
+        self.schema_timeout = schema_timeout
+        self.progress = progress
+        self.offline = offline
+        self._thread = None
+
+    def connect(self, timeout: float = None) -> sqlite3.Connection:
+        """
+        Open a connection with explicit transaction control
+
+        Args:
+            timeout: Seconds to wait for locks (default schema_timeout)
+
+        Returns:
+            sqlite3.Connection: Autocommit connection (transactions via BEGIN)
+        """
+        timeout = self.schema_timeout if timeout is None else timeout
+        conn = sqlite3.connect(self.db_name, timeout=timeout, isolation_level=None)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                backfill_last_id INTEGER,
+                backfilled_date TIMESTAMP
+            )
+        ''')
+        return conn
+
+    def status(self) -> List[Dict]:
+        """
+        Describe every known migration
+
+        Returns:
+            List[Dict]: version, name, applied, offline and backfill state per migration
+        """
+        conn = self.connect()
+        try:
+            rows = {row[0]: row for row in conn.execute(
+                'SELECT version, applied_date, backfill_last_id, backfilled_date FROM schema_migrations')}
+        finally:
+            conn.close()
+        result = []
+        for migration in self.migrations:
+            row = rows.get(migration.version)
+            result.append({
+                'version': migration.version,
+                'name': migration.name,
+                'applied': row is not None,
+                'offline': migration.offline,
+                'backfill': None if migration.backfill is None else
+                            ('done' if row is not None and row[3] else
+                             'pending' if row is None or row[2] is None else f'at id {row[2]}')
+            })
+        return result
+
+    def apply_schema(self) -> List[int]:
+        """
+        Run the schema step of every unapplied migration
+
+        Each migration commits on its own, together with its version row,
+        so a failure leaves earlier migrations applied. The version is
+        checked again once the write lock is held, so processes starting
+        together on the same file apply each migration exactly once.
+        Offline migrations are skipped unless the runner is offline.
+
+        Returns:
+            List[int]: Versions applied
+        """
+        applied = []
+        conn = self.connect()
+        try:
+            done = {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+            for migration in self.migrations:
+                if migration.version in done or (migration.offline and not self.offline):
+                    continue
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if conn.execute('SELECT 1 FROM schema_migrations WHERE version = ?',
+                                    (migration.version,)).fetchone():
+                        # Another process applied it while we waited for the lock
+                        conn.execute('COMMIT')
+                        continue
+                    if migration.schema is not None:
+                        migration.schema(conn)
+                    conn.execute('INSERT INTO schema_migrations (version, name, backfilled_date) '
+                                 'VALUES (?, ?, CASE WHEN ? THEN NULL ELSE CURRENT_TIMESTAMP END)',
+                                 (migration.version, migration.name, migration.backfill is not None))
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+                applied.append(migration.version)
+        finally:
+            conn.close()
+        return applied
+
+    def pending_backfills(self) -> List[Migration]:
+        """
+        Get applied migrations whose backfill has not finished
+
+        Returns:
+            List[Migration]: Migrations in version order
+        """
+        conn = self.connect()
+        try:
+            unfinished = {row[0] for row in conn.execute(
+                'SELECT version FROM schema_migrations WHERE backfilled_date IS NULL')}
+        finally:
+            conn.close()
+        return [m for m in self.migrations if m.version in unfinished and m.backfill is not None]
+
+    def run_backfill(self, migration: Migration, stop: threading.Event = None) -> Dict:
+        """
+        Rewrite a migration's rows in small committed batches
+
+        Progress (the last id processed) is committed with each batch, so an
+        interrupted backfill resumes where it stopped. Rows inserted while it
+        runs are picked up because it only finishes once no ids remain.
+
+        Args:
+            migration: Migration with a backfill
+            stop: Event that pauses the backfill between batches
+
+        Returns:
+            Dict: Rows and batches processed, retries and elapsed seconds
+        """
+        backfill = migration.backfill
+        stop = stop or threading.Event()
+        started = time.perf_counter()
+        stats = {'version': migration.version, 'rows': 0, 'batches': 0, 'retries': 0, 'done': False}
+        conn = self.connect(self.busy_timeout)
+        try:
+            row = conn.execute('SELECT backfill_last_id FROM schema_migrations WHERE version = ?',
+                               (migration.version,)).fetchone()
+            last_id = row[0] or 0
+            while not stop.is_set():
+                batch_started = time.perf_counter()
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                except sqlite3.OperationalError:
+                    # The app is writing: give it the lock and try again
+                    stats['retries'] += 1
+                    stop.wait(self.busy_timeout)
+                    continue
+                try:
+                    ids = [r[0] for r in conn.execute(
+                        f'SELECT id FROM {backfill.table} WHERE id > ? ORDER BY id LIMIT ?',
+                        (last_id, self.batch_size))]
+                    if ids:
+                        backfill.apply(conn, ids[0], ids[-1])
+                        last_id = ids[-1]
+                        conn.execute('UPDATE schema_migrations SET backfill_last_id = ? WHERE version = ?',
+                                     (last_id, migration.version))
+                    else:
+                        conn.execute('UPDATE schema_migrations SET backfilled_date = CURRENT_TIMESTAMP '
+                                     'WHERE version = ?', (migration.version,))
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+                if not ids:
+                    stats['done'] = True
+                    break
+
+                stats['rows'] += len(ids)
+                stats['batches'] += 1
+                elapsed = time.perf_counter() - batch_started
+                if self.progress is not None:
+                    self.progress(dict(stats, last_id=last_id, batch_seconds=elapsed))
+                stop.wait(elapsed * (1.0 / self.duty_cycle - 1.0))
+        finally:
+            conn.close()
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def migrate(self, background: bool = False) -> List[int]:
+        """
+        Apply pending schema steps, then run pending backfills
+
+        Args:
+            background: Run the backfills on a daemon thread and return
+                        as soon as the schema is up to date
+
+        Returns:
+            List[int]: Versions whose schema step was applied
+        """
+        applied = self.apply_schema()
+        pending = self.pending_backfills()
+        if pending and background:
+            self.start_backfills(pending)
+        else:
+            for migration in pending:
+                self.run_backfill(migration)
+        return applied
+
+    def start_backfills(self, migrations: List[Migration] = None) -> threading.Thread:
+        """
+        Run backfills on a daemon thread
+
+        Args:
+            migrations: Backfills to run (default: all pending)
+
+        Returns:
+            threading.Thread: The backfill thread
+        """
+        pending = migrations if migrations is not None else self.pending_backfills()
+
+        def run():
+            for migration in pending:
+                try:
+                    self.run_backfill(migration)
+                except Exception as e:
+                    print(f"Backfill for migration {migration.version} failed: {e}")
+                    return
+
+        self._thread = threading.Thread(target=run, name='db-backfill', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for background backfills to finish
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if no backfill thread is still running
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+
+def register_commands(app: Flask, runner_factory: Callable[..., MigrationRunner]):
+    """
+    Add the `flask db-migrate` command to an app
+
+    Args:
+        app: Flask application
+        runner_factory: Called with batch_size, duty_cycle, progress and
+                        offline, returns a MigrationRunner
+    """
+    @app.cli.command('db-migrate')
+    @click.option('--status', 'show_status', is_flag=True, help='Only list migrations and their state.')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per backfill transaction.')
+    @click.option('--duty-cycle', default=0.5, show_default=True,
+                  help='Largest share of time a backfill may hold the write lock.')
+    @click.option('--offline', is_flag=True,
+                  help='Also apply migrations that lock whole tables (run in a maintenance window).')
+    def migrate_command(show_status: bool, batch_size: int, duty_cycle: float, offline: bool):
+        """Apply pending schema migrations and run their backfills."""
+        def report(progress: Dict):
+            click.echo(f"  migration {progress['version']}: {progress['rows']} rows "
+                       f"(last id {progress['last_id']}, {progress['batch_seconds'] * 1000:.1f} ms/batch)")
+
+        runner = runner_factory(batch_size=batch_size, duty_cycle=duty_cycle, progress=report,
+                                offline=offline)
+        if not show_status:
+            applied = runner.apply_schema()
+            for version in applied:
+                click.echo(f"Applied migration {version}")
+            for migration in runner.pending_backfills():
+                click.echo(f"Backfilling migration {migration.version} ({migration.name})")
+                stats = runner.run_backfill(migration)
+                click.echo(f"Backfilled {stats['rows']} rows in {stats['batches']} batches, "
+                           f"{stats['seconds']:.2f}s")
+        for entry in runner.status():
+            state = 'applied' if entry['applied'] else 'pending'
+            if entry['offline'] and not entry['applied']:
+                state += ', needs --offline'
+            if entry['backfill']:
+                state += f", backfill {entry['backfill']}"
+            click.echo(f"{entry['version']:>4}  {entry['name']}  [{state}]")
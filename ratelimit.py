@@ -0,0 +1,362 @@
+"""
+Token-bucket rate limiting for the Flask Portfolio Website
+Throttles write endpoints per client IP and globally
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+
+class Bucket:
+    """Token bucket parameters: refill rate and burst capacity"""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize a bucket definition
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (the allowed burst)
+        """
+        self.rate = float(rate)
+        self.capacity = capacity
+
+    @property
+    def idle_ttl(self) -> float:
+        """Seconds after which an untouched bucket is full again and can be dropped"""
+        return self.capacity / self.rate
+
+    def refill(self, tokens: float, updated: float, now: float) -> float:
+        """
+        Compute the tokens available now from a stored state
+
+        Args:
+            tokens: Tokens at the last update
+            updated: Timestamp of the last update
+            now: Current timestamp
+
+        Returns:
+            float: Tokens available now (capped at capacity)
+        """
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def retry_after(self, tokens: float, cost: int = 1) -> float:
+        """
+        Seconds until enough tokens are available for a request
+
+        Args:
+            tokens: Tokens currently available
+            cost: Tokens the request needs
+
+        Returns:
+            float: Seconds to wait (0 if the request can go now)
+        """
+        return max(0.0, (cost - tokens) / self.rate)
+
+
+class MemoryStore:
+    """
+    In-process bucket store for single-process deployments
+
+    Buckets live in an OrderedDict kept in least-recently-used order, so
+    each call is O(1): the touched key moves to the end and a bounded
+    number of expired buckets are evicted from the front.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the store
+
+        Args:
+            clock: Time source (overridable for tests)
+        """
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, bucket: Bucket, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Try to take tokens from a bucket
+
+        Args:
+            key: Bucket key (e.g. 'ip:1.2.3.4')
+            bucket: Bucket definition
+            cost: Tokens to take
+
+        Returns:
+            Tuple[bool, float]: (allowed, tokens remaining)
+        """
+        with self._lock:
+            now = self.clock()
+            state = self._buckets.get(key)
+            if state is None:
+                tokens = float(bucket.capacity)
+            else:
+                tokens = bucket.refill(state[0], state[1], now)
+                self._buckets.move_to_end(key)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, now + bucket.idle_ttl)
+            self._evict(now)
+            return allowed, tokens
+
+    def refund(self, key: str, bucket: Bucket, cost: int = 1):
+        """
+        Give back tokens taken by a request that was not served
+
+        Args:
+            key: Bucket key
+            bucket: Bucket definition
+            cost: Tokens to return (capped at capacity)
+        """
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                return
+            now = self.clock()
+            tokens = min(bucket.capacity, bucket.refill(state[0], state[1], now) + cost)
+            self._buckets[key] = (tokens, now, now + bucket.idle_ttl)
+
+    def _evict(self, now: float, max_evictions: int = 2):
+        """Drop up to max_evictions expired buckets from the LRU end"""
+        for _ in range(max_evictions):
+            if not self._buckets:
+                return
+            key, state = next(iter(self._buckets.items()))
+            if state[2] > now:
+                return
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def reset(self):
+        """Forget every bucket"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteStore:
+    """
+    SQLite-backed bucket store shared by multiple worker processes
+
+    Each consume runs in a single BEGIN IMMEDIATE transaction so concurrent
+    workers serialize on the bucket update instead of racing. Every
+    purge_interval seconds a consume also deletes a bounded batch of expired
+    buckets, so the table tracks active clients rather than every IP seen.
+    """
+
+    def __init__(self, db_name: str = 'ratelimit.db', clock: Callable[[], float] = time.time,
+                 purge_interval: float = 60.0, purge_limit: int = 500):
+        """
+        Initialize the store and create its table
+
+        Args:
+            db_name: Path of the SQLite database file
+            clock: Time source (wall clock so all workers agree)
+            purge_interval: Seconds between purges of expired buckets
+            purge_limit: Most buckets deleted by one purge
+        """
+        self.db_name = db_name
+        self.clock = clock
+        self.purge_interval = purge_interval
+        self.purge_limit = purge_limit
+        self._next_purge = clock() + purge_interval
+        self._local = threading.local()
+        conn = self.get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                expires REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_limits_expires ON rate_limits(expires)')
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, bucket: Bucket, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Try to take tokens from a bucket
+
+        Args:
+            key: Bucket key (e.g. 'ip:1.2.3.4')
+            bucket: Bucket definition
+            cost: Tokens to take
+
+        Returns:
+            Tuple[bool, float]: (allowed, tokens remaining)
+        """
+        conn = self.get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = self.clock()
+            row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE key = ?',
+                               (key,)).fetchone()
+            tokens = float(bucket.capacity) if row is None else bucket.refill(row[0], row[1], now)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute('''
+                INSERT INTO rate_limits (key, tokens, updated, expires) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    tokens = excluded.tokens,
+                    updated = excluded.updated,
+                    expires = excluded.expires
+            ''', (key, tokens, now, now + bucket.idle_ttl))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            self.purge_expired(limit=self.purge_limit)
+        return allowed, tokens
+
+    def refund(self, key: str, bucket: Bucket, cost: int = 1):
+        """
+        Give back tokens taken by a request that was not served
+
+        Args:
+            key: Bucket key
+            bucket: Bucket definition
+            cost: Tokens to return (capped at capacity)
+        """
+        now = self.clock()
+        self.get_connection().execute('''
+            UPDATE rate_limits SET
+                tokens = MIN(?, tokens + (? - updated) * ? + ?),
+                updated = ?,
+                expires = ?
+            WHERE key = ?
+        ''', (bucket.capacity, now, bucket.rate, cost, now, now + bucket.idle_ttl, key))
+
+    def purge_expired(self, limit: int = None) -> int:
+        """
+        Delete buckets that have been idle long enough to be full again
+
+        Args:
+            limit: Most buckets to delete (None = all expired)
+
+        Returns:
+            int: Number of buckets removed
+        """
+        cursor = self.get_connection().execute(
+            'DELETE FROM rate_limits WHERE key IN '
+            '(SELECT key FROM rate_limits WHERE expires <= ? LIMIT ?)',
+            (self.clock(), -1 if limit is None else limit))
+        return cursor.rowcount
+
+    def reset(self):
+        """Forget every bucket"""
+        self.get_connection().execute('DELETE FROM rate_limits')
+
+
+class RateLimiter:
+    """Applies per-IP and global token buckets to selected Flask endpoints"""
+
+    def __init__(self, store, per_ip: Bucket, global_bucket: Bucket,
+                 endpoints: Iterable[str], methods: Iterable[str] = ('POST',)):
+        """
+        Initialize the rate limiter
+
+        Args:
+            store: MemoryStore or SQLiteStore holding bucket state
+            per_ip: Bucket applied to each client IP
+            global_bucket: Bucket shared by all clients
+            endpoints: Flask endpoint names to throttle
+            methods: HTTP methods to throttle on those endpoints
+        """
+        self.store = store
+        self.per_ip = per_ip
+        self.global_bucket = global_bucket
+        self.endpoints = frozenset(endpoints)
+        self.methods = frozenset(m.upper() for m in methods)
+
+    def init_app(self, app: Flask):
+        """
+        Register the limiter's request hooks on an app
+
+        Args:
+            app: Flask application
+        """
+        app.before_request(self.check_request)
+        app.after_request(self.add_headers)
+
+    def hit(self, client_ip: str) -> Dict:
+        """
+        Charge one request to a client's bucket and the global bucket
+
+        The global bucket is only charged once the per-IP bucket allows
+        the request, so one flooding client cannot drain it for everyone.
+        If the global bucket then refuses, the per-IP token is refunded, so
+        clients are not charged for requests that were never served.
+
+        Args:
+            client_ip: Client address
+
+        Returns:
+            Dict: allowed flag, limit, remaining tokens and reset/retry seconds
+        """
+        allowed, tokens = self.store.consume('ip:' + client_ip, self.per_ip)
+        bucket = self.per_ip
+        if allowed:
+            global_allowed, global_tokens = self.store.consume('global', self.global_bucket)
+            if not global_allowed:
+                self.store.refund('ip:' + client_ip, self.per_ip)
+                allowed, tokens, bucket = False, global_tokens, self.global_bucket
+
+        return {
+            'allowed': allowed,
+            'limit': bucket.capacity,
+            'remaining': int(tokens),
+            'reset': int(bucket.retry_after(tokens, bucket.capacity) + 0.999),
+            'retry_after': max(1, int(bucket.retry_after(tokens) + 0.999))
+        }
+
+    def check_request(self) -> Optional[Response]:
+        """before_request hook: reject throttled requests with 429"""
+        if request.endpoint not in self.endpoints or request.method not in self.methods:
+            return None
+
+        result = self.hit(request.remote_addr or 'unknown')
+        g.rate_limit = result
+        if result['allowed']:
+            return None
+
+        response = Response('Too many requests, please slow down.\n', status=429,
+                            mimetype='text/plain')
+        response.headers['Retry-After'] = str(result['retry_after'])
+        return response
+
+    def add_headers(self, response: Response) -> Response:
+        """after_request hook: attach RateLimit-* headers to throttled endpoints"""
+        result = g.get('rate_limit')
+        if result is not None:
+            response.headers['RateLimit-Limit'] = str(result['limit'])
+            response.headers['RateLimit-Remaining'] = str(result['remaining'])
+            response.headers['RateLimit-Reset'] = str(result['reset'])
+        return response
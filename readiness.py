@@ -0,0 +1,189 @@
+"""
+Startup warmup and readiness for the Flask app
+A warmup runs named steps (compile templates, open the database, render the
+pages) at startup; /readyz only reports ready after they all succeed, so a
+rolling restart sends no traffic to a cold process. A failed warmup is
+retried with backoff, so a transient error does not leave the process
+unready for good
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from flask import Flask
+
+
+class Warmup:
+    """Runs warmup steps until they succeed and tracks whether the app is ready"""
+
+    def __init__(self, steps: Iterable[Tuple[str, Callable[[], Any]]] = (),
+                 retry_delay: float = 1.0, max_retry_delay: float = 60.0):
+        """
+        Initialize the warmup
+
+        Args:
+            steps: (name, callable) pairs run in order; a step's return value
+                   is kept in the report (e.g. how many items it primed)
+            retry_delay: Seconds before a failed background warmup is retried;
+                         doubled after each further failure
+            max_retry_delay: Longest wait between retries
+        """
+        self.steps = list(steps)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.state = 'pending'
+        self.report = {}
+        self.seconds = None
+        self.attempts = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_step(self, name: str, func: Callable[[], Any]):
+        """
+        Add a step to the end of the warmup
+
+        Args:
+            name: Step name shown in /readyz
+            func: Callable that primes something; raising marks the app not ready
+        """
+        self.steps.append((name, func))
+
+    @property
+    def ready(self) -> bool:
+        return self.state == 'ready'
+
+    def run(self) -> Dict:
+        """
+        Run every step, stopping at the first failure
+
+        Returns:
+            Dict: Status with per-step seconds and results
+        """
+        with self._lock:
+            if self.state == 'warming':
+                return self.status()
+            self.state = 'warming'
+            self.report = {}
+            self.attempts += 1
+
+        started = time.perf_counter()
+        state = 'ready'
+        for name, func in self.steps:
+            step_started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                self.report[name] = {'seconds': round(time.perf_counter() - step_started, 4),
+                                     'error': str(e)}
+                state = 'failed'
+                break
+            self.report[name] = {'seconds': round(time.perf_counter() - step_started, 4),
+                                 'result': result}
+        self.seconds = round(time.perf_counter() - started, 4)
+        self.state = state
+        return self.status()
+
+    def start(self) -> threading.Thread:
+        """
+        Run the warmup on a daemon thread so the server can start listening
+
+        A failed run is retried after retry_delay seconds, doubling up to
+        max_retry_delay, until it succeeds or stop() is called.
+
+        Returns:
+            threading.Thread: The warmup thread
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_until_ready, name='warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop retrying a failed background warmup"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run_until_ready(self):
+        delay = self.retry_delay
+        while not self._stop.is_set():
+            status = self.run()
+            if status['status'] != 'failed':
+                return
+            errors = '; '.join(f"{name}: {step['error']}" for name, step in status['steps'].items()
+                               if 'error' in step)
+            print(f"Warmup attempt {self.attempts} failed ({errors}), retrying in {delay:g}s")
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for a started warmup to finish
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the app is ready
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def skip(self):
+        """Report ready without warming up (warmup disabled)"""
+        self.state = 'ready'
+
+    def status(self) -> Dict:
+        """
+        Get the readiness status
+
+        Returns:
+            Dict: state, attempts so far, total seconds and the per-step
+                  report of the latest attempt
+        """
+        return {'status': self.state, 'attempts': self.attempts, 'seconds': self.seconds,
+                'steps': dict(self.report)}
+
+
+def compile_templates(app: Flask) -> int:
+    """
+    Load every template so Jinja compiles and caches it
+
+    Args:
+        app: Flask application
+
+    Returns:
+        int: Number of templates compiled
+    """
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def request_pages(app: Flask, urls: Iterable[str]) -> int:
+    """
+    GET pages through the full app so every cache on their path is filled
+
+    Args:
+        app: Flask application
+        urls: URL paths to request
+
+    Returns:
+        int: Number of pages requested
+
+    Raises:
+        RuntimeError: If a page does not answer 200
+    """
+    count = 0
+    with app.test_client() as client:
+        for url in urls:
+            response = client.get(url)
+            response.close()
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} answered {response.status_code}")
+            count += 1
+    return count
@@ -0,0 +1,430 @@
+"""
+Multi-portfolio storage with one SQLite file per portfolio
+A router maps each portfolio to its shard file, a bounded LRU keeps the
+busiest shards open, and listing queries fan out across shards in parallel
+"""
+
+import functools
+import hashlib
+import heapq
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from DAL import DAL
+
+# Portfolio names become file names, so keep them to a safe alphabet
+PORTFOLIO_NAME = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+
+class ShardRouter:
+    """Maps portfolio names to shard files"""
+
+    def __init__(self, root_dir: str, fanout: int = 256):
+        """
+        Initialize the router
+
+        Args:
+            root_dir: Directory holding the shards
+            fanout: Number of subdirectories shards are spread over, so no
+                    directory holds thousands of files
+        """
+        self.root_dir = root_dir
+        self.fanout = fanout
+
+    def path_for(self, portfolio: str) -> str:
+        """
+        Get the shard file of a portfolio
+
+        Args:
+            portfolio: Portfolio name (lowercase letters, digits, - and _)
+
+        Returns:
+            str: Path of the portfolio's SQLite file
+
+        Raises:
+            ValueError: If the name is not a valid portfolio name
+        """
+        if not PORTFOLIO_NAME.match(portfolio):
+            raise ValueError(f"Invalid portfolio name: {portfolio!r}")
+        bucket = int(hashlib.sha1(portfolio.encode()).hexdigest()[:8], 16) % self.fanout
+        return os.path.join(self.root_dir, f'{bucket:03d}', f'{portfolio}.db')
+
+    def exists(self, portfolio: str) -> bool:
+        """
+        Check whether a portfolio has a shard
+
+        Args:
+            portfolio: Portfolio name
+
+        Returns:
+            bool: True if the shard file exists
+        """
+        return os.path.exists(self.path_for(portfolio))
+
+    def portfolios(self) -> List[str]:
+        """
+        List every portfolio with a shard
+
+        Returns:
+            List[str]: Portfolio names, sorted
+        """
+        names = []
+        if not os.path.isdir(self.root_dir):
+            return names
+        for bucket in os.scandir(self.root_dir):
+            if bucket.is_dir():
+                names.extend(entry.name[:-3] for entry in os.scandir(bucket.path)
+                             if entry.name.endswith('.db'))
+        return sorted(names)
+
+
+class ShardConnection(sqlite3.Connection):
+    """
+    Long-lived connection to one shard
+
+    DAL methods open a connection, use it and close it; for a shard that
+    close() hands the connection back (rolling back anything uncommitted)
+    and shutdown() really closes it. The lock gives one thread at a time
+    the connection, which matches SQLite's single writer per file; owner
+    records which thread has it, so a failed call can hand it back.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.owner = None
+
+    def borrow(self):
+        """Wait for the connection and take it for the current thread"""
+        self.lock.acquire()
+        self.owner = threading.get_ident()
+
+    def close(self):
+        self.owner = None
+        try:
+            if self.in_transaction:
+                self.rollback()
+        finally:
+            self.lock.release()
+
+    def shutdown(self):
+        """Close the connection once no thread is using it"""
+        with self.lock:
+            super().close()
+
+
+def release_on_error(method: Callable) -> Callable:
+    """
+    Wrap a DAL method so a failure cannot keep the shard connection borrowed
+
+    DAL methods only hand their connection back on success; if a statement
+    raises, the wrapper rolls back and releases it so other threads (and
+    later calls from this one) are not locked out of the shard.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except BaseException:
+            conn = getattr(self._borrowed, 'conn', None)
+            if conn is not None and conn.owner == threading.get_ident():
+                conn.close()
+            raise
+    return wrapper
+
+
+class ShardDAL(DAL):
+    """DAL for one portfolio, reusing a single open connection"""
+
+    def __init__(self, db_name: str, portfolio: str = None, migrate: bool = True):
+        """
+        Open (creating if needed) a portfolio's shard
+
+        Args:
+            db_name: Shard file
+            portfolio: Portfolio name, used in listener callbacks
+            migrate: Create and migrate the schema; False when this process
+                     already did so for the shard
+        """
+        self.portfolio = portfolio
+        self.migrate = migrate
+        self._conn = None
+        self._closed = False
+        self._open_lock = threading.Lock()
+        self._borrowed = threading.local()
+        os.makedirs(os.path.dirname(db_name) or '.', exist_ok=True)
+        super().__init__(db_name=db_name)
+
+    @release_on_error
+    def init_database(self):
+        """Initialize the shard unless it is already up to date"""
+        if self.migrate:
+            super().init_database()
+
+    add_project = release_on_error(DAL.add_project)
+    get_all_projects = release_on_error(DAL.get_all_projects)
+    get_project_by_id = release_on_error(DAL.get_project_by_id)
+    get_projects_page = release_on_error(DAL.get_projects_page)
+    get_projects_by_ids = release_on_error(DAL.get_projects_by_ids)
+    update_project = release_on_error(DAL.update_project)
+    delete_project = release_on_error(DAL.delete_project)
+    get_changes_since = release_on_error(DAL.get_changes_since)
+    get_latest_change_seq = release_on_error(DAL.get_latest_change_seq)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Borrow the shard's connection
+
+        After close() (eviction from the LRU) a plain per-call connection
+        is returned instead, so stale references keep working.
+
+        Returns:
+            sqlite3.Connection: Connection to hand back with close()
+        """
+        if self._closed:
+            return super().get_connection()
+        with self._open_lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_name, factory=ShardConnection,
+                                             check_same_thread=False)
+                self._conn.row_factory = sqlite3.Row
+            conn = self._conn
+        conn.borrow()
+        if self._closed:
+            # Evicted while waiting for the connection
+            conn.owner = None
+            conn.lock.release()
+            return super().get_connection()
+        self._borrowed.conn = conn
+        return conn
+
+    def close(self):
+        """Close the shard's connection"""
+        with self._open_lock:
+            self._closed = True
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.shutdown()
+
+
+class ShardReader(DAL):
+    """Read-only DAL over an existing shard for one-off cross-shard queries"""
+
+    def __init__(self, db_name: str):
+        """
+        Wrap a shard without opening or migrating it
+
+        Args:
+            db_name: Shard file
+        """
+        self.db_name = db_name
+        self.listeners = []
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection
+
+        Returns:
+            sqlite3.Connection: Connection that cannot write or create the file
+        """
+        conn = sqlite3.connect(f'file:{self.db_name}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+class ShardedDAL:
+    """Tenant-aware DAL: one shard per portfolio behind a bounded LRU"""
+
+    def __init__(self, root_dir: str, max_open: int = 128, max_workers: int = 8):
+        """
+        Initialize the sharded DAL
+
+        Args:
+            root_dir: Directory holding the shards
+            max_open: Most shard connections kept open at once
+            max_workers: Threads used for cross-shard queries
+        """
+        self.router = ShardRouter(root_dir)
+        self.max_open = max_open
+        self.max_workers = max_workers
+        self.listeners = []
+        self._open = OrderedDict()
+        self._migrated = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def add_listener(self, callback: Callable[[str, str, int], None]):
+        """
+        Register a callback to run after every successful write to any shard
+
+        Args:
+            callback: Called as callback(portfolio, action, project_id)
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, portfolio: str, action: str, project_id: int):
+        for callback in self.listeners:
+            callback(portfolio, action, project_id)
+
+    def portfolio(self, name: str, create: bool = True) -> ShardDAL:
+        """
+        Get the DAL of one portfolio
+
+        Args:
+            name: Portfolio name
+            create: Create the shard if the portfolio is new
+
+        Returns:
+            ShardDAL: DAL bound to the portfolio's shard
+
+        Raises:
+            KeyError: If the portfolio has no shard and create is False
+            ValueError: If the name is not a valid portfolio name
+        """
+        with self._lock:
+            dal = self._open.get(name)
+            if dal is not None:
+                self._open.move_to_end(name)
+                self._stats['hits'] += 1
+                return dal
+            self._stats['misses'] += 1
+            migrate = name not in self._migrated
+
+        path = self.router.path_for(name)
+        if not create and not os.path.exists(path):
+            raise KeyError(name)
+        # Migrations run outside the LRU lock until one open has finished
+        # them; threads opening a new shard together may both migrate,
+        # which the runner makes safe
+        dal = ShardDAL(path, portfolio=name, migrate=migrate)
+        dal.add_listener(lambda action, project_id: self._notify(name, action, project_id))
+
+        evicted = []
+        with self._lock:
+            self._migrated.add(name)
+            existing = self._open.get(name)
+            if existing is not None:
+                # Another thread opened it meanwhile; keep theirs
+                evicted.append(dal)
+                dal = existing
+            else:
+                self._open[name] = dal
+            while len(self._open) > self.max_open:
+                evicted.append(self._open.popitem(last=False)[1])
+                self._stats['evictions'] += 1
+        for stale in evicted:
+            stale.close()
+        return dal
+
+    def portfolios(self) -> List[str]:
+        """
+        List every portfolio
+
+        Returns:
+            List[str]: Portfolio names, sorted
+        """
+        return self.router.portfolios()
+
+    def map(self, func: Callable[[DAL], Any], portfolios: Iterable[str] = None) -> Dict[str, Any]:
+        """
+        Run a read across shards in parallel
+
+        Open shards are used as they are; other shards are read through a
+        short-lived read-only connection so a fan-out query does not flush
+        the busy portfolios out of the LRU.
+
+        Args:
+            func: Called with each portfolio's DAL
+            portfolios: Portfolios to query (default: all)
+
+        Returns:
+            Dict[str, Any]: func's result per portfolio
+        """
+        names = list(portfolios) if portfolios is not None else self.portfolios()
+
+        def run(name: str):
+            with self._lock:
+                dal = self._open.get(name)
+            return func(dal if dal is not None else ShardReader(self.router.path_for(name)))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='shard') as executor:
+            return dict(zip(names, executor.map(run, names)))
+
+    def get_all_projects(self, portfolios: Iterable[str] = None) -> List[Dict]:
+        """
+        Get the projects of many portfolios, newest first
+
+        Args:
+            portfolios: Portfolios to include (default: all)
+
+        Returns:
+            List[Dict]: Projects with a 'portfolio' key added
+        """
+        return self.get_recent_projects(None, portfolios)
+
+    def get_recent_projects(self, limit: Optional[int] = 50,
+                            portfolios: Iterable[str] = None) -> List[Dict]:
+        """
+        Get the newest projects across portfolios
+
+        Each shard returns only its newest `limit` projects, already sorted,
+        so the results are merged rather than re-sorted.
+
+        Args:
+            limit: Maximum number of projects (None = all)
+            portfolios: Portfolios to include (default: all)
+
+        Returns:
+            List[Dict]: Projects ordered by created_date descending, with a
+                        'portfolio' key added
+        """
+        streams = []
+        for name, projects in self.map(lambda dal: dal.get_all_projects(limit), portfolios).items():
+            for project in projects:
+                project['portfolio'] = name
+            streams.append(projects)
+        merged = heapq.merge(*streams, key=lambda p: p['created_date'] or '', reverse=True)
+        return list(islice(merged, limit))
+
+    def count_projects(self, portfolios: Iterable[str] = None) -> Dict[str, int]:
+        """
+        Count projects per portfolio
+
+        Args:
+            portfolios: Portfolios to count (default: all)
+
+        Returns:
+            Dict[str, int]: Number of projects per portfolio
+        """
+        def count(dal: DAL) -> int:
+            conn = dal.get_connection()
+            try:
+                return conn.execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+            finally:
+                conn.close()
+
+        return self.map(count, portfolios)
+
+    def stats(self) -> Dict:
+        """
+        Get LRU statistics
+
+        Returns:
+            Dict: open shards, hits, misses and evictions
+        """
+        with self._lock:
+            return dict(self._stats, open=len(self._open))
+
+    def close(self):
+        """Close every open shard"""
+        with self._lock:
+            open_shards = list(self._open.values())
+            self._open.clear()
+        for dal in open_shards:
+            dal.close()
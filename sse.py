@@ -0,0 +1,323 @@
+"""
+Server-Sent Events for live project updates
+An asyncio hub tails the DAL change feed and fans events out to every
+subscriber, so idle connections cost a queue each instead of a worker thread
+"""
+
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from DAL import AsyncDAL
+
+STREAM_PATH = '/projects/stream'
+
+
+def format_event(event: Dict) -> bytes:
+    """
+    Encode a change as an SSE message
+
+    Args:
+        event: Change with 'seq', 'action', 'project_id' and 'project'
+
+    Returns:
+        bytes: 'id:', 'event:' and 'data:' lines terminated by a blank line
+    """
+    data = json.dumps(event, separators=(',', ':'), default=str)
+    return f"id: {event['seq']}\nevent: {event['action']}\ndata: {data}\n\n".encode('utf-8')
+
+
+class ChangeFeedHub:
+    """Polls the change feed once and broadcasts to all subscribers"""
+
+    def __init__(self, dal, poll_interval: float = 1.0, heartbeat: float = 15.0,
+                 queue_size: int = 256):
+        """
+        Initialize the hub
+
+        Args:
+            dal: DAL whose project_changes table is tailed
+            poll_interval: Seconds between polls when no write notification arrives
+            heartbeat: Seconds of silence before a keep-alive comment is sent
+            queue_size: Events buffered per subscriber before it is disconnected
+        """
+        self.dal = dal
+        self.db = AsyncDAL(dal, max_workers=2)
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.last_seq = 0
+        self.subscribers = set()
+        self.loop = None
+        self._wake = None
+        self._task = None
+        self._started = None
+
+    def load_events(self, since: int, limit: int = 500) -> List[Dict]:
+        """
+        Read changes after a sequence number with the current project data
+
+        Runs on the DAL executor because it blocks on SQLite.
+
+        Args:
+            since: Last sequence number already delivered
+            limit: Maximum changes to read
+
+        Returns:
+            List[Dict]: Events in sequence order
+        """
+        events = []
+        for change in self.dal.get_changes_since(since, limit):
+            project = None
+            if change['action'] != 'delete':
+                project = self.dal.get_project_by_id(change['project_id'])
+            events.append({
+                'seq': change['seq'],
+                'action': change['action'],
+                'project_id': change['project_id'],
+                'project': project
+            })
+        return events
+
+    async def start(self):
+        """Bind to the running loop and start polling (safe to call repeatedly)"""
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._started)
+
+    async def _start(self):
+        self.loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.last_seq = await self.db.get_latest_change_seq()
+        self._task = self.loop.create_task(self.run())
+
+    async def stop(self):
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._started = None
+
+    def notify(self, *args):
+        """
+        Wake the poller immediately (thread-safe, usable as a DAL listener)
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self):
+        """Poll the change feed and publish new events until cancelled"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if not self.subscribers:
+                # Nobody listening: just advance the cursor, unless someone
+                # subscribed meanwhile and still needs the events in between
+                latest = await self.db.get_latest_change_seq()
+                if not self.subscribers:
+                    self.last_seq = latest
+                else:
+                    self._wake.set()
+                continue
+
+            events = await self.db.run(self.load_events, self.last_seq)
+            for event in events:
+                self.publish(event)
+            if events:
+                self.last_seq = events[-1]['seq']
+
+    def publish(self, event: Dict):
+        """
+        Queue an event for every subscriber
+
+        A subscriber whose queue is full is cut off; its client reconnects
+        with Last-Event-ID and replays what it missed from the database.
+
+        Args:
+            event: Event to deliver
+        """
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def events(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Stream encoded SSE messages for one client
+
+        Args:
+            last_event_id: Sequence number the client last received, or None
+                           to receive only new changes
+
+        Yields:
+            bytes: SSE messages and keep-alive comments
+        """
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            yield b'retry: 3000\n\n'
+
+            sent = self.last_seq if last_event_id is None else last_event_id
+            while sent < self.last_seq:
+                backlog = await self.db.run(self.load_events, sent)
+                if not backlog:
+                    break
+                for event in backlog:
+                    yield format_event(event)
+                sent = backlog[-1]['seq']
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b': keep-alive\n\n'
+                    continue
+                if event is None:
+                    return
+                if event['seq'] > sent:
+                    sent = event['seq']
+                    yield format_event(event)
+        finally:
+            self.subscribers.discard(queue)
+
+
+def parse_last_event_id(headers: Dict[str, str], query: str) -> Optional[int]:
+    """
+    Get the resume position from the Last-Event-ID header or query string
+
+    EventSource sends the header on reconnect; the lastEventId query
+    parameter lets a fresh page resume from a known position.
+
+    Args:
+        headers: Request headers with lower-case names
+        query: Raw query string
+
+    Returns:
+        Optional[int]: Sequence number or None
+    """
+    value = headers.get('last-event-id') or parse_qs(query).get('lastEventId', [None])[0]
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class SSEServer:
+    """Minimal asyncio HTTP server that only serves the project event stream"""
+
+    def __init__(self, hub: ChangeFeedHub, host: str = '0.0.0.0', port: int = 5001):
+        """
+        Initialize the server
+
+        Args:
+            hub: Change feed hub to stream from
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.ready = threading.Event()
+        self._loop = None
+        self._thread = None
+
+    def start_in_thread(self) -> threading.Thread:
+        """
+        Run the event loop on one daemon thread for all connections
+
+        Returns:
+            threading.Thread: The server thread (already started and listening)
+        """
+        self._thread = threading.Thread(target=self._run, name='sse-server', daemon=True)
+        self._thread.start()
+        self.ready.wait(10)
+        return self._thread
+
+    def stop(self):
+        """Stop the event loop and wait for the server thread to exit"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(self._serve())
+        try:
+            self._loop.run_forever()
+        finally:
+            # Close the listener and let every open stream unwind
+            server.close()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _serve(self) -> asyncio.AbstractServer:
+        await self.hub.start()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        return server
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP connection"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+            lines = head.decode('latin-1').split('\r\n')
+            method, target = lines[0].split(' ')[:2]
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            if method != 'GET' or url.path != STREAM_PATH:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                return
+
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: text/event-stream\r\n'
+                         b'Cache-Control: no-cache\r\n'
+                         b'Connection: keep-alive\r\n'
+                         b'Access-Control-Allow-Origin: *\r\n'
+                         b'X-Accel-Buffering: no\r\n\r\n')
+            stream = self.hub.events(parse_last_event_id(headers, url.query))
+            try:
+                async for chunk in stream:
+                    writer.write(chunk)
+                    await writer.drain()
+            finally:
+                await stream.aclose()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+if __name__ == '__main__':
+    # Standalone stream server for multi-worker deployments: one process
+    # serves every subscriber and tails the shared projects.db change feed
+    import os
+    from DAL import DAL
+
+    server = SSEServer(ChangeFeedHub(DAL()), port=int(os.environ.get('SSE_PORT', 5001)))
+    thread = server.start_in_thread()
+    print(f"Streaming project changes on port {server.port}{STREAM_PATH}")
+    thread.join()
@@ -0,0 +1,180 @@
+"""
+Unit tests for the admission control middleware
+Tests route budgets, load shedding and the adaptive concurrency limit
+"""
+
+import threading
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+from admission import AdmissionController, RouteBudget, path_matcher, prefix_matcher
+
+
+def make_blocking_app(gate):
+    """Build a WSGI app that blocks every request until the gate is set"""
+    def wsgi_app(environ, start_response):
+        gate.wait(5)
+        return Response('ok')(environ, start_response)
+    return wsgi_app
+
+
+def ok_app(environ, start_response):
+    return Response('ok')(environ, start_response)
+
+
+class TestRouteBudget:
+    """Test slot accounting on a single budget"""
+
+    def test_acquire_within_limit(self):
+        """Test that requests under the limit are admitted immediately"""
+        budget = RouteBudget('test', limit=2, max_queue=0)
+        assert budget.acquire() is True
+        assert budget.acquire() is True
+        assert budget.stats()['in_flight'] == 2
+
+    def test_reject_when_full_and_no_queue(self):
+        """Test that a full budget with no queue sheds the request"""
+        budget = RouteBudget('test', limit=1, max_queue=0)
+        assert budget.acquire() is True
+        assert budget.acquire() is False
+        assert budget.stats()['rejected'] == 1
+
+    def test_queued_request_times_out(self):
+        """Test that a queued request is rejected after queue_timeout"""
+        budget = RouteBudget('test', limit=1, max_queue=1, queue_timeout=0.05)
+        budget.acquire()
+        assert budget.acquire() is False
+        assert budget.stats()['waiting'] == 0
+
+    def test_queued_request_admitted_on_release(self):
+        """Test that releasing a slot wakes a queued request"""
+        budget = RouteBudget('test', limit=1, max_queue=1, queue_timeout=2)
+        budget.acquire()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(budget.acquire()))
+        waiter.start()
+        budget.release(0.01)
+        waiter.join(2)
+        assert results == [True]
+
+    def test_limit_shrinks_on_slow_requests(self):
+        """Test multiplicative decrease when latency exceeds the target"""
+        budget = RouteBudget('test', limit=10, max_queue=0, latency_target=0.1)
+        budget.acquire()
+        budget.release(1.0)
+        assert budget.limit < 10
+
+    def test_slow_wave_cuts_limit_once(self):
+        """Test that slow requests finishing together lower the limit only once"""
+        now = [0.0]
+        budget = RouteBudget('pages', limit=32, max_queue=0, latency_target=0.1,
+                             clock=lambda: now[0])
+        for _ in range(32):
+            budget.acquire()
+        for _ in range(32):
+            now[0] += 0.001
+            budget.release(0.15)
+        assert int(budget.limit) == 28
+
+        now[0] += 1.0
+        budget.acquire()
+        budget.release(0.15)
+        assert int(budget.limit) == 25
+
+    def test_limit_grows_on_fast_requests(self):
+        """Test additive increase when latency is under the target"""
+        budget = RouteBudget('test', limit=10, max_queue=0, latency_target=0.1)
+        budget.acquire()
+        budget.release(0.01)
+        assert budget.limit > 10
+
+    def test_limit_respects_bounds(self):
+        """Test that the adaptive limit stays within min/max"""
+        now = [0.0]
+        budget = RouteBudget('test', limit=2, max_queue=0, latency_target=0.1,
+                             min_limit=1, max_limit=3, clock=lambda: now[0])
+        for _ in range(50):
+            budget.acquire()
+            now[0] += 10.0
+            budget.release(5.0)
+        assert budget.limit == 1
+        for _ in range(200):
+            budget.acquire()
+            budget.release(0.0)
+        assert budget.limit == 3
+
+    def test_retry_after_is_at_least_one_second(self):
+        """Test that Retry-After never advertises zero"""
+        budget = RouteBudget('test', limit=1, max_queue=0)
+        assert budget.retry_after() >= 1
+
+
+class TestAdmissionController:
+    """Test the WSGI middleware"""
+
+    def test_routes_to_matching_budget(self):
+        """Test that rules are matched in order with a default fallback"""
+        writes = RouteBudget('writes', limit=1, max_queue=0)
+        pages = RouteBudget('pages', limit=1, max_queue=0)
+        controller = AdmissionController(ok_app, rules=[
+            (path_matcher(['/contact'], methods=['POST']), writes),
+            (prefix_matcher('/static/'), None),
+        ], default=pages)
+
+        assert controller.budget_for('POST', '/contact') is writes
+        assert controller.budget_for('GET', '/contact') is pages
+        assert controller.budget_for('GET', '/static/css/styles.css') is None
+        assert controller.budgets() == [writes, pages]
+
+    def test_slot_released_after_response(self):
+        """Test that a completed response frees its slot"""
+        budget = RouteBudget('pages', limit=1, max_queue=0)
+        client = Client(AdmissionController(ok_app, rules=[], default=budget))
+
+        assert client.get('/', buffered=True).status_code == 200
+        assert client.get('/', buffered=True).status_code == 200
+        assert budget.stats()['in_flight'] == 0
+
+    def test_overload_returns_503_with_retry_after(self):
+        """Test fast rejection while the budget is saturated"""
+        gate = threading.Event()
+        budget = RouteBudget('pages', limit=1, max_queue=0)
+        controller = AdmissionController(make_blocking_app(gate), rules=[], default=budget)
+
+        busy = threading.Thread(target=lambda: Client(controller).get('/', buffered=True))
+        busy.start()
+        while budget.stats()['in_flight'] == 0:
+            pass
+
+        response = Client(controller).get('/', buffered=True)
+        gate.set()
+        busy.join(5)
+
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+
+    def test_exempt_route_bypasses_budget(self):
+        """Test that exempt routes are served even when the default is full"""
+        budget = RouteBudget('pages', limit=1, max_queue=0)
+        budget.acquire()
+        controller = AdmissionController(ok_app, rules=[
+            (prefix_matcher('/static/'), None),
+        ], default=budget)
+
+        assert Client(controller).get('/static/x.css', buffered=True).status_code == 200
+        assert Client(controller).get('/', buffered=True).status_code == 503
+
+
+class TestAppIntegration:
+    """Test that the Flask app is wrapped with admission control"""
+
+    def test_app_is_wrapped(self, app):
+        """Test that the app's WSGI callable is the admission controller"""
+        assert isinstance(app.wsgi_app, AdmissionController)
+
+    def test_write_budget_covers_post_only(self, app):
+        """Test that GET /contact is a cheap page but POST is a write"""
+        controller = app.wsgi_app
+        assert controller.budget_for('POST', '/contact').name == 'writes'
+        assert controller.budget_for('GET', '/contact').name == 'pages'
+        assert controller.budget_for('GET', '/projects').name == 'projects'
@@ -0,0 +1,128 @@
+"""
+Integration tests for the JSON projects API
+Tests field selection, keyset pagination, ETags and delta sync
+"""
+
+import json
+import pytest
+from api import dumps
+
+
+@pytest.fixture
+def api_dal(test_dal, monkeypatch):
+    """Test DAL with five projects, wired into the app"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    for i in range(1, 6):
+        test_dal.add_project(
+            title=f'Project {i}',
+            description=f'Description {i}',
+            image_filename=f'img{i}.jpg',
+            category='Web'
+        )
+    return test_dal
+
+
+class TestEncoder:
+    """Test the fast JSON encoder"""
+
+    def test_dumps_is_compact_utf8(self):
+        """Test that output has no whitespace and keeps non-ASCII text"""
+        assert dumps({'a': [1, 2], 'b': 'café'}) == '{"a":[1,2],"b":"café"}'.encode('utf-8')
+
+
+class TestListProjects:
+    """Test listing projects"""
+
+    def test_list_all_fields(self, client, api_dal):
+        """Test the default listing"""
+        response = client.get('/api/projects')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+
+        data = response.get_json()
+        assert [p['id'] for p in data['projects']] == [5, 4, 3, 2, 1]
+        assert data['next_cursor'] is None
+        assert data['version'] == 5
+        assert 'description' in data['projects'][0]
+
+    def test_field_selection(self, client, api_dal):
+        """Test that only requested fields (plus id) are returned"""
+        data = client.get('/api/projects?fields=title').get_json()
+        assert set(data['projects'][0]) == {'id', 'title'}
+
+    def test_unknown_field_is_400(self, client, api_dal):
+        """Test that unknown fields are rejected"""
+        response = client.get('/api/projects?fields=title,password')
+        assert response.status_code == 400
+        assert 'password' in response.get_json()['error']
+
+    def test_invalid_limit_is_400(self, client, api_dal):
+        """Test that bad integers are rejected"""
+        assert client.get('/api/projects?limit=abc').status_code == 400
+        assert client.get('/api/projects?limit=0').status_code == 400
+
+    def test_keyset_pagination(self, client, api_dal):
+        """Test walking every page with next_cursor"""
+        seen = []
+        url = '/api/projects?limit=2'
+        while url:
+            data = client.get(url).get_json()
+            seen.extend(p['id'] for p in data['projects'])
+            url = f"/api/projects?limit=2&after={data['next_cursor']}" if data['next_cursor'] else None
+        assert seen == [5, 4, 3, 2, 1]
+
+
+class TestETags:
+    """Test conditional requests"""
+
+    def test_not_modified(self, client, api_dal):
+        """Test that a matching If-None-Match returns 304"""
+        first = client.get('/api/projects')
+        etag = first.headers['ETag']
+        second = client.get('/api/projects', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.data == b''
+
+    def test_etag_changes_after_write(self, client, api_dal):
+        """Test that writes invalidate the ETag"""
+        etag = client.get('/api/projects').headers['ETag']
+        api_dal.update_project(1, title='Changed')
+        response = client.get('/api/projects', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+    def test_etag_depends_on_query(self, client, api_dal):
+        """Test that different queries get different ETags"""
+        a = client.get('/api/projects?fields=title').headers['ETag']
+        b = client.get('/api/projects?fields=id').headers['ETag']
+        assert a != b
+
+
+class TestDeltaSync:
+    """Test since=<version> delta mode"""
+
+    def test_no_changes(self, client, api_dal):
+        """Test a delta from the current version"""
+        data = client.get('/api/projects?since=5').get_json()
+        assert data == {'changed': [], 'deleted': [], 'version': 5, 'has_more': False}
+
+    def test_changed_and_deleted(self, client, api_dal):
+        """Test that updates and deletes since a version are reported once"""
+        api_dal.update_project(2, title='Renamed')
+        api_dal.update_project(2, category='Data')
+        api_dal.delete_project(3)
+
+        data = client.get('/api/projects?since=5&fields=title').get_json()
+        assert data['changed'] == [{'id': 2, 'title': 'Renamed'}]
+        assert data['deleted'] == [3]
+        assert data['version'] == 8
+
+    def test_delta_pages_through_changes(self, client, api_dal):
+        """Test that a large delta is split with has_more"""
+        data = client.get('/api/projects?since=0&limit=3').get_json()
+        assert data['has_more'] is True
+        assert data['version'] == 3
+
+        data = client.get(f"/api/projects?since={data['version']}&limit=3").get_json()
+        assert data['has_more'] is False
+        assert [p['id'] for p in data['changed']] == [5, 4]
@@ -0,0 +1,353 @@
+"""
+Tests for the ASGI serving mode
+Drives the ASGI application in-process: WSGI bridging, streamed request
+bodies, lifespan handling and the native async event stream
+"""
+
+import asyncio
+import io
+import threading
+import pytest
+from asgi import ASGIApp, ReceiveStream, build_environ
+from sse import ChangeFeedHub, STREAM_PATH
+
+
+def make_scope(method, path, query=b'', headers=()):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'root_path': '',
+        'query_string': query, 'http_version': '1.1', 'scheme': 'http',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers]
+    }
+
+
+async def request(application, method, path, body=b'', headers=(), chunk_size=None):
+    """Send one request through the ASGI app and collect the response"""
+    chunk_size = chunk_size or max(len(body), 1)
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b'']
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1}
+                for i, c in enumerate(chunks)]
+    received = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        received.append(message)
+
+    await application(make_scope(method, path, headers=headers), receive, send)
+    start = received[0]
+    return (start['status'], dict((k.decode(), v.decode()) for k, v in start['headers']),
+            b''.join(m.get('body', b'') for m in received[1:]))
+
+
+class StreamClient:
+    """Holds an event stream open until disconnect() is called"""
+
+    def __init__(self, application, last_event_id=None):
+        headers = [('Last-Event-ID', str(last_event_id))] if last_event_id is not None else []
+        self.scope = make_scope('GET', STREAM_PATH, headers=headers)
+        self.application = application
+        self.messages = []
+        self.closed = asyncio.Event()
+        self.received = asyncio.Event()
+
+    async def receive(self):
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+        self.received.set()
+
+    def start(self):
+        return asyncio.ensure_future(self.application(self.scope, self.receive, self.send))
+
+    @property
+    def body(self):
+        return b''.join(m.get('body', b'') for m in self.messages[1:])
+
+    async def wait_for(self, marker, timeout=5):
+        async def poll():
+            while marker not in self.body:
+                self.received.clear()
+                await self.received.wait()
+        await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.fixture
+def asgi_app(app, test_dal, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    hub = ChangeFeedHub(test_dal, poll_interval=0.05)
+    test_dal.add_listener(hub.notify)
+    return ASGIApp(app, hub=hub)
+
+
+class TestEnviron:
+    """Test ASGI scope to WSGI environ translation"""
+
+    def test_build_environ(self):
+        """Test paths, query strings and merged headers"""
+        scope = make_scope('POST', '/café', headers=[
+            ('Content-Type', 'text/plain'), ('Content-Length', '3'),
+            ('Accept', 'a'), ('Accept', 'b')
+        ])
+        scope['query_string'] = b'x=1'
+        environ = build_environ(scope, None)
+        assert environ['PATH_INFO'] == '/café'.encode('utf-8').decode('latin-1')
+        assert environ['QUERY_STRING'] == 'x=1'
+        assert environ['CONTENT_TYPE'] == 'text/plain'
+        assert environ['CONTENT_LENGTH'] == '3'
+        assert environ['HTTP_ACCEPT'] == 'a,b'
+
+    def test_receive_stream_reads_across_messages(self):
+        """Test that body reads pull messages on demand"""
+        async def main():
+            loop = asyncio.get_running_loop()
+            messages = [{'type': 'http.request', 'body': b'line one\nline', 'more_body': True},
+                        {'type': 'http.request', 'body': b' two\n', 'more_body': False}]
+
+            async def receive():
+                return messages.pop(0)
+
+            stream = ReceiveStream(receive, loop)
+            return await loop.run_in_executor(None, lambda: (stream.readline(), stream.read()))
+
+        assert asyncio.run(main()) == (b'line one\n', b'line two\n')
+
+
+class TestWSGIBridge:
+    """Test Flask routes served through the ASGI app"""
+
+    def test_get_page(self, asgi_app):
+        """Test a plain page"""
+        status, headers, body = asyncio.run(request(asgi_app, 'GET', '/about'))
+        assert status == 200
+        assert headers['content-type'].startswith('text/html')
+        assert b'<html' in body
+
+    def test_post_form_streamed_in_chunks(self, asgi_app):
+        """Test a form body delivered over several receive messages"""
+        body = b'firstName=Ada&lastName=Lovelace&email=ada%40example.com&password=pw&confirmPassword=pw'
+        status, headers, _ = asyncio.run(request(
+            asgi_app, 'POST', '/contact', body,
+            headers=[('Content-Type', 'application/x-www-form-urlencoded'),
+                     ('Content-Length', str(len(body)))],
+            chunk_size=10))
+        assert status == 302
+        assert headers['location'].endswith('/thankyou')
+
+    def test_multipart_upload(self, asgi_app, test_dal, tmp_path, monkeypatch):
+        """Test that file uploads stream through the bridge"""
+        import app as app_module
+        monkeypatch.setattr(app_module.image_store, 'root', str(tmp_path / 'uploads'))
+        boundary = 'XyZ'
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="title"\r\n\r\nASGI Upload\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="description"\r\n\r\nVia ASGI\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="a.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n'
+        ).encode() + b'\x89PNG' * 50000 + f'\r\n--{boundary}--\r\n'.encode()
+
+        status, _, _ = asyncio.run(request(
+            asgi_app, 'POST', '/add-project', body,
+            headers=[('Content-Type', f'multipart/form-data; boundary={boundary}'),
+                     ('Content-Length', str(len(body)))],
+            chunk_size=65536))
+        assert status == 302
+        assert test_dal.get_all_projects()[0]['image_filename'].startswith('uploads/')
+
+    def test_body_larger_than_buffer_streams(self, app, test_dal):
+        """Test that a body past body_buffer is read on by the worker thread"""
+        body = b'firstName=Ada&lastName=Lovelace&email=ada%40example.com&password=pw&confirmPassword=pw'
+        application = ASGIApp(app, body_buffer=16)
+        status, headers, _ = asyncio.run(request(
+            application, 'POST', '/contact', body,
+            headers=[('Content-Type', 'application/x-www-form-urlencoded'),
+                     ('Content-Length', str(len(body)))],
+            chunk_size=10))
+        assert status == 302
+
+
+def echo_app(environ, start_response):
+    """WSGI app answering with the request body"""
+    body = environ['wsgi.input'].read()
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [body or b'ok']
+
+
+class TestSlowClients:
+    """Test that slow clients do not hold worker threads"""
+
+    def test_slow_upload_holds_no_thread(self):
+        """Test that a small body is read on the loop before a thread is taken"""
+        async def main():
+            application = ASGIApp(echo_app, max_workers=1)
+            arrived = asyncio.Event()
+
+            async def slow_receive():
+                await arrived.wait()
+                return {'type': 'http.request', 'body': b'late', 'more_body': False}
+
+            async def send(message):
+                pass
+
+            slow = asyncio.ensure_future(application(make_scope('POST', '/'), slow_receive, send))
+            await asyncio.sleep(0.05)
+            # The only worker thread is free while the slow body trickles in
+            result = await asyncio.wait_for(request(application, 'GET', '/'), 2)
+            arrived.set()
+            await slow
+            return result
+
+        assert asyncio.run(main())[0] == 200
+
+    def test_slow_reader_holds_no_thread(self):
+        """Test that a response is handed to the loop and the thread released"""
+        async def main():
+            application = ASGIApp(echo_app, max_workers=1)
+            reading = asyncio.Event()
+            received = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'first', 'more_body': False}
+
+            async def slow_send(message):
+                await reading.wait()
+                received.append(message)
+
+            slow = asyncio.ensure_future(application(make_scope('POST', '/'), receive, slow_send))
+            await asyncio.sleep(0.05)
+            result = await asyncio.wait_for(request(application, 'GET', '/'), 2)
+            reading.set()
+            await slow
+            return result, b''.join(m.get('body', b'') for m in received)
+
+        result, slow_body = asyncio.run(main())
+        assert result[0] == 200
+        assert slow_body == b'first'
+
+    def test_send_buffer_applies_backpressure(self):
+        """Test that a worker waits once send_buffer bytes are queued"""
+        chunks_made = []
+
+        def big_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            for i in range(10):
+                chunks_made.append(i)
+                yield b'x' * 1000
+
+        async def main():
+            application = ASGIApp(big_app, send_buffer=2500)
+            reading = asyncio.Event()
+            received = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def slow_send(message):
+                await reading.wait()
+                received.append(message)
+
+            task = asyncio.ensure_future(application(make_scope('GET', '/'), receive, slow_send))
+            await asyncio.sleep(0.1)
+            produced = len(chunks_made)
+            reading.set()
+            await task
+            return produced, b''.join(m.get('body', b'') for m in received)
+
+        produced, body = asyncio.run(main())
+        assert produced < 10
+        assert body == b'x' * 10000
+
+
+class TestLifespan:
+    """Test ASGI lifespan events"""
+
+    def test_startup_and_shutdown(self, asgi_app):
+        """Test that the hub starts and stops with the server"""
+        async def main():
+            events = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+            sent = []
+
+            async def receive():
+                return events.pop(0)
+
+            async def send(message):
+                sent.append(message['type'])
+                if message['type'] == 'lifespan.startup.complete':
+                    assert asgi_app.hub.loop is not None
+
+            await asgi_app({'type': 'lifespan'}, receive, send)
+            return sent
+
+        assert asyncio.run(main()) == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+
+class TestAsyncEventStream:
+    """Test the natively async project event stream"""
+
+    def test_live_event(self, asgi_app, test_dal):
+        """Test that a write made through the bridge reaches a stream"""
+        async def main():
+            stream = StreamClient(asgi_app)
+            task = stream.start()
+            await stream.wait_for(b'retry:')
+
+            await request(asgi_app, 'POST', '/add-project',
+                          b'title=Live&description=d&image_filename=live.png',
+                          headers=[('Content-Type', 'application/x-www-form-urlencoded'),
+                                   ('Content-Length', '48')])
+            await stream.wait_for(b'event: add')
+            stream.closed.set()
+            await task
+            await asgi_app.hub.stop()
+            return stream
+
+        stream = asyncio.run(main())
+        assert stream.messages[0]['status'] == 200
+        assert b'"title":"Live"' in stream.body
+
+    def test_resume_with_last_event_id(self, asgi_app, test_dal):
+        """Test replay of changes missed while disconnected"""
+        test_dal.add_project(title='One', description='d', image_filename='1.png')
+        test_dal.add_project(title='Two', description='d', image_filename='2.png')
+
+        async def main():
+            await asgi_app.hub.start()
+            stream = StreamClient(asgi_app, last_event_id=1)
+            task = stream.start()
+            await stream.wait_for(b'id: 2\n')
+            stream.closed.set()
+            await task
+            await asgi_app.hub.stop()
+            return stream.body
+
+        body = asyncio.run(main())
+        assert b'id: 1\n' not in body
+
+    def test_many_idle_streams_use_no_threads(self, asgi_app):
+        """Test that thousands of open streams share the event loop"""
+        async def main():
+            await asgi_app.hub.start()
+            threads_before = threading.active_count()
+            streams = [StreamClient(asgi_app) for _ in range(2000)]
+            tasks = [s.start() for s in streams]
+            for s in streams:
+                await s.wait_for(b'retry:')
+            open_streams = len(asgi_app.hub.subscribers)
+            threads_during = threading.active_count()
+
+            for s in streams:
+                s.closed.set()
+            asgi_app.hub.notify()
+            await asyncio.wait_for(asyncio.gather(*tasks), 10)
+            await asgi_app.hub.stop()
+            return open_streams, threads_during - threads_before
+
+        open_streams, extra_threads = asyncio.run(main())
+        assert open_streams == 2000
+        assert extra_threads <= 2
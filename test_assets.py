@@ -0,0 +1,232 @@
+"""
+Unit tests for self-hosted fonts and icons
+Tests template scanning, stylesheet parsing, subsetting and the base.html links
+"""
+
+import io
+import json
+import os
+import pytest
+from assets import (AssetVendor, icon_css, is_third_party, measure_blocking, parse_google_font_faces,
+                    parse_icon_codepoints, render_blocking_stylesheets, scan_templates,
+                    used_font_weights)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+CSS_DIR = os.path.join(os.path.dirname(__file__), 'static', 'css')
+
+FONT_AWESOME_CSS = ('.fa-envelope:before{content:"\\f0e0"}'
+                    '.fa-external-link-alt:before,.fa-up-right-from-square:before{content:"\\f35d"}'
+                    '.fa-github:before{content:"\\f09b"}.fa-unused:before{content:"\\f000"}')
+
+GOOGLE_CSS = '''/* cyrillic */
+@font-face {
+  font-family: 'Inter';
+  font-weight: 400;
+  src: url(https://fonts.gstatic.com/inter-cyrillic.woff2) format('woff2');
+}
+/* latin */
+@font-face {
+  font-family: 'Inter';
+  font-weight: 400;
+  src: url(https://fonts.gstatic.com/inter-latin.woff2) format('woff2');
+}
+/* latin */
+@font-face {
+  font-family: 'Inter';
+  font-weight: 700;
+  src: url(https://fonts.gstatic.com/inter-latin.woff2) format('woff2');
+}
+'''
+
+
+def make_font(codepoints):
+    """Build a small TrueType font with one square glyph per code point"""
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    names = ['.notdef'] + [f'g{cp:x}' for cp in codepoints]
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({cp: f'g{cp:x}' for cp in codepoints})
+    glyphs = {}
+    for name in names:
+        pen = TTGlyphPen(None)
+        pen.moveTo((0, 0))
+        pen.lineTo((0, 500))
+        pen.lineTo((500, 500))
+        pen.closePath()
+        glyphs[name] = pen.glyph()
+    builder.setupGlyf(glyphs)
+    builder.setupHorizontalMetrics({name: (600, 0) for name in names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({'familyName': 'Test', 'styleName': 'Regular'})
+    builder.setupOS2()
+    builder.setupPost()
+    output = io.BytesIO()
+    builder.save(output)
+    return output.getvalue()
+
+
+def font_codepoints(data):
+    """Code points mapped by a font file"""
+    from fontTools.ttLib import TTFont
+    return set(TTFont(io.BytesIO(data)).getBestCmap())
+
+
+class TestScanning:
+    """Test finding what the templates and stylesheets use"""
+
+    def test_icons_keep_their_style(self):
+        """Test that icons are found with their solid/brands style"""
+        icons = scan_templates(TEMPLATE_DIR)['icons']
+        assert icons['envelope'] == 'fas'
+        assert icons['github'] == 'fab'
+
+    def test_template_code_is_not_text(self, tmp_path):
+        """Test that only visible text counts toward the glyph set"""
+        (tmp_path / 'page.html').write_text('<p class="q">Hi {{ name|title }} é</p>', encoding='utf-8')
+        text = scan_templates(str(tmp_path))['text']
+        assert {ord('H'), ord('i'), ord('é')} <= text
+        assert ord('|') not in text
+
+    def test_font_weights_from_stylesheets(self):
+        """Test that only the weights the CSS uses are requested"""
+        weights = used_font_weights(os.path.join(CSS_DIR, name) for name in os.listdir(CSS_DIR))
+        assert weights == [400, 500, 600, 700]
+
+
+class TestParsing:
+    """Test reading the upstream stylesheets"""
+
+    def test_icon_codepoints_include_aliases(self):
+        """Test that every selector in a grouped rule is mapped"""
+        codepoints = parse_icon_codepoints(FONT_AWESOME_CSS)
+        assert codepoints['envelope'] == 0xf0e0
+        assert codepoints['external-link-alt'] == codepoints['up-right-from-square'] == 0xf35d
+
+    def test_google_faces_grouped_by_file(self):
+        """Test that weights served by one variable font share one file"""
+        faces = parse_google_font_faces(GOOGLE_CSS)
+        assert faces == {'https://fonts.gstatic.com/inter-latin.woff2': [400, 700]}
+
+    def test_icon_css_has_only_used_icons(self):
+        """Test that unused icons are dropped from the stylesheet"""
+        css = icon_css({'envelope': 'fas'}, parse_icon_codepoints(FONT_AWESOME_CSS),
+                       {'fas': 'fa-solid.woff2'})
+        assert '.fa-envelope:before' in css
+        assert 'fa-unused' not in css
+        assert 'Brands' not in css
+
+
+class TestBuild:
+    """Test vendoring the assets end to end"""
+
+    @pytest.fixture
+    def vendor(self, tmp_path):
+        pytest.importorskip('fontTools')
+        pytest.importorskip('brotli')
+        static_dir = tmp_path / 'static'
+        (static_dir / 'css').mkdir(parents=True)
+        (static_dir / 'css' / 'site.css').write_text('h1 { font-weight: 600; }')
+        template_dir = tmp_path / 'templates'
+        template_dir.mkdir()
+        (template_dir / 'base.html').write_text(
+            '<i class="fas fa-envelope"></i><i class="fab fa-github"></i>'
+            '<i class="fas fa-target"></i><p>Hello</p>')
+
+        files = {
+            'webfonts/fa-solid-900.woff2': make_font([0xf0e0, 0xf35d, 0xf000]),
+            'webfonts/fa-brands-400.woff2': make_font([0xf09b, 0xf000]),
+            'css/all.min.css': FONT_AWESOME_CSS.encode(),
+            'inter-latin.woff2': make_font(list(range(0x20, 0x7F)) + [0x4e00]),
+        }
+        requested = []
+
+        def fetch(url):
+            requested.append(url)
+            if 'googleapis' in url:
+                return GOOGLE_CSS.encode()
+            return files[url.split('/6.0.0/')[-1].replace('https://fonts.gstatic.com/', '')]
+
+        vendor = AssetVendor(str(static_dir), str(template_dir), fetch=fetch)
+        vendor.requested = requested
+        return vendor
+
+    def test_build_writes_subset_fonts_and_manifest(self, vendor):
+        """Test that fonts are subset and the manifest describes the result"""
+        manifest = vendor.build()
+
+        with open(os.path.join(vendor.output_dir, 'manifest.json')) as f:
+            assert json.load(f) == manifest
+        assert manifest['missing_icons'] == ['target']
+        assert manifest['weights'] == [400, 600, 700]
+        assert manifest['after']['bytes'] < manifest['before']['bytes']
+        assert any('wght@400;600;700' in url for url in vendor.requested)
+
+        names = os.listdir(vendor.output_dir)
+        solid = next(name for name in names if name.startswith('fa-solid-900'))
+        with open(os.path.join(vendor.output_dir, solid), 'rb') as f:
+            assert font_codepoints(f.read()) == {0xf0e0}
+        inter = next(name for name in names if name.startswith('inter'))
+        with open(os.path.join(vendor.output_dir, inter), 'rb') as f:
+            codepoints = font_codepoints(f.read())
+        assert ord('H') in codepoints and 0x4e00 not in codepoints
+
+        assert 'vendor/' + inter in manifest['preload']
+        assert 'vendor/' + solid in manifest['preload']
+
+    def test_rebuild_removes_stale_files(self, vendor):
+        """Test that files from an older build are deleted"""
+        vendor.build()
+        stale = os.path.join(vendor.output_dir, 'fonts.0000000000.css')
+        open(stale, 'w').close()
+        vendor.build()
+        assert not os.path.exists(stale)
+
+
+class TestBaseTemplate:
+    """Test how base.html links fonts and icons"""
+
+    def test_cdn_links_without_manifest(self, client, app, monkeypatch):
+        """Test that pages use the CDNs until the assets are vendored"""
+        monkeypatch.setitem(app.config, 'ASSET_MANIFEST', None)
+        html = client.get('/').data.decode()
+        assert 'cdnjs.cloudflare.com' in html
+        assert 'fonts.googleapis.com' in html
+
+    def test_local_links_with_manifest(self, client, app, monkeypatch, tmp_path):
+        """Test that pages preload and link the vendored files"""
+        manifest = tmp_path / 'manifest.json'
+        manifest.write_text(json.dumps({
+            'stylesheet': 'vendor/fonts.abc.css',
+            'preload': ['vendor/inter.abc.woff2']
+        }))
+        monkeypatch.setitem(app.config, 'ASSET_MANIFEST', str(manifest))
+
+        html = client.get('/').data.decode()
+        assert 'cdnjs.cloudflare.com' not in html
+        assert 'fonts.googleapis.com' not in html
+        assert 'href="/static/vendor/fonts.abc.css"' in html
+        assert 'rel="preload" href="/static/vendor/inter.abc.woff2" as="font"' in html
+
+    def test_render_blocking_stylesheets(self):
+        """Test that only linked stylesheets outside <noscript> are counted"""
+        html = ('<link rel="stylesheet" href="/a.css">'
+                '<link rel="preload" href="/b.css" as="style">'
+                '<noscript><link rel="stylesheet" href="/b.css"></noscript>'
+                '<link rel="stylesheet" href="/print.css" media="print">'
+                '<link href="https://cdn.example/c.css" rel="stylesheet">')
+        assert render_blocking_stylesheets(html) == ['/a.css', 'https://cdn.example/c.css']
+
+    def test_measure_blocking_per_page(self, app, monkeypatch, tmp_path):
+        """Test that vendoring replaces the third-party stylesheets with one local one"""
+        manifest = tmp_path / 'manifest.json'
+        manifest.write_text(json.dumps({'stylesheet': 'vendor/fonts.abc.css', 'preload': []}))
+        monkeypatch.setitem(app.config, 'ASSET_MANIFEST', str(manifest))
+
+        links = measure_blocking(app, ['/'])['/']
+        assert sum(map(is_third_party, links['before'])) == 2
+        assert not any(map(is_third_party, links['after']))
+        assert '/static/vendor/fonts.abc.css' in links['after']
+        assert len(links['after']) == len(links['before']) - 1
+        assert app.config['ASSET_MANIFEST'] == str(manifest)
@@ -0,0 +1,200 @@
+"""
+Unit tests for critical CSS extraction
+Tests CSS parsing, selector matching, dead-selector pruning and base.html
+"""
+
+import json
+import os
+import shutil
+import pytest
+from critical import (AtRule, CriticalCSS, Document, StyleRule, Vocabulary, critical_css_for,
+                      minify, parse_css, parse_selector, selector_matches)
+
+STYLESHEETS = ['css/styles.css', 'css/projects-styles.css']
+
+
+def element(html, tag, cls=None):
+    """First element with a tag (and class) in a parsed snippet"""
+    document = Document(html)
+    return next(e for e in document.elements if e.tag == tag and (cls is None or cls in e.classes))
+
+
+def matches(selector, html, tag, cls=None):
+    return selector_matches(parse_selector(selector), element(html, tag, cls))
+
+
+class TestParsing:
+    """Test the stylesheet parser and minifier"""
+
+    def test_rules_media_and_keyframes(self):
+        """Test that nested and opaque at-rules are kept apart"""
+        rules = parse_css('''
+            /* comment { */
+            a, b > i { color: red; }
+            @media (max-width: 768px) { .nav { display: none; } }
+            @keyframes spin { from { opacity: 0; } to { opacity: 1; } }
+        ''')
+        assert isinstance(rules[0], StyleRule) and rules[0].selectors == ['a', 'b > i']
+        assert rules[1].prelude == '@media (max-width: 768px)' and rules[1].rules[0].selectors == ['.nav']
+        assert rules[2].name == '@keyframes' and rules[2].rules is None
+
+    def test_braces_in_strings(self):
+        """Test that braces inside strings do not end a block"""
+        rules = parse_css('.x::before { content: "}"; } .y { color: blue; }')
+        assert [rule.selectors for rule in rules] == [['.x::before'], ['.y']]
+
+    def test_round_trip_is_minified(self):
+        """Test that serialised rules drop whitespace and trailing semicolons"""
+        css = ''.join(rule.css() for rule in parse_css('@media print { a { color : red ; } }'))
+        assert css == '@media print{a{color:red}}'
+
+    def test_minify_keeps_strings(self):
+        """Test that whitespace inside strings is preserved"""
+        assert minify('content: " : ";  margin: 0  auto;') == 'content:" : ";margin:0 auto'
+
+
+class TestSelectors:
+    """Test selector matching against parsed pages"""
+
+    def test_descendant_and_child(self):
+        """Test descendant and child combinators"""
+        html = '<nav class="navbar"><div><a class="nav-link">x</a></div></nav>'
+        assert matches('.navbar .nav-link', html, 'a')
+        assert not matches('.navbar > .nav-link', html, 'a')
+        assert matches('.navbar > div > a', html, 'a')
+
+    def test_sibling_combinators(self):
+        """Test adjacent and general sibling combinators"""
+        html = '<div><h2></h2><p></p><span></span></div>'
+        assert matches('h2 + p', html, 'p')
+        assert not matches('h2 + span', html, 'span')
+        assert matches('h2 ~ span', html, 'span')
+
+    def test_dynamic_states_match(self):
+        """Test that :hover and ::after rules apply to their element"""
+        html = '<a class="btn btn-primary">x</a>'
+        assert matches('.btn-primary:hover', html, 'a')
+        assert matches('.btn::after', html, 'a')
+        assert matches('a[href^="http"]', html, 'a')
+
+    def test_root_matches_html(self):
+        """Test that :root rules (CSS variables) apply to <html>"""
+        assert matches(':root', '<html><body></body></html>', 'html')
+
+    def test_above_the_fold(self):
+        """Test that elements after the fold budget are excluded"""
+        html = '<html><body><nav></nav>' + '<p></p>' * 10 + '<footer></footer></body></html>'
+        tags = [e.tag for e in Document(html).above_the_fold(5)]
+        assert 'nav' in tags and 'footer' not in tags
+
+
+class TestVocabulary:
+    """Test dead-selector detection from the template sources"""
+
+    @pytest.fixture
+    def vocabulary(self, tmp_path):
+        (tmp_path / 'page.html').write_text('''
+            <div class="card {% if x %}active{% endif %} flash-{{ category }}" id="main">
+            <script>el.classList.add('is-open');</script>
+        ''')
+        return Vocabulary(str(tmp_path))
+
+    def test_live_selectors(self, vocabulary):
+        """Test classes from attributes, Jinja conditionals, prefixes and scripts"""
+        for selector in ['.card', '.card.active', '#main', '.flash-error', 'div.is-open', 'html body']:
+            assert vocabulary.allows(parse_selector(selector)), selector
+
+    def test_dead_selectors(self, vocabulary):
+        """Test that unknown classes, ids and tags are dead"""
+        for selector in ['.timeline-item', '#sidebar', 'h6', '.card .missing']:
+            assert not vocabulary.allows(parse_selector(selector)), selector
+
+
+@pytest.fixture
+def critical(app, test_dal, tmp_path, monkeypatch):
+    """CriticalCSS building into a temporary copy of the static folder"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    static_dir = tmp_path / 'static'
+    shutil.copytree(os.path.join(app.root_path, 'static', 'css'), static_dir / 'css')
+    monkeypatch.setattr(app, 'static_folder', str(static_dir))
+    return CriticalCSS(app, STYLESHEETS, pages={'index': '/', 'about': '/about'},
+                       always=['.flash-'])
+
+
+class TestBuild:
+    """Test the per-page build"""
+
+    def test_manifest_and_pruned_stylesheets(self, critical):
+        """Test that the build writes pruned stylesheets and per-page CSS"""
+        manifest = critical.build()
+
+        assert set(manifest['pages']) == {'index', 'about'}
+        for stylesheet in manifest['stylesheets']:
+            assert os.path.exists(os.path.join(critical.app.static_folder, stylesheet))
+        with open(os.path.join(critical.output_dir, 'manifest.json')) as f:
+            assert json.load(f) == manifest
+
+        styles = manifest['report']['stylesheets']['css/styles.css']
+        assert styles['dead_selectors'] > 0
+        assert styles['bytes_after'] < styles['bytes_before']
+        with open(os.path.join(critical.app.static_folder, manifest['stylesheets'][0])) as f:
+            assert '.timeline-item' not in f.read()
+
+    def test_page_css_is_above_the_fold_only(self, critical):
+        """Test that each page gets the rules for its opening content"""
+        pages = critical.build()['pages']
+        assert '.navbar{' in pages['index'] and '.hero{' in pages['index']
+        assert '.page-header{' in pages['about'] and '.hero{' not in pages['about']
+        assert '.cta-section{' not in pages['about']
+        assert '@media print' not in pages['index']
+
+    def test_flash_rules_and_keyframes_included(self, critical):
+        """Test that always-critical rules pull in their animations"""
+        css = critical.build()['pages']['about']
+        assert '.flash-message{' in css
+        assert '@keyframes slideIn{' in css
+
+    def test_command(self, critical, runner):
+        """Test that `flask critical-css` builds every page into the static folder"""
+        result = runner.invoke(args=['critical-css'])
+        assert result.exit_code == 0, result.output
+        assert 'dead selectors removed' in result.output
+        assert 'projects: render-blocking CSS' in result.output
+        assert os.path.exists(os.path.join(critical.output_dir, 'manifest.json'))
+
+
+class TestBaseTemplate:
+    """Test how base.html loads stylesheets"""
+
+    def test_blocking_links_without_manifest(self, client, app, monkeypatch):
+        """Test that pages link the full stylesheets until the build has run"""
+        monkeypatch.setitem(app.config, 'CRITICAL_CSS_MANIFEST', None)
+        html = client.get('/').data.decode()
+        assert 'rel="stylesheet" href="/static/css/styles.css"' in html
+        assert '<style>' not in html
+
+    def test_inline_css_with_manifest(self, client, app, monkeypatch, tmp_path):
+        """Test that built pages inline their CSS and defer the stylesheets"""
+        manifest = tmp_path / 'manifest.json'
+        manifest.write_text(json.dumps({
+            'stylesheets': ['critical/styles.abc.css'],
+            'pages': {'index': '.hero{color:red}'}
+        }))
+        monkeypatch.setitem(app.config, 'CRITICAL_CSS_MANIFEST', str(manifest))
+
+        html = client.get('/').data.decode()
+        assert '<style>.hero{color:red}</style>' in html
+        assert 'rel="preload" href="/static/critical/styles.abc.css" as="style"' in html
+        assert '<noscript><link rel="stylesheet" href="/static/critical/styles.abc.css"></noscript>' in html
+        assert 'href="/static/css/styles.css"' not in html
+
+        # Pages missing from the manifest keep the blocking stylesheets
+        html = client.get('/about').data.decode()
+        assert 'rel="stylesheet" href="/static/css/styles.css"' in html
+
+    def test_style_element_cannot_be_closed(self, tmp_path):
+        """Test that CSS text cannot end the <style> element"""
+        manifest = tmp_path / 'manifest.json'
+        manifest.write_text(json.dumps({'stylesheets': [], 'pages': {'index': 'a{}</style><script>'}}))
+        assert '</style>' not in critical_css_for(str(manifest), 'index')['css']
@@ -3,8 +3,9 @@ Unit tests for the Data Access Layer (DAL)
 Tests all database operations for the projects database
 """
 
+import asyncio
 import pytest
-from DAL import DAL
+from DAL import DAL, AsyncDAL
 
 
 class TestDALInitialization:
@@ -25,6 +26,39 @@ class TestDALInitialization:
         result = cursor.fetchone()
         conn.close()
         assert result is not None
+    
+    def test_dal_adds_version_column_to_old_database(self, tmp_path):
+        """Test that a database created without row versions is upgraded"""
+        import sqlite3
+        db_path = str(tmp_path / 'old.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE projects (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                image_filename TEXT NOT NULL,
+                category TEXT,
+                technologies TEXT,
+                project_url TEXT,
+                duration TEXT,
+                role TEXT,
+                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO projects (title, description, image_filename) VALUES ('Old', 'd', 'a.png')")
+        conn.commit()
+        conn.close()
+        
+        dal = DAL(db_name=db_path)
+        assert dal.get_project_by_id(1)['version'] == 1
+    
+    def test_new_database_uses_incremental_vacuum(self, test_dal):
+        """Test that new databases can release deleted pages incrementally"""
+        conn = test_dal.get_connection()
+        mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        conn.close()
+        assert mode == 2
 
 
 class TestAddProject:
@@ -93,6 +127,11 @@ class TestGetAllProjects:
         assert 'Test Project' in project_titles
         assert 'Second Project' in project_titles
         assert 'Third Project' in project_titles
+    
+    def test_get_all_projects_with_limit(self, populated_dal):
+        """Test that a limit returns only that many projects"""
+        assert len(populated_dal.get_all_projects(limit=2)) == 2
+        assert len(populated_dal.get_all_projects(limit=10)) == 3
 
 
 class TestGetProjectById:
@@ -125,6 +164,34 @@ class TestGetProjectById:
             assert field in project
 
 
+class TestProjectPages:
+    """Test keyset pagination and batched lookups"""
+    
+    def test_get_projects_page(self, populated_dal):
+        """Test that pages are newest first and continue after a cursor"""
+        first = populated_dal.get_projects_page(limit=2)
+        assert [p['id'] for p in first] == [3, 2]
+        
+        rest = populated_dal.get_projects_page(after_id=2, limit=2)
+        assert [p['id'] for p in rest] == [1]
+    
+    def test_get_projects_page_selected_fields(self, populated_dal):
+        """Test that only requested columns are returned, always with id"""
+        page = populated_dal.get_projects_page(fields=('title',))
+        assert set(page[0]) == {'id', 'title'}
+    
+    def test_unknown_field_rejected(self, populated_dal):
+        """Test that field names are validated before building SQL"""
+        with pytest.raises(ValueError):
+            populated_dal.get_projects_page(fields=('title; DROP TABLE projects',))
+    
+    def test_get_projects_by_ids(self, populated_dal):
+        """Test batched lookup skipping missing IDs"""
+        projects = populated_dal.get_projects_by_ids([1, 3, 999])
+        assert [p['id'] for p in projects] == [3, 1]
+        assert populated_dal.get_projects_by_ids([]) == []
+
+
 class TestUpdateProject:
     """Test updating existing projects"""
     
@@ -151,6 +218,12 @@ class TestUpdateProject:
         assert project['description'] == 'New Description'
         assert project['category'] == 'New Category'
     
+    def test_update_bumps_version(self, populated_dal):
+        """Test that every update increments the row version"""
+        assert populated_dal.get_project_by_id(1)['version'] == 1
+        populated_dal.update_project(1, title='Updated Title')
+        assert populated_dal.get_project_by_id(1)['version'] == 2
+    
     def test_update_nonexistent_project(self, test_dal):
         """Test updating a project that doesn't exist"""
         success = test_dal.update_project(999, title='New Title')
@@ -184,6 +257,51 @@ class TestDeleteProject:
         assert new_count == initial_count - 1
 
 
+class TestChangeFeed:
+    """Test the append-only project change feed"""
+    
+    def test_writes_are_recorded_in_order(self, test_dal):
+        """Test that add, update and delete each append a change"""
+        project_id = test_dal.add_project(
+            title='Feed Project',
+            description='Description',
+            image_filename='feed.jpg'
+        )
+        test_dal.update_project(project_id, title='Renamed')
+        test_dal.delete_project(project_id)
+        
+        changes = test_dal.get_changes_since(0)
+        assert [c['action'] for c in changes] == ['add', 'update', 'delete']
+        assert [c['seq'] for c in changes] == sorted(c['seq'] for c in changes)
+        assert all(c['project_id'] == project_id for c in changes)
+    
+    def test_failed_writes_are_not_recorded(self, test_dal):
+        """Test that updates and deletes of missing projects add nothing"""
+        test_dal.update_project(999, title='Nope')
+        test_dal.delete_project(999)
+        assert test_dal.get_latest_change_seq() == 0
+    
+    def test_failing_listener_does_not_fail_write(self, test_dal):
+        """Test that a listener error neither fails the write nor skips other listeners"""
+        def broken(action, project_id):
+            raise RuntimeError('event loop is closed')
+        
+        events = []
+        test_dal.add_listener(broken)
+        test_dal.add_listener(lambda *event: events.append(event))
+        project_id = test_dal.add_project(title='Saved', description='Description',
+                                          image_filename='a.png')
+        
+        assert test_dal.get_project_by_id(project_id)['title'] == 'Saved'
+        assert events == [('add', project_id)]
+    
+    def test_changes_since(self, populated_dal):
+        """Test reading only changes after a sequence number"""
+        assert populated_dal.get_latest_change_seq() == 3
+        changes = populated_dal.get_changes_since(1)
+        assert [c['seq'] for c in changes] == [2, 3]
+
+
 class TestProjectData:
     """Test project data integrity and retrieval"""
     
@@ -209,3 +327,42 @@ class TestProjectData:
         project = test_dal.get_project_by_id(project_id)
         assert project is not None
         assert project['title'] == 'Project'
+
+
+class TestAsyncDAL:
+    """Test the async facade used by ASGI code"""
+    
+    def test_async_crud(self, test_dal):
+        """Test that async methods run the DAL operations"""
+        async def main():
+            adal = AsyncDAL(test_dal, max_workers=1)
+            project_id = await adal.add_project(
+                title='Async Project',
+                description='Added from a coroutine',
+                image_filename='async.jpg'
+            )
+            await adal.update_project(project_id, title='Async Renamed')
+            project = await adal.get_project_by_id(project_id)
+            projects = await adal.get_all_projects()
+            deleted = await adal.delete_project(project_id)
+            seq = await adal.get_latest_change_seq()
+            adal.close()
+            return project, projects, deleted, seq
+        
+        project, projects, deleted, seq = asyncio.run(main())
+        assert project['title'] == 'Async Renamed'
+        assert len(projects) == 1
+        assert deleted is True
+        assert seq == 3
+    
+    def test_runs_on_dedicated_executor(self, test_dal):
+        """Test that SQLite work happens on the DAL threads, not the loop"""
+        import threading
+        
+        async def main():
+            adal = AsyncDAL(test_dal, max_workers=1)
+            name = await adal.run(lambda: threading.current_thread().name)
+            adal.close()
+            return name
+        
+        assert asyncio.run(main()).startswith('dal')
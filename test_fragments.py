@@ -0,0 +1,78 @@
+"""
+Unit tests for fragment caching
+Tests the fragment cache and cached rows on the projects page
+"""
+
+import pytest
+from fragments import FragmentCache
+
+
+class TestFragmentCache:
+    """Test caching behaviour of rendered partials"""
+
+    def test_same_key_is_rendered_once(self, app):
+        """Test that a repeated key is served from the cache"""
+        cache = FragmentCache()
+        project = {'id': 1, 'title': 'Cached', 'description': 'd', 'image_filename': 'a.png'}
+        with app.test_request_context('/projects'):
+            first = cache.render('_project_row.html', (1, 1), project=project)
+            project['title'] = 'Changed'
+            second = cache.render('_project_row.html', (1, 1), project=project)
+
+        assert first == second
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_new_key_rerenders(self, app):
+        """Test that a new version renders fresh output"""
+        cache = FragmentCache()
+        project = {'id': 1, 'title': 'Old', 'description': 'd', 'image_filename': 'a.png'}
+        with app.test_request_context('/projects'):
+            cache.render('_project_row.html', (1, 1), project=project)
+            project['title'] = 'New'
+            html = cache.render('_project_row.html', (1, 2), project=project)
+
+        assert 'New' in html
+
+    def test_none_key_is_not_cached(self, app):
+        """Test that a None key bypasses the cache"""
+        cache = FragmentCache()
+        project = {'id': 1, 'title': 'x', 'description': 'd', 'image_filename': 'a.png'}
+        with app.test_request_context('/projects'):
+            cache.render('_project_row.html', None, project=project)
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, app):
+        """Test that the cache stays within max_entries"""
+        cache = FragmentCache(max_entries=2)
+        project = {'id': 1, 'title': 'x', 'description': 'd', 'image_filename': 'a.png'}
+        with app.test_request_context('/projects'):
+            for version in range(5):
+                cache.render('_project_row.html', (1, version), project=project)
+        assert len(cache) == 2
+
+
+class TestProjectsPageRowCache:
+    """Test that /projects only renders new or changed rows"""
+
+    def test_unchanged_rows_come_from_cache(self, client, populated_dal, monkeypatch):
+        """Test that a second page view renders no rows"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', populated_dal)
+
+        client.get('/projects')
+        assert app_module.row_cache.misses == 3
+        client.get('/projects')
+        assert app_module.row_cache.misses == 3
+        assert app_module.row_cache.hits == 3
+
+    def test_updated_row_is_rerendered(self, client, populated_dal, monkeypatch):
+        """Test that editing one project re-renders only that row"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', populated_dal)
+
+        client.get('/projects')
+        populated_dal.update_project(1, title='Edited Title')
+        response = client.get('/projects')
+
+        assert b'Edited Title' in response.data
+        assert app_module.row_cache.misses == 4
@@ -0,0 +1,130 @@
+"""
+Unit tests for the static site export
+Tests full builds, unchanged-page skipping and incremental rebuilds
+"""
+
+import io
+import os
+import shutil
+import pytest
+from freeze import Freezer
+
+
+@pytest.fixture
+def freezer(app, test_dal, tmp_path, monkeypatch):
+    """Freezer writing to a temporary directory, backed by a test DAL"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    return app_module.make_freezer(str(tmp_path / 'build'))
+
+
+class TestOutputPaths:
+    """Test URL to file mapping"""
+
+    def test_root_maps_to_index(self):
+        """Test that / is written as index.html"""
+        assert Freezer.output_path('/') == 'index.html'
+
+    def test_page_maps_to_directory_index(self):
+        """Test that /about is written as about/index.html"""
+        assert Freezer.output_path('/about') == os.path.join('about', 'index.html')
+
+
+class TestFullFreeze:
+    """Test rendering the whole site"""
+
+    def test_discovers_get_pages(self, freezer):
+        """Test that every GET route without arguments is frozen"""
+        pages = freezer.pages()
+        for endpoint in ['index', 'about', 'resume', 'projects', 'contact', 'thankyou', 'add_project']:
+            assert endpoint in pages
+        assert 'static' not in pages
+        assert 'api.projects' not in pages
+
+    def test_writes_every_page(self, freezer):
+        """Test that a full freeze writes HTML and static files"""
+        result = freezer.freeze()
+        assert result['written'] == result['rendered']
+        assert os.path.exists(os.path.join(freezer.output_dir, 'index.html'))
+        assert os.path.exists(os.path.join(freezer.output_dir, 'projects', 'index.html'))
+        assert os.path.exists(os.path.join(freezer.output_dir, 'static', 'css', 'styles.css'))
+
+    def test_unchanged_pages_are_not_rewritten(self, freezer):
+        """Test that a second build with no changes writes nothing"""
+        freezer.freeze()
+        import app as app_module
+        result = app_module.make_freezer(freezer.output_dir).freeze()
+        assert result['written'] == 0
+
+
+class TestIncrementalFreeze:
+    """Test re-rendering pages affected by DAL writes"""
+
+    def test_affected_endpoints(self, freezer):
+        """Test the dependency lookup"""
+        assert freezer.affected_endpoints('projects') == ['projects']
+        assert freezer.affected_endpoints('unknown') == []
+
+    def test_add_project_rerenders_projects_page(self, freezer, test_dal, sample_project_data):
+        """Test that an inline watcher rewrites only the projects page"""
+        freezer.freeze()
+        about_path = os.path.join(freezer.output_dir, 'about', 'index.html')
+        about_mtime = os.stat(about_path).st_mtime_ns
+
+        freezer.watch(test_dal, background=False)
+        test_dal.add_project(**sample_project_data)
+
+        with open(os.path.join(freezer.output_dir, 'projects', 'index.html')) as f:
+            assert sample_project_data['title'] in f.read()
+        assert os.stat(about_path).st_mtime_ns == about_mtime
+
+    def test_background_rebuild_on_delete(self, freezer, test_dal, sample_project_data):
+        """Test that the background worker picks up deletes"""
+        project_id = test_dal.add_project(**sample_project_data)
+        freezer.freeze()
+        freezer.watch(test_dal)
+
+        test_dal.delete_project(project_id)
+        assert freezer.wait_idle(5)
+
+        with open(os.path.join(freezer.output_dir, 'projects', 'index.html')) as f:
+            assert sample_project_data['title'] not in f.read()
+
+
+    def test_uploaded_image_is_exported(self, app, client, freezer, test_dal, tmp_path, monkeypatch):
+        """Test that an incremental rebuild copies a newly uploaded image but not temp files"""
+        import app as app_module
+        static = str(tmp_path / 'static')
+        shutil.copytree(app.static_folder, static)
+        monkeypatch.setattr(app, 'static_folder', static)
+        monkeypatch.setattr(app_module.image_store, 'root', os.path.join(static, 'images', 'uploads'))
+        freezer.freeze()
+        freezer.watch(test_dal, background=False)
+
+        response = client.post('/add-project', data={
+            'title': 'Uploaded',
+            'description': 'Project with an uploaded image',
+            'image': (io.BytesIO(b'uploaded image'), 'shot.png')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 302
+
+        image = test_dal.get_all_projects()[0]['image_filename']
+        exported = os.path.join(freezer.output_dir, 'static', 'images')
+        with open(os.path.join(freezer.output_dir, 'projects', 'index.html')) as f:
+            assert image in f.read()
+        assert os.path.exists(os.path.join(exported, image))
+        assert not os.path.exists(os.path.join(exported, 'uploads', '.tmp'))
+
+class TestFreezeCommand:
+    """Test the `flask freeze` CLI command"""
+
+    def test_freeze_command(self, runner, test_dal, tmp_path, monkeypatch):
+        """Test that the command builds the site"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+
+        output = str(tmp_path / 'site')
+        result = runner.invoke(args=['freeze', output])
+        assert result.exit_code == 0
+        assert 'Rendered' in result.output
+        assert os.path.exists(os.path.join(output, 'index.html'))
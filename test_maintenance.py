@@ -0,0 +1,178 @@
+"""
+Unit tests for background SQLite maintenance
+Tests the individual steps, idle gating, lock handling and the CLI command
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import pytest
+from DAL import DAL
+from maintenance import DatabaseMaintenance, enable_incremental_vacuum
+
+
+def add_and_delete(dal, count=40):
+    """Add large projects and delete them, leaving free pages behind"""
+    ids = [dal.add_project(title=f'Project {i}', description='x' * 8000,
+                           image_filename='a.png') for i in range(count)]
+    for project_id in ids:
+        dal.delete_project(project_id)
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Database created before incremental vacuum was enabled"""
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE settings (name TEXT PRIMARY KEY, value TEXT)')
+    conn.commit()
+    conn.close()
+    return DAL(db_name=db_path)
+
+
+class TestSteps:
+    """Test optimize, checkpoint and incremental vacuum"""
+
+    def test_run_reports_every_step(self, test_dal):
+        """Test that a run times each step"""
+        report = DatabaseMaintenance(test_dal.db_name).run_once()
+        assert set(report['steps']) == {'optimize', 'checkpoint', 'incremental_vacuum'}
+        assert all(step['seconds'] >= 0 for step in report['steps'].values())
+        assert not report['interrupted']
+
+    def test_incremental_vacuum_reclaims_deleted_space(self, test_dal):
+        """Test that free pages from deleted projects go back to the filesystem"""
+        add_and_delete(test_dal)
+        size_before = os.path.getsize(test_dal.db_name)
+
+        maintenance = DatabaseMaintenance(test_dal.db_name, vacuum_pages=16)
+        report = maintenance.run_once()
+
+        assert report['reclaimed_bytes'] > 0
+        assert report['steps']['incremental_vacuum']['free_bytes'] == 0
+        assert os.path.getsize(test_dal.db_name) == size_before - report['reclaimed_bytes']
+        assert maintenance.stats()['reclaimed_bytes'] == report['reclaimed_bytes']
+
+    def test_vacuum_skipped_without_incremental_mode(self, legacy_db):
+        """Test that an old database only reports its free space"""
+        add_and_delete(legacy_db)
+        result = DatabaseMaintenance(legacy_db.db_name).run_once()['steps']['incremental_vacuum']
+        assert result['skipped'] == 'auto_vacuum=none'
+        assert result['free_bytes'] > 0
+
+    def test_enable_incremental_vacuum(self, legacy_db):
+        """Test converting an old database, after which vacuum runs"""
+        add_and_delete(legacy_db)
+        assert enable_incremental_vacuum(legacy_db.db_name) > 0
+        add_and_delete(legacy_db)
+        assert DatabaseMaintenance(legacy_db.db_name).run_once()['reclaimed_bytes'] > 0
+
+    def test_checkpoint_skipped_outside_wal_mode(self, test_dal):
+        """Test that checkpointing is a no-op for rollback-journal databases"""
+        result = DatabaseMaintenance(test_dal.db_name).run_once()['steps']['checkpoint']
+        assert result['skipped'] == 'journal_mode=delete'
+
+    def test_checkpoint_in_wal_mode(self, test_dal):
+        """Test that WAL frames are checkpointed"""
+        conn = sqlite3.connect(test_dal.db_name)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.close()
+        test_dal.add_project(title='WAL', description='d', image_filename='a.png')
+
+        result = DatabaseMaintenance(test_dal.db_name).run_once()['steps']['checkpoint']
+        assert result['busy'] is False
+        assert result['checkpointed'] == result['wal_frames']
+
+
+class TestIdleGating:
+    """Test that maintenance yields to requests"""
+
+    def test_busy_app_postpones_run(self, test_dal):
+        """Test that no step runs while requests are in flight"""
+        report = DatabaseMaintenance(test_dal.db_name, is_idle=lambda: False).run_once()
+        assert report['interrupted']
+        assert report['steps'] == {}
+
+    def test_vacuum_stops_when_requests_arrive(self, test_dal):
+        """Test that incremental vacuum releases pages only while idle"""
+        add_and_delete(test_dal)
+        checks = iter([True, True, True, True, False])
+        maintenance = DatabaseMaintenance(test_dal.db_name, vacuum_pages=1,
+                                          is_idle=lambda: next(checks, False))
+        result = maintenance.run_once()['steps']['incremental_vacuum']
+        assert result['reclaimed_bytes'] > 0
+        assert result['free_bytes'] > 0
+
+    def test_locked_database_is_retried_later(self, test_dal):
+        """Test that a step blocked by a writer reports an error instead of waiting"""
+        add_and_delete(test_dal)
+        writer = sqlite3.connect(test_dal.db_name, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            report = DatabaseMaintenance(test_dal.db_name).run_once()
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+        assert 'locked' in report['steps']['incremental_vacuum']['error']
+
+    def test_scheduler_runs_in_background(self, test_dal):
+        """Test that the scheduler thread runs maintenance once idle"""
+        add_and_delete(test_dal)
+        maintenance = DatabaseMaintenance(test_dal.db_name, interval=0.01, idle_for=0.01)
+        done = threading.Event()
+        run_once = maintenance.run_once
+
+        def run_and_signal():
+            report = run_once()
+            done.set()
+            return report
+
+        maintenance.run_once = run_and_signal
+        maintenance.start()
+        try:
+            assert done.wait(5)
+        finally:
+            maintenance.stop()
+        assert maintenance.stats()['runs'] >= 1
+        assert maintenance.stats()['reclaimed_bytes'] > 0
+
+    def test_scheduler_logs_each_run(self, test_dal, capsys):
+        """Test that background runs print their duration and reclaimed bytes"""
+        add_and_delete(test_dal)
+        maintenance = DatabaseMaintenance(test_dal.db_name, interval=0.01, idle_for=0.01)
+        maintenance.start()
+        try:
+            deadline = time.monotonic() + 5
+            while maintenance.runs == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            maintenance.stop()
+
+        output = capsys.readouterr().out
+        assert 'Database maintenance run 1:' in output
+        assert 'reclaimed' in output and 'incremental_vacuum:' in output
+
+    def test_stats_in_readyz(self, client, monkeypatch):
+        """Test that /readyz reports the scheduler's totals but not the run reports"""
+        import app as app_module
+        monkeypatch.setattr(app_module.maintenance, 'runs', 2)
+        monkeypatch.setattr(app_module.maintenance, 'reclaimed_bytes', 8192)
+        monkeypatch.setattr(app_module.maintenance, 'history', [{'started': 1700000000.0, 'steps': {}}])
+        stats = client.get('/readyz').get_json()['maintenance']
+        assert stats == {'runs': 2, 'reclaimed_bytes': 8192, 'last_run': 1700000000.0}
+
+
+class TestMaintenanceCommand:
+    """Test the `flask db-maintenance` CLI command"""
+
+    def test_command_reports_steps(self, runner, test_dal, monkeypatch):
+        """Test that the command runs every step and prints reclaimed bytes"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+        add_and_delete(test_dal)
+
+        result = runner.invoke(args=['db-maintenance'])
+        assert result.exit_code == 0
+        assert 'optimize:' in result.output
+        assert 'Reclaimed' in result.output
@@ -0,0 +1,233 @@
+"""
+Unit tests for versioned schema migrations
+Tests adopting existing databases, batched backfills, resuming and the CLI command
+"""
+
+import sqlite3
+import threading
+import pytest
+from DAL import DAL
+from migrations import MIGRATIONS, Backfill, Migration, MigrationRunner, column_names
+
+
+def add_slug_column(conn):
+    if 'slug' not in column_names(conn, 'projects'):
+        conn.execute('ALTER TABLE projects ADD COLUMN slug TEXT')
+
+
+# Example of a migration that rewrites existing rows
+SLUG_MIGRATION = Migration(
+    100, 'add projects.slug', add_slug_column,
+    backfill=Backfill('projects', "UPDATE projects SET slug = lower(replace(title, ' ', '-')) "
+                                  "WHERE id BETWEEN :first AND :last AND slug IS NULL"))
+
+
+def add_projects(dal, count):
+    conn = dal.get_connection()
+    conn.executemany('INSERT INTO projects (title, description, image_filename) VALUES (?, ?, ?)',
+                     [(f'Project {i}', 'Description', 'a.png') for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def slugs(dal):
+    conn = sqlite3.connect(dal.db_name)
+    rows = conn.execute('SELECT slug FROM projects ORDER BY id').fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+class TestSchema:
+    """Test applying schema migrations"""
+
+    def test_new_database_is_at_latest_version(self, test_dal):
+        """Test that every online baseline migration is recorded as applied"""
+        status = MigrationRunner(test_dal.db_name).status()
+        assert [entry['version'] for entry in status] == [m.version for m in MIGRATIONS]
+        assert all(entry['applied'] != entry['offline'] for entry in status)
+
+    def test_offline_migration_needs_offline_runner(self, test_dal):
+        """Test that table-locking migrations are left out of startup"""
+        def indexes():
+            conn = sqlite3.connect(test_dal.db_name)
+            names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+            conn.close()
+            return names
+
+        assert 'idx_projects_created_date' not in indexes()
+        offline = [m.version for m in MIGRATIONS if m.offline]
+        assert MigrationRunner(test_dal.db_name, offline=True).apply_schema() == offline
+        assert 'idx_projects_created_date' in indexes()
+
+    def test_applied_migrations_are_not_rerun(self, test_dal):
+        """Test that a second run applies nothing"""
+        assert MigrationRunner(test_dal.db_name).apply_schema() == []
+
+    def test_untracked_database_is_adopted(self, tmp_path):
+        """Test that a database from before migrations keeps its rows"""
+        db_path = str(tmp_path / 'old.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, '
+                     'description TEXT NOT NULL, image_filename TEXT NOT NULL, category TEXT, '
+                     'technologies TEXT, project_url TEXT, duration TEXT, role TEXT, '
+                     'created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+        conn.execute("INSERT INTO projects (title, description, image_filename) VALUES ('Old', 'd', 'a.png')")
+        conn.commit()
+        conn.close()
+
+        dal = DAL(db_name=db_path)
+        assert dal.get_project_by_id(1)['version'] == 1
+        assert all(entry['applied'] != entry['offline'] for entry in MigrationRunner(db_path).status())
+
+    def test_concurrent_startup_on_new_database(self, tmp_path):
+        """Test that processes opening a new file together each start cleanly"""
+        for trial in range(5):
+            db_path = str(tmp_path / f'race-{trial}.db')
+            barrier = threading.Barrier(4)
+            errors = []
+
+            def start():
+                barrier.wait()
+                try:
+                    DAL(db_name=db_path)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=start) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert errors == []
+            conn = sqlite3.connect(db_path)
+            versions = [row[0] for row in conn.execute('SELECT version FROM schema_migrations')]
+            conn.close()
+            assert versions == [m.version for m in MIGRATIONS if not m.offline]
+
+    def test_failed_migration_rolls_back(self, test_dal):
+        """Test that a failing step leaves no partial schema or version row"""
+        def broken(conn):
+            conn.execute('CREATE TABLE half_done (id INTEGER)')
+            raise RuntimeError('boom')
+
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [Migration(100, 'broken', broken)])
+        with pytest.raises(RuntimeError):
+            runner.apply_schema()
+
+        conn = sqlite3.connect(test_dal.db_name)
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+        conn.close()
+        assert not runner.status()[-1]['applied']
+
+
+class TestBackfill:
+    """Test rewriting rows in batches"""
+
+    def test_backfill_updates_every_row(self, test_dal):
+        """Test that all rows are rewritten across several batches"""
+        add_projects(test_dal, 25)
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [SLUG_MIGRATION],
+                                 batch_size=10, duty_cycle=1.0)
+        runner.apply_schema()
+        stats = runner.run_backfill(SLUG_MIGRATION)
+
+        assert stats['rows'] == 25 and stats['batches'] == 3 and stats['done']
+        assert slugs(test_dal) == [f'project-{i}' for i in range(25)]
+        assert runner.status()[-1]['backfill'] == 'done'
+        assert runner.pending_backfills() == []
+
+    def test_backfill_marks_rows_changed(self, test_dal):
+        """Test that rewritten projects get a new version and a change feed entry"""
+        add_projects(test_dal, 15)
+        seq = test_dal.get_latest_change_seq()
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [SLUG_MIGRATION],
+                                 batch_size=10, duty_cycle=1.0)
+        runner.apply_schema()
+        runner.run_backfill(SLUG_MIGRATION)
+
+        assert {p['version'] for p in test_dal.get_all_projects()} == {2}
+        changes = test_dal.get_changes_since(seq)
+        assert len(changes) == 15 and {c['action'] for c in changes} == {'update'}
+        assert test_dal.get_latest_change_seq() == seq + 15
+
+    def test_backfill_resumes_after_stop(self, test_dal):
+        """Test that progress is committed so a stopped backfill resumes"""
+        add_projects(test_dal, 30)
+        stop = threading.Event()
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [SLUG_MIGRATION], batch_size=10,
+                                 duty_cycle=1.0, progress=lambda progress: stop.set())
+        runner.apply_schema()
+
+        first = runner.run_backfill(SLUG_MIGRATION, stop=stop)
+        assert first['rows'] == 10 and not first['done']
+        assert runner.status()[-1]['backfill'] == 'at id 10'
+
+        runner.progress = None
+        second = runner.run_backfill(SLUG_MIGRATION)
+        assert second['rows'] == 20 and second['done']
+        assert None not in slugs(test_dal)
+
+    def test_backfill_waits_for_writers(self, test_dal):
+        """Test that a held write lock delays the batch instead of failing it"""
+        add_projects(test_dal, 5)
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [SLUG_MIGRATION], busy_timeout=0.01)
+        runner.apply_schema()
+
+        writer = sqlite3.connect(test_dal.db_name, isolation_level=None, check_same_thread=False)
+        writer.execute('BEGIN IMMEDIATE')
+        threading.Timer(0.1, writer.execute, args=('COMMIT',)).start()
+        stats = runner.run_backfill(SLUG_MIGRATION)
+        writer.close()
+
+        assert stats['retries'] > 0 and stats['done']
+        assert len(slugs(test_dal)) == 5 and None not in slugs(test_dal)
+
+    def test_migrate_in_background(self, test_dal):
+        """Test that migrate returns before the backfill finishes"""
+        add_projects(test_dal, 20)
+        runner = MigrationRunner(test_dal.db_name, MIGRATIONS + [SLUG_MIGRATION], batch_size=5)
+        assert runner.migrate(background=True) == [100]
+        assert runner.wait(timeout=5)
+        assert None not in slugs(test_dal)
+
+
+class TestCommand:
+    """Test the flask db-migrate command"""
+
+    def test_status_lists_migrations(self, runner, test_dal, monkeypatch):
+        """Test that --status prints online migrations as applied and offline ones as pending"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+
+        result = runner.invoke(args=['db-migrate', '--status'])
+        assert result.exit_code == 0
+        for migration in MIGRATIONS:
+            state = '[pending, needs --offline]' if migration.offline else '[applied]'
+            assert f'{migration.name}  {state}' in result.output
+
+    def test_offline_command_applies_offline_migrations(self, runner, test_dal, monkeypatch):
+        """Test that --offline applies the migrations skipped at startup"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+
+        result = runner.invoke(args=['db-migrate', '--offline'])
+        assert result.exit_code == 0
+        for migration in MIGRATIONS:
+            if migration.offline:
+                assert f'Applied migration {migration.version}' in result.output
+        assert 'pending' not in result.output
+
+    def test_command_runs_backfills(self, runner, test_dal, monkeypatch):
+        """Test that the command applies the schema and backfills rows"""
+        import app as app_module
+        import migrations
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+        monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS + [SLUG_MIGRATION])
+        add_projects(test_dal, 12)
+
+        result = runner.invoke(args=['db-migrate', '--batch-size', '5', '--duty-cycle', '1'])
+        assert result.exit_code == 0
+        assert 'Applied migration 100' in result.output
+        assert 'Backfilled 12 rows in 3 batches' in result.output
+        assert 'backfill done' in result.output
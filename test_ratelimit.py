@@ -0,0 +1,196 @@
+"""
+Unit tests for token-bucket rate limiting
+Tests the bucket math, both stores and the Flask integration
+"""
+
+import os
+import tempfile
+import pytest
+from ratelimit import Bucket, MemoryStore, RateLimiter, SQLiteStore
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, clock):
+    """Each store implementation driven by the fake clock"""
+    if request.param == 'memory':
+        yield MemoryStore(clock=clock)
+    else:
+        db_fd, db_path = tempfile.mkstemp()
+        yield SQLiteStore(db_path, clock=clock)
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+class TestBucketStores:
+    """Test token consumption and refill on both stores"""
+
+    def test_burst_up_to_capacity(self, store):
+        """Test that a fresh bucket allows a full burst"""
+        bucket = Bucket(rate=1, capacity=3)
+        results = [store.consume('k', bucket)[0] for _ in range(4)]
+        assert results == [True, True, True, False]
+
+    def test_refill_over_time(self, store, clock):
+        """Test that tokens come back at the configured rate"""
+        bucket = Bucket(rate=1, capacity=2)
+        store.consume('k', bucket)
+        store.consume('k', bucket)
+        assert store.consume('k', bucket)[0] is False
+
+        clock.now += 1.0
+        allowed, remaining = store.consume('k', bucket)
+        assert allowed is True
+        assert remaining == pytest.approx(0.0)
+
+    def test_keys_are_independent(self, store):
+        """Test that buckets with different keys do not share tokens"""
+        bucket = Bucket(rate=1, capacity=1)
+        assert store.consume('a', bucket)[0] is True
+        assert store.consume('b', bucket)[0] is True
+        assert store.consume('a', bucket)[0] is False
+
+    def test_reset_refills_everything(self, store):
+        """Test that reset forgets all bucket state"""
+        bucket = Bucket(rate=1, capacity=1)
+        store.consume('k', bucket)
+        store.reset()
+        assert store.consume('k', bucket)[0] is True
+
+
+    def test_refund_returns_tokens(self, store):
+        """Test that a refund gives a token back, up to capacity"""
+        bucket = Bucket(rate=0.001, capacity=2)
+        store.consume('k', bucket)
+        store.consume('k', bucket)
+        store.refund('k', bucket)
+        store.refund('k', bucket)
+        store.refund('k', bucket)
+        assert [store.consume('k', bucket)[0] for _ in range(3)] == [True, True, False]
+
+class TestMemoryStoreExpiry:
+    """Test that idle buckets are evicted from the in-memory store"""
+
+    def test_idle_buckets_are_evicted(self, clock):
+        """Test that buckets idle past their TTL are dropped"""
+        store = MemoryStore(clock=clock)
+        bucket = Bucket(rate=1, capacity=2)
+        store.consume('old', bucket)
+        clock.now += 10
+        store.consume('new', bucket)
+        assert len(store) == 1
+
+
+class TestSQLiteStoreExpiry:
+    """Test purging of idle buckets from the shared store"""
+
+    def test_purge_expired(self, clock):
+        """Test that purge removes only expired buckets"""
+        db_fd, db_path = tempfile.mkstemp()
+        store = SQLiteStore(db_path, clock=clock)
+        bucket = Bucket(rate=1, capacity=2)
+        store.consume('old', bucket)
+        clock.now += 10
+        store.consume('new', bucket)
+
+        assert store.purge_expired() == 1
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    def test_consume_purges_periodically(self, clock):
+        """Test that consume deletes expired buckets every purge interval, in bounded batches"""
+        db_fd, db_path = tempfile.mkstemp()
+        store = SQLiteStore(db_path, clock=clock, purge_interval=30, purge_limit=2)
+        bucket = Bucket(rate=1, capacity=2)
+        for i in range(5):
+            store.consume(f'ip:{i}', bucket)
+        clock.now += 10
+        store.consume('recent', bucket)
+
+        def count():
+            return store.get_connection().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+        assert count() == 6
+        clock.now += 25
+        store.consume('recent', bucket)
+        assert count() == 4
+        clock.now += 31
+        store.consume('recent', bucket)
+        assert count() == 2
+        os.close(db_fd)
+        os.unlink(db_path)
+
+
+class TestRateLimiter:
+    """Test per-IP and global limits together"""
+
+    def test_per_ip_limit(self, clock):
+        """Test that one client is throttled without affecting others"""
+        limiter = RateLimiter(MemoryStore(clock=clock), per_ip=Bucket(1, 2),
+                              global_bucket=Bucket(10, 100), endpoints=['contact'])
+        assert limiter.hit('1.1.1.1')['allowed'] is True
+        assert limiter.hit('1.1.1.1')['allowed'] is True
+        assert limiter.hit('1.1.1.1')['allowed'] is False
+        assert limiter.hit('2.2.2.2')['allowed'] is True
+
+    def test_global_limit(self, clock):
+        """Test that the global bucket caps all clients combined"""
+        limiter = RateLimiter(MemoryStore(clock=clock), per_ip=Bucket(1, 5),
+                              global_bucket=Bucket(1, 2), endpoints=['contact'])
+        assert limiter.hit('1.1.1.1')['allowed'] is True
+        assert limiter.hit('2.2.2.2')['allowed'] is True
+        result = limiter.hit('3.3.3.3')
+        assert result['allowed'] is False
+        assert result['limit'] == 2
+        assert result['retry_after'] >= 1
+
+
+    def test_global_denial_refunds_client(self, store, clock):
+        """Test that requests refused globally do not use up the client's own tokens"""
+        limiter = RateLimiter(store, per_ip=Bucket(0.001, 2),
+                              global_bucket=Bucket(1, 1), endpoints=['contact'])
+        assert limiter.hit('1.1.1.1')['allowed'] is True
+        for _ in range(5):
+            assert limiter.hit('2.2.2.2')['allowed'] is False
+
+        for _ in range(2):
+            clock.now += 1.0
+            assert limiter.hit('2.2.2.2')['allowed'] is True
+
+class TestRateLimitRoutes:
+    """Test rate limiting on the Flask write endpoints"""
+
+    def test_post_includes_rate_limit_headers(self, client):
+        """Test that throttled endpoints report their budget"""
+        response = client.post('/contact', data={'firstName': ''})
+        assert response.headers['RateLimit-Limit'] == '10'
+        assert 'RateLimit-Remaining' in response.headers
+        assert 'RateLimit-Reset' in response.headers
+
+    def test_get_is_not_limited(self, client):
+        """Test that GET requests are not charged"""
+        response = client.get('/contact')
+        assert 'RateLimit-Limit' not in response.headers
+
+    def test_flood_returns_429(self, client):
+        """Test that exceeding the per-IP burst returns 429 with Retry-After"""
+        statuses = [client.post('/contact', data={}).status_code for _ in range(11)]
+        assert statuses[:10] == [200] * 10
+        assert statuses[10] == 429
+
+        response = client.post('/contact', data={})
+        assert int(response.headers['Retry-After']) >= 1
@@ -0,0 +1,134 @@
+"""
+Unit tests for startup warmup and the health endpoints
+Tests warmup steps, failure reporting, /healthz, /readyz and admission exemption
+"""
+
+import time
+import pytest
+from readiness import Warmup, compile_templates, request_pages
+
+
+@pytest.fixture
+def app_warmup(app, test_dal, monkeypatch):
+    """The app's warmup, reset to not started, over a test database"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    warmup = app_module.warmup
+    monkeypatch.setattr(warmup, 'state', 'pending')
+    monkeypatch.setattr(warmup, 'report', {})
+    monkeypatch.setattr(warmup, 'seconds', None)
+    monkeypatch.setattr(warmup, 'attempts', 0)
+    return warmup
+
+
+class TestWarmup:
+    """Test running warmup steps"""
+
+    def test_steps_run_in_order(self):
+        """Test that each step runs once and its result is reported"""
+        calls = []
+        warmup = Warmup([('a', lambda: calls.append('a') or 1), ('b', lambda: calls.append('b') or 2)])
+        assert not warmup.ready
+
+        status = warmup.run()
+        assert calls == ['a', 'b']
+        assert warmup.ready
+        assert status['status'] == 'ready'
+        assert [status['steps'][name]['result'] for name in ('a', 'b')] == [1, 2]
+
+    def test_failed_step_stops_warmup(self):
+        """Test that a failing step leaves the app not ready"""
+        def broken():
+            raise RuntimeError('database unavailable')
+
+        calls = []
+        warmup = Warmup([('database', broken), ('pages', lambda: calls.append('pages'))])
+        status = warmup.run()
+        assert status['status'] == 'failed' and not warmup.ready
+        assert status['steps']['database']['error'] == 'database unavailable'
+        assert calls == []
+
+    def test_background_warmup(self):
+        """Test that start() warms up on a thread and wait() reports the result"""
+        warmup = Warmup([('noop', lambda: None)])
+        warmup.start()
+        assert warmup.wait(timeout=5)
+
+    def test_background_warmup_retries_failures(self, capsys):
+        """Test that a failed background warmup is retried until it succeeds"""
+        failures = [RuntimeError('database locked')] * 2
+
+        def flaky():
+            if failures:
+                raise failures.pop()
+            return 1
+
+        warmup = Warmup([('database', flaky)], retry_delay=0.01)
+        warmup.start()
+        assert warmup.wait(timeout=5)
+        status = warmup.status()
+        assert status['attempts'] == 3 and status['steps']['database']['result'] == 1
+        assert 'Warmup attempt 2 failed (database: database locked)' in capsys.readouterr().out
+
+    def test_stop_ends_retries(self):
+        """Test that stop() ends the retry loop of a warmup that keeps failing"""
+        def broken():
+            raise RuntimeError('database unavailable')
+
+        warmup = Warmup([('database', broken)], retry_delay=0.01, max_retry_delay=0.02)
+        warmup.start()
+        time.sleep(0.1)
+        warmup.stop()
+        assert warmup.status()['status'] == 'failed' and warmup.attempts > 1
+
+    def test_compile_templates(self, app):
+        """Test that every HTML template is compiled"""
+        assert compile_templates(app) == len(app.jinja_env.list_templates(extensions=['html']))
+
+    def test_request_pages_rejects_errors(self, app):
+        """Test that a page that does not answer 200 fails the step"""
+        with pytest.raises(RuntimeError):
+            request_pages(app, ['/no-such-page'])
+
+
+class TestEndpoints:
+    """Test /healthz and /readyz"""
+
+    def test_healthz_always_ok(self, client, app_warmup):
+        """Test that liveness does not wait for the warmup"""
+        response = client.get('/healthz')
+        assert response.status_code == 200
+        assert response.get_json() == {'status': 'ok'}
+
+    def test_readyz_before_warmup(self, client, app_warmup):
+        """Test that readiness fails until the warmup has run"""
+        response = client.get('/readyz')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert response.get_json()['status'] == 'pending'
+
+    def test_readyz_after_warmup(self, client, app, app_warmup, test_dal):
+        """Test that the app warmup primes the caches and reports ready"""
+        import app as app_module
+        test_dal.add_project(title='Warm', description='Description', image_filename='a.png')
+
+        status = app_warmup.run()
+        assert status['status'] == 'ready', status
+        assert status['steps']['database']['result'] == 1
+        assert status['steps']['pages']['result'] >= 5
+        assert len(app_module.row_cache) == 1
+
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'ready'
+
+    def test_probes_bypass_admission(self, app):
+        """Test that probes never queue or get shed with the pages"""
+        assert app.wsgi_app.budget_for('GET', '/healthz') is None
+        assert app.wsgi_app.budget_for('GET', '/readyz') is None
+
+    def test_probes_not_frozen(self):
+        """Test that the static export skips the probe endpoints"""
+        import app as app_module
+        pages = app_module.make_freezer('build').pages()
+        assert 'healthz' not in pages and 'readyz' not in pages
@@ -184,6 +184,25 @@ class TestAddProjectRoute:
         }, follow_redirects=True)
         
         assert response.status_code == 200
+    
+    def test_add_project_succeeds_when_listener_fails(self, client, test_dal, monkeypatch):
+        """Test that a saved project is reported as added even if a listener raises"""
+        def broken(action, project_id):
+            raise RuntimeError('listener down')
+        
+        test_dal.add_listener(broken)
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+        
+        response = client.post('/add-project', data={
+            'title': 'Listener Project',
+            'description': 'Description',
+            'image_filename': 'image.jpg'
+        }, follow_redirects=True)
+        
+        html = response.data.decode()
+        assert 'added successfully' in html
+        assert 'Error adding project' not in html
 
 
 class TestErrorHandling:
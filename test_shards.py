@@ -0,0 +1,231 @@
+"""
+Unit tests for sharded multi-portfolio storage
+Tests routing, the connection LRU, cross-shard queries and thread safety
+"""
+
+import os
+import sqlite3
+import threading
+import pytest
+from shards import ShardDAL, ShardRouter, ShardedDAL
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    """Sharded DAL over a temporary directory with a small LRU"""
+    dal = ShardedDAL(str(tmp_path / 'shards'), max_open=2)
+    yield dal
+    dal.close()
+
+
+def add(dal, title):
+    return dal.add_project(title=title, description='Description', image_filename='a.png')
+
+
+class TestRouter:
+    """Test mapping portfolios to files"""
+
+    def test_path_is_stable_and_bucketed(self, tmp_path):
+        """Test that a portfolio always maps to the same bucketed file"""
+        router = ShardRouter(str(tmp_path), fanout=16)
+        path = router.path_for('alice')
+        assert path == ShardRouter(str(tmp_path), fanout=16).path_for('alice')
+        assert path.endswith(os.sep + 'alice.db')
+        assert 0 <= int(os.path.basename(os.path.dirname(path))) < 16
+
+    @pytest.mark.parametrize('name', ['', '../etc', 'Alice', 'a/b', 'a' * 65, '-x'])
+    def test_invalid_names_rejected(self, tmp_path, name):
+        """Test that names that are not safe file names are refused"""
+        with pytest.raises(ValueError):
+            ShardRouter(str(tmp_path)).path_for(name)
+
+    def test_lists_portfolios(self, sharded):
+        """Test that every created shard is listed"""
+        for name in ('carol', 'alice', 'bob'):
+            sharded.portfolio(name)
+        assert sharded.portfolios() == ['alice', 'bob', 'carol']
+
+
+class TestIsolation:
+    """Test that portfolios do not see each other's data"""
+
+    def test_projects_stay_in_their_shard(self, sharded):
+        """Test that each portfolio only returns its own projects"""
+        add(sharded.portfolio('alice'), 'Alice project')
+        add(sharded.portfolio('bob'), 'Bob project')
+        assert [p['title'] for p in sharded.portfolio('alice').get_all_projects()] == ['Alice project']
+        assert [p['title'] for p in sharded.portfolio('bob').get_all_projects()] == ['Bob project']
+
+    def test_missing_portfolio_without_create(self, sharded):
+        """Test that create=False does not make new shards"""
+        with pytest.raises(KeyError):
+            sharded.portfolio('nobody', create=False)
+        assert sharded.portfolios() == []
+
+    def test_listeners_get_portfolio(self, sharded):
+        """Test that write notifications say which portfolio changed"""
+        events = []
+        sharded.add_listener(lambda *event: events.append(event))
+        project_id = add(sharded.portfolio('alice'), 'Alice project')
+        assert events == [('alice', 'add', project_id)]
+
+
+class TestLRU:
+    """Test the bounded set of open shards"""
+
+    def test_open_shards_are_bounded(self, sharded):
+        """Test that the least recently used shard is closed"""
+        alice = sharded.portfolio('alice')
+        sharded.portfolio('bob')
+        sharded.portfolio('alice')
+        sharded.portfolio('carol')
+
+        assert sharded.stats()['open'] == 2
+        assert sharded.stats()['evictions'] == 1
+        assert sharded.portfolio('alice') is alice
+
+    def test_evicted_dal_keeps_working(self, sharded):
+        """Test that a reference held across eviction still reads and writes"""
+        alice = sharded.portfolio('alice')
+        sharded.portfolio('bob')
+        sharded.portfolio('carol')
+
+        add(alice, 'After eviction')
+        assert sharded.portfolio('alice').get_all_projects()[0]['title'] == 'After eviction'
+
+    def test_reopened_shard_is_not_migrated_again(self, sharded):
+        """Test that only the first open of a shard runs the migrations"""
+        assert sharded.portfolio('alice').migrate
+        sharded.portfolio('bob')
+        sharded.portfolio('carol')
+        assert not sharded.portfolio('alice').migrate
+
+    def test_new_portfolio_opened_concurrently(self, sharded):
+        """Test that threads opening the same new portfolio together all succeed"""
+        barrier = threading.Barrier(6)
+        results, errors = [], []
+
+        def open_portfolio():
+            barrier.wait()
+            try:
+                results.append(sharded.portfolio('acme'))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=open_portfolio) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len({id(dal) for dal in results}) == 1
+        assert sharded.portfolio('acme').get_all_projects() == []
+
+    def test_connection_is_reused(self, tmp_path):
+        """Test that a shard keeps one connection across calls"""
+        dal = ShardDAL(str(tmp_path / 'alice.db'))
+        first = dal.get_connection()
+        first.close()
+        second = dal.get_connection()
+        second.close()
+        assert first is second
+        dal.close()
+
+    def test_uncommitted_work_is_rolled_back(self, tmp_path):
+        """Test that handing a connection back drops an unfinished transaction"""
+        dal = ShardDAL(str(tmp_path / 'alice.db'))
+        conn = dal.get_connection()
+        conn.execute("INSERT INTO projects (title, description, image_filename) VALUES ('x', 'y', 'z')")
+        conn.close()
+        assert dal.get_all_projects() == []
+        dal.close()
+
+    def test_failed_write_releases_connection(self, tmp_path):
+        """Test that a statement that raises does not lock other callers out"""
+        dal = ShardDAL(str(tmp_path / 'alice.db'))
+        with pytest.raises(sqlite3.IntegrityError):
+            dal.add_project(title=None, description='Description', image_filename='a.png')
+
+        results = []
+        reader = threading.Thread(target=lambda: results.append(dal.get_all_projects()), daemon=True)
+        reader.start()
+        reader.join(timeout=5)
+        assert results == [[]]
+        add(dal, 'After failure')
+        assert [p['title'] for p in dal.get_all_projects()] == ['After failure']
+        dal.close()
+
+    def test_concurrent_writes_to_one_shard(self, sharded):
+        """Test that threads sharing a shard connection do not interfere"""
+        alice = sharded.portfolio('alice')
+
+        def writer(n):
+            for i in range(20):
+                add(alice, f'{n}-{i}')
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(alice.get_all_projects()) == 80
+
+
+class TestCrossShard:
+    """Test queries across portfolios"""
+
+    def test_recent_projects_merged(self, sharded):
+        """Test that projects from all shards are merged newest first"""
+        for second, name in enumerate(('alice', 'bob', 'carol')):
+            dal = sharded.portfolio(name)
+            for i in range(3):
+                project_id = add(dal, f'{name} {i}')
+                conn = dal.get_connection()
+                conn.execute('UPDATE projects SET created_date = ? WHERE id = ?',
+                             (f'2024-01-0{i + 1} 00:00:0{second}', project_id))
+                conn.commit()
+                conn.close()
+
+        recent = sharded.get_recent_projects(limit=4)
+        assert [(p['portfolio'], p['title']) for p in recent] == [
+            ('carol', 'carol 2'), ('bob', 'bob 2'), ('alice', 'alice 2'), ('carol', 'carol 1')]
+        assert len(sharded.get_all_projects()) == 9
+
+    def test_recent_projects_limited_per_shard(self, sharded, monkeypatch):
+        """Test that each shard is only asked for the newest `limit` rows"""
+        for name in ('alice', 'bob'):
+            for i in range(5):
+                add(sharded.portfolio(name), f'{name} {i}')
+        limits = []
+        original = ShardDAL.get_all_projects
+        monkeypatch.setattr(ShardDAL, 'get_all_projects',
+                            lambda dal, limit=None: limits.append(limit) or original(dal, limit))
+
+        assert len(sharded.get_recent_projects(limit=3)) == 3
+        assert limits == [3, 3]
+
+    def test_closed_shards_read_without_opening(self, sharded):
+        """Test that fan-out reads leave the LRU alone"""
+        for name in ('alice', 'bob', 'carol', 'dave'):
+            add(sharded.portfolio(name), name)
+        before = sharded.stats()
+
+        assert sharded.count_projects() == {'alice': 1, 'bob': 1, 'carol': 1, 'dave': 1}
+        after = sharded.stats()
+        assert after['misses'] == before['misses'] and after['open'] == 2
+
+    def test_fan_out_reads_cannot_write(self, sharded):
+        """Test that shards read outside the LRU are opened read-only"""
+        for name in ('alice', 'bob', 'carol'):
+            sharded.portfolio(name)
+
+        def write(dal):
+            conn = dal.get_connection()
+            try:
+                conn.execute("INSERT INTO projects (title, description, image_filename) VALUES ('x', 'y', 'z')")
+            finally:
+                conn.close()
+
+        with pytest.raises(sqlite3.OperationalError):
+            sharded.map(write, ['alice'])
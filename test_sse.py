@@ -0,0 +1,146 @@
+"""
+Tests for live project updates over Server-Sent Events
+Tests event encoding, the asyncio stream server and the row fragment route
+"""
+
+import json
+import socket
+import threading
+import time
+import pytest
+from sse import ChangeFeedHub, SSEServer, STREAM_PATH, format_event, parse_last_event_id
+
+
+def open_stream(port, last_event_id=None):
+    """Connect to the stream server and send the request head"""
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    head = f'GET {STREAM_PATH} HTTP/1.1\r\nHost: localhost\r\n'
+    if last_event_id is not None:
+        head += f'Last-Event-ID: {last_event_id}\r\n'
+    sock.sendall((head + '\r\n').encode())
+    return sock
+
+
+def read_until(sock, marker, timeout=5):
+    """Read from a socket until marker has been received"""
+    data = b''
+    deadline = time.monotonic() + timeout
+    while marker not in data:
+        if time.monotonic() > deadline:
+            raise AssertionError(f'{marker!r} not received, got {data!r}')
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+@pytest.fixture
+def stream_server(test_dal):
+    """Stream server on a free port tailing the test DAL"""
+    hub = ChangeFeedHub(test_dal, poll_interval=0.05)
+    test_dal.add_listener(hub.notify)
+    server = SSEServer(hub, host='127.0.0.1', port=0)
+    server.start_in_thread()
+    yield server
+    server.stop()
+
+
+class TestEventEncoding:
+    """Test SSE message formatting and resume parsing"""
+
+    def test_format_event(self):
+        """Test that events carry id, event type and JSON data"""
+        message = format_event({'seq': 7, 'action': 'add', 'project_id': 3, 'project': None})
+        lines = message.decode().split('\n')
+        assert lines[0] == 'id: 7'
+        assert lines[1] == 'event: add'
+        assert json.loads(lines[2][len('data: '):])['project_id'] == 3
+        assert message.endswith(b'\n\n')
+
+    def test_parse_last_event_id_header(self):
+        """Test that the Last-Event-ID header wins"""
+        assert parse_last_event_id({'last-event-id': '12'}, 'lastEventId=3') == 12
+
+    def test_parse_last_event_id_query(self):
+        """Test the query string fallback and bad values"""
+        assert parse_last_event_id({}, 'lastEventId=3') == 3
+        assert parse_last_event_id({}, 'lastEventId=abc') is None
+        assert parse_last_event_id({}, '') is None
+
+
+class TestStreamServer:
+    """Test the asyncio event stream server"""
+
+    def test_unknown_path_is_404(self, stream_server):
+        """Test that only the stream path is served"""
+        sock = socket.create_connection(('127.0.0.1', stream_server.port), timeout=5)
+        sock.sendall(b'GET /other HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        assert read_until(sock, b'\r\n\r\n').startswith(b'HTTP/1.1 404')
+        sock.close()
+
+    def test_live_event_delivered(self, stream_server, test_dal, sample_project_data):
+        """Test that a DAL write reaches a connected subscriber"""
+        sock = open_stream(stream_server.port)
+        read_until(sock, b'retry: 3000')
+        while not stream_server.hub.subscribers:
+            time.sleep(0.01)
+
+        project_id = test_dal.add_project(**sample_project_data)
+        data = read_until(sock, b'}\n\n')
+        assert b'event: add' in data
+        assert f'"project_id":{project_id}'.encode() in data
+        assert sample_project_data['title'].encode() in data
+        sock.close()
+
+    def test_resume_with_last_event_id(self, stream_server, test_dal):
+        """Test that a reconnecting client replays missed changes"""
+        first = test_dal.add_project(title='One', description='d', image_filename='1.png')
+        test_dal.add_project(title='Two', description='d', image_filename='2.png')
+        test_dal.delete_project(first)
+        while stream_server.hub.last_seq < 3:
+            time.sleep(0.01)
+
+        sock = open_stream(stream_server.port, last_event_id=1)
+        data = read_until(sock, b'event: delete')
+        assert b'id: 1\n' not in data
+        assert b'id: 2\n' in data
+        assert b'id: 3\n' in data
+        sock.close()
+
+    def test_idle_subscribers_share_one_thread(self, stream_server):
+        """Test that many idle connections do not create threads"""
+        threads_before = threading.active_count()
+        sockets = [open_stream(stream_server.port) for _ in range(200)]
+        for sock in sockets:
+            read_until(sock, b'retry: 3000')
+
+        assert len(stream_server.hub.subscribers) == 200
+        assert threading.active_count() <= threads_before + 1
+        for sock in sockets:
+            sock.close()
+
+
+class TestRowFragmentRoute:
+    """Test the single-row endpoint used by live updates"""
+
+    def test_row_fragment(self, client, populated_dal, monkeypatch):
+        """Test that one rendered row is returned"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', populated_dal)
+
+        response = client.get('/projects/rows/1')
+        assert response.status_code == 200
+        assert b'data-project-id="1"' in response.data
+        assert b'<tbody' not in response.data
+
+    def test_row_fragment_missing(self, client, test_dal, monkeypatch):
+        """Test that an unknown project is a 404"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'dal', test_dal)
+        assert client.get('/projects/rows/999').status_code == 404
+
+    def test_live_updates_off_by_default(self, client):
+        """Test that no EventSource script is rendered without a stream URL"""
+        response = client.get('/projects')
+        assert b'EventSource' not in response.data
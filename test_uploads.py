@@ -0,0 +1,161 @@
+"""
+Tests for streaming image uploads on /add-project
+Tests content-addressed storage, deduplication, size limits and memory use
+"""
+
+import hashlib
+import io
+import os
+import tracemalloc
+import pytest
+from uploads import HashingFile, ImageStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the app's image store at a temporary directory"""
+    import app as app_module
+    root = str(tmp_path / 'images' / 'uploads')
+    monkeypatch.setattr(app_module.image_store, 'root', root)
+    return app_module.image_store
+
+
+@pytest.fixture
+def upload_dal(test_dal, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'dal', test_dal)
+    return test_dal
+
+
+def post_project(client, data: bytes, filename: str = 'shot.png', title: str = 'Upload Project'):
+    return client.post('/add-project', data={
+        'title': title,
+        'description': 'Project with an uploaded image',
+        'image': (io.BytesIO(data), filename)
+    }, content_type='multipart/form-data')
+
+
+class TestHashingFile:
+    """Test the hashing temporary file"""
+
+    def test_hashes_while_writing(self, tmp_path):
+        """Test that digest and size match the written data"""
+        f = HashingFile(str(tmp_path), max_bytes=100)
+        f.write(b'hello ')
+        f.write(b'world')
+        assert f.size == 11
+        assert f.hexdigest() == hashlib.sha256(b'hello world').hexdigest()
+        f.close()
+
+    def test_limit_trips_mid_stream(self, tmp_path):
+        """Test that the size limit raises as soon as it is crossed"""
+        from werkzeug.exceptions import RequestEntityTooLarge
+        f = HashingFile(str(tmp_path), max_bytes=10)
+        f.write(b'12345')
+        with pytest.raises(RequestEntityTooLarge):
+            f.write(b'678901')
+        assert os.listdir(str(tmp_path)) == []
+
+
+class TestImageUpload:
+    """Test uploading project images"""
+
+    def test_upload_is_stored_by_hash(self, client, store, upload_dal):
+        """Test that the image is stored under its SHA-256 and recorded in the DAL"""
+        data = b'\x89PNG fake image bytes'
+        digest = hashlib.sha256(data).hexdigest()
+
+        response = post_project(client, data)
+        assert response.status_code == 302
+
+        project = upload_dal.get_all_projects()[0]
+        assert project['image_filename'] == f'uploads/{digest[:2]}/{digest}.png'
+        with open(os.path.join(store.root, digest[:2], f'{digest}.png'), 'rb') as f:
+            assert f.read() == data
+
+    def test_stored_image_is_world_readable(self, client, store, upload_dal):
+        """Test that stored images get the umask mode, not the temp file's 0600"""
+        from uploads import FILE_MODE
+        data = b'readable image'
+        post_project(client, data)
+
+        digest = hashlib.sha256(data).hexdigest()
+        mode = os.stat(os.path.join(store.root, digest[:2], f'{digest}.png')).st_mode & 0o777
+        assert mode == FILE_MODE
+
+    def test_identical_uploads_are_deduplicated(self, client, store, upload_dal):
+        """Test that the same bytes are stored once and shared"""
+        data = b'same image content'
+        post_project(client, data, 'a.png', title='First')
+        post_project(client, data, 'b.PNG', title='Second')
+
+        filenames = {p['image_filename'] for p in upload_dal.get_all_projects()}
+        assert len(filenames) == 1
+        digest = hashlib.sha256(data).hexdigest()
+        assert os.listdir(os.path.join(store.root, digest[:2])) == [f'{digest}.png']
+
+    def test_temp_files_are_removed(self, client, store, upload_dal):
+        """Test that no partial uploads are left behind"""
+        post_project(client, b'image')
+        post_project(client, b'image', 'bad.exe')
+        assert os.listdir(os.path.join(store.root, '.tmp')) == []
+
+    def test_disallowed_extension(self, client, store, upload_dal):
+        """Test that non-image files are rejected with a form error"""
+        response = post_project(client, b'MZ...', 'virus.exe')
+        assert response.status_code == 200
+        assert b'Image must be one of' in response.data
+        assert upload_dal.get_all_projects() == []
+
+    def test_filename_still_accepted(self, client, store, upload_dal):
+        """Test that an existing image filename works without an upload"""
+        response = client.post('/add-project', data={
+            'title': 'Existing Image',
+            'description': 'Uses a file already in static/images',
+            'image_filename': 'LoviSC.png'
+        })
+        assert response.status_code == 302
+        assert upload_dal.get_all_projects()[0]['image_filename'] == 'LoviSC.png'
+
+    def test_oversized_file_is_413(self, client, store, upload_dal, monkeypatch):
+        """Test that the per-file limit rejects large uploads"""
+        monkeypatch.setattr(store, 'max_bytes', 1024)
+        response = post_project(client, b'x' * 4096)
+        assert response.status_code == 413
+        assert upload_dal.get_all_projects() == []
+
+    def test_content_length_checked_before_reading(self, app, client, store, upload_dal, monkeypatch):
+        """Test that a declared oversized body is rejected up front"""
+        monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1024)
+        response = post_project(client, b'x' * 4096)
+        assert response.status_code == 413
+
+
+class TestUploadMemory:
+    """Test that large uploads are streamed rather than buffered"""
+
+    def test_large_upload_memory_is_bounded(self, app, client, store, upload_dal, tmp_path, monkeypatch):
+        """Test that a 32 MB upload peaks far below its own size in memory"""
+        size = 32 * 1024 * 1024
+        source = tmp_path / 'large.png'
+        with open(source, 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size // len(block)):
+                f.write(block)
+
+        monkeypatch.setattr(store, 'max_bytes', size)
+        monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', size + 1024 * 1024)
+        with open(source, 'rb') as f:
+            tracemalloc.start()
+            response = client.post('/add-project', data={
+                'title': 'Large Upload',
+                'description': 'A very large image',
+                'image': (f, 'large.png')
+            }, content_type='multipart/form-data')
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        assert response.status_code == 302
+        assert peak < 4 * 1024 * 1024
+        stored = os.path.join(store.root, '..', upload_dal.get_all_projects()[0]['image_filename'])
+        assert os.path.getsize(stored) == size
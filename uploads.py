@@ -0,0 +1,162 @@
+"""
+Streaming image uploads for the Flask Portfolio Website
+Multipart file parts are written to disk chunk by chunk while being hashed,
+then stored content-addressed so identical images are kept only once
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_mode() -> int:
+    """Mode a regular file created by this process gets (0644 under umask 022)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Temporary files are created 0600 and a hard link keeps that mode, so
+# stored images are opened up to the normal mode before linking
+FILE_MODE = _file_mode()
+
+
+class HashingFile:
+    """
+    Temporary file that hashes and counts bytes as they are written
+
+    The multipart parser writes each chunk as it arrives, so the upload is
+    never held in memory and the size limit trips as soon as it is crossed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Open a temporary file (deleted automatically when closed)
+
+        Args:
+            directory: Directory for the temporary file (same filesystem as the store)
+            max_bytes: Maximum size of this file
+        """
+        self.file = tempfile.NamedTemporaryFile(dir=directory, prefix='.upload-')
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.file.close()
+            raise RequestEntityTooLarge(f'Uploaded file exceeds {self.max_bytes} bytes')
+        self._hash.update(data)
+        return self.file.write(data)
+
+    def hexdigest(self) -> str:
+        """SHA-256 of everything written so far"""
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class ImageStore:
+    """Content-addressed image storage under static/images/uploads"""
+
+    def __init__(self, root: str, max_bytes: int = 10 * 1024 * 1024):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory for stored images (a direct child of static/images)
+            max_bytes: Maximum size of a single uploaded image
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def open_temp(self) -> HashingFile:
+        """
+        Open a temporary upload file on the same filesystem as the store
+
+        Returns:
+            HashingFile: Writable, hashing temporary file
+        """
+        tmp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        return HashingFile(tmp_dir, self.max_bytes)
+
+    def init_app(self, app: Flask):
+        """
+        Make the app stream file uploads through this store
+
+        Also sets MAX_CONTENT_LENGTH so oversized requests that declare a
+        Content-Length are rejected with 413 before any body is read.
+
+        Args:
+            app: Flask application
+        """
+        store = self
+
+        class UploadRequest(app.request_class):
+            def _get_file_stream(self, total_content_length, content_type,
+                                 filename=None, content_length=None):
+                return store.open_temp()
+
+        app.request_class = UploadRequest
+        app.config['MAX_CONTENT_LENGTH'] = self.max_bytes + 1024 * 1024
+
+    def save(self, upload: FileStorage) -> str:
+        """
+        Store an uploaded image, reusing an existing copy with the same content
+
+        Args:
+            upload: File from request.files
+
+        Returns:
+            str: Image path relative to static/images (for DAL.add_project)
+
+        Raises:
+            ValueError: If the file type is not allowed or the file is empty
+        """
+        extension = os.path.splitext(upload.filename or '')[1].lower().lstrip('.')
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError(f"Image must be one of: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
+
+        stream = upload.stream
+        if not isinstance(stream, HashingFile):
+            stream = self._spool(stream)
+        if stream.size == 0:
+            raise ValueError('Uploaded image is empty')
+
+        digest = stream.hexdigest()
+        name = f'{digest}.{extension}'
+        target = os.path.join(self.root, digest[:2], name)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            stream.flush()
+            os.chmod(stream.name, FILE_MODE)
+            try:
+                os.link(stream.name, target)
+            except FileExistsError:
+                pass  # an identical upload finished first
+            except OSError:
+                shutil.copyfile(stream.name, target)
+
+        stream.close()
+        return '/'.join([os.path.basename(self.root), digest[:2], name])
+
+    def _spool(self, source) -> HashingFile:
+        """Copy a non-streamed upload into a HashingFile in chunks"""
+        spooled = self.open_temp()
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            spooled.write(chunk)
+        return spooled